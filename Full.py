@@ -1,30 +1,17 @@
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 import webview
-import joblib
-import os
-import datetime
 import base64
-import mysql.connector
-
-# ==============================
-# CONFIGURATION
-# ==============================
-MODEL_FILE = 'heart_model.joblib'
-DATA_FILE = 'train.csv'
+from engine import get_engine, parse_vitals
+from db import connect, insert_prediction
+from rollups import ensure_rollups, refresh, dashboard, RollupJob
+from partitions import MaintenanceJob
+from trends import clean_patient_id, patient_trend
 
 # ==============================
 # DATABASE CONNECTION
 # ==============================
 try:
-    db = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",  # put your mysql password
-        database="heartguard"
-    )
-    cursor = db.cursor()
+    db = connect()
+    ensure_rollups(db)
     print("✅ Database Connected")
 except Exception as e:
     print("❌ Database Error:", e)
@@ -33,32 +20,8 @@ except Exception as e:
 # ==============================
 # AI MODEL ENGINE
 # ==============================
-def initialize_engine():
-    features = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
-    
-    if os.path.exists(MODEL_FILE):
-        return joblib.load(MODEL_FILE), features
-
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-        df['Heart Disease'] = df['Heart Disease'].map({'Absence': 0, 'Presence': 1})
-        X = df[features]
-        y = df['Heart Disease']
-
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=12,
-            n_jobs=-1,
-            random_state=42
-        )
-
-        model.fit(X, y)
-        joblib.dump(model, MODEL_FILE)
-        return model, features
-
-    return None, features
-
-model, feature_names = initialize_engine()
+# Shared with the other front ends; the model is read on first use
+engine = get_engine()
 
 # ==============================
 # API CLASS
@@ -67,79 +30,45 @@ class Api:
 
     def predict(self, data):
         try:
-            age = int(data['Age'])
-            sex = int(data['Sex'])
-            cp = int(data['CP'])
-            chol = float(data['Chol'])
-            bp = float(data['BP'])
-            hr = float(data['HR'])
-
-            # Prediction
-            if model:
-                df_input = pd.DataFrame(
-                    [[age, sex, cp, chol, bp, hr]],
-                    columns=feature_names
-                )
-                prob = model.predict_proba(df_input)[0][1] * 100
-            else:
-                prob = 25.5  # fallback
-
-            risk = round(prob, 1)
-
-            # Risk logic
-            med_tips = []
-            food_tips = ["Eat fresh fruits and vegetables daily."]
-
-            if bp > 140:
-                med_tips.append("High Blood Pressure detected.")
-                food_tips.append("Reduce salt intake.")
-
-            if chol > 240:
-                med_tips.append("High Cholesterol detected.")
-                food_tips.append("Avoid fried food. Eat oats and beans.")
-
-            if risk > 70:
-                status = "HIGH RISK"
-                color = "#ff4757"
-                med_tips.append("CRITICAL: Consult cardiologist immediately.")
-            elif risk > 30:
-                status = "MEDIUM RISK"
-                color = "#ffa502"
-                med_tips.append("CAUTION: Monitor health closely.")
-            else:
-                status = "HEALTHY"
-                color = "#2ed573"
-                med_tips.append("Heart condition looks good.")
+            values = parse_vitals(data)
+            patient_id = clean_patient_id(data.get('PatientID'))
+
+            result = engine.predict(values, 'full')
+            if "error" in result:
+                return result
+            status = result["status"]
 
             # ==============================
             # SAVE TO DATABASE
             # ==============================
             if db:
                 try:
-                    sql = """
-                        INSERT INTO predictions 
-                        (age, sex, chest_pain, cholesterol, bp, max_hr, risk, status, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-                    values = (
-                        age, sex, cp, chol, bp, hr,
-                        risk, status,
-                        datetime.datetime.now()
-                    )
-                    cursor.execute(sql, values)
-                    db.commit()
+                    insert_prediction(db, *values, result["risk"], status, patient_id=patient_id)
                 except Exception as db_error:
                     print("DB Insert Error:", db_error)
 
-            return {
-                "risk": risk,
-                "color": color,
-                "status": status,
-                "medical": med_tips,
-                "food": food_tips,
-                "timestamp": datetime.datetime.now().strftime("%I:%M %p")
-            }
+            result["patient_id"] = patient_id
+            return result
+
+        except Exception as e:
+            return {"error": str(e)}
 
+    def dashboard(self, period='day', days=30):
+        # Served from the rollup tables; refresh() only folds in rows added
+        # since the last run, so this stays fast as predictions grow
+        if not db:
+            return {"error": "Database not connected"}
+        try:
+            refresh(db)
+            return dashboard(db, period, int(days))
+        except Exception as e:
+            return {"error": str(e)}
+
+    def patient_trend(self, patient_id, points=120):
+        if not db:
+            return {"error": "Database not connected"}
+        try:
+            return patient_trend(db, patient_id, int(points))
         except Exception as e:
             return {"error": str(e)}
 
@@ -170,6 +99,15 @@ button {
     border:none;
     cursor:pointer;
 }
+#dashboard table {
+    margin:15px auto;
+    border-collapse:collapse;
+    font-size:14px;
+}
+#dashboard td, #dashboard th {
+    border:1px solid #ccc;
+    padding:4px 10px;
+}
 #result {
     margin-top:30px;
     font-size:20px;
@@ -181,6 +119,7 @@ button {
 
 <h2>HeartGuard AI Predictor</h2>
 
+<input type="text" id="PatientID" placeholder="Patient ID (optional)"><br>
 <select id="Age"></select><br>
 <select id="Sex">
 <option value="1">Male</option>
@@ -196,6 +135,19 @@ button {
 
 <div id="result"></div>
 
+<h3>Population Dashboard</h3>
+<select id="Period">
+<option value="day">Daily (30 days)</option>
+<option value="week">Weekly (12 weeks)</option>
+</select>
+<button onclick="loadDashboard()">REFRESH</button>
+<div id="dashboard"></div>
+
+<h3>Patient Trend</h3>
+<input type="text" id="TrendID" placeholder="Patient ID">
+<button onclick="loadTrend(TrendID.value)">SHOW</button>
+<div id="trend"></div>
+
 <script>
 for(let i=1;i<=100;i++){
     let o=new Option(i,i);
@@ -205,6 +157,7 @@ for(let i=1;i<=100;i++){
 
 async function predict(){
     let data={
+        PatientID:PatientID.value,
         Age:Age.value,
         Sex:Sex.value,
         CP:CP.value,
@@ -218,6 +171,54 @@ async function predict(){
     document.getElementById("result").innerHTML=
         "<span style='color:"+res.color+"'>"+
         res.status+" - "+res.risk+"%</span>";
+
+    if(res.patient_id){
+        TrendID.value=res.patient_id;
+        loadTrend(res.patient_id);
+    }
+}
+
+function sparkline(values, w, h, color){
+    let lo=Math.min(...values), hi=Math.max(...values), span=(hi-lo)||1;
+    let pts=values.map((v,i)=>
+        (values.length>1 ? i*w/(values.length-1) : w/2).toFixed(1)+","+
+        (h-2-(v-lo)*(h-4)/span).toFixed(1)).join(" ");
+    return "<svg width='"+w+"' height='"+h+"'><polyline fill='none' stroke='"+color+
+        "' stroke-width='2' points='"+pts+"'/></svg>";
+}
+
+async function loadTrend(id){
+    let res=await pywebview.api.patient_trend(id);
+    // patient_id and error messages are user input: shown as text, never markup
+    if(res.error){ trend.textContent=res.error; return; }
+    if(!res.readings){ trend.textContent="No readings for "+res.patient_id; return; }
+    let s=res.series, row=(label,key,color)=>
+        "<tr><td>"+label+"</td><td>"+sparkline(s.map(p=>p[key]),240,36,color)+"</td><td>"+s[s.length-1][key]+"</td></tr>";
+    trend.innerHTML=
+        "<p>"+res.readings+" readings, "+res.first+" to "+res.last+"</p>"+
+        "<table style='margin:auto'>"+
+        row("Risk %","risk","#ff4757")+row("BP","bp","#3742fa")+
+        row("Cholesterol","cholesterol","#ffa502")+row("Max HR","max_hr","#2ed573")+
+        "</table>";
+}
+
+function table(head, rows){
+    return "<table><tr>"+head.map(h=>"<th>"+h+"</th>").join("")+"</tr>"+
+        rows.map(r=>"<tr>"+r.map(c=>"<td>"+(c==null?"-":c)+"</td>").join("")+"</tr>").join("")+
+        "</table>";
+}
+
+async function loadDashboard(){
+    let period=Period.value;
+    let res=await pywebview.api.dashboard(period, period=="week"?84:30);
+    if(res.error){ dashboard.textContent=res.error; return; }
+    dashboard.innerHTML=
+        "<p>"+res.total+" predictions since "+res.since+" ("+res.query_ms+" ms)</p>"+
+        table(["Period","Total","High","Medium","Healthy","Avg risk"],
+            res.series.map(s=>[s.start,s.count,s["HIGH RISK"],s["MEDIUM RISK"],s["HEALTHY"],s.avg_risk]))+
+        table(["Risk","Count"], res.risk_distribution.map(b=>[b.bucket,b.count]))+
+        table(["Age band","Count","Avg risk","Avg BP","Avg chol","Avg HR"],
+            res.age_bands.map(b=>[b.band,b.count,b.avg_risk,b.avg_bp,b.avg_chol,b.avg_hr]));
 }
 </script>
 
@@ -229,6 +230,12 @@ async function predict(){
 # START APP
 # ==============================
 if __name__ == '__main__':
+    # A running daemon.py already holds the model; otherwise load it here
+    engine.connect() or engine.load(block=True)
+    if db:
+        RollupJob(db).start()
+        # Monthly partitions: future months, retention, optional archiving
+        MaintenanceJob(db).start()
     window = webview.create_window(
         "HeartGuard AI",
         html=html_ui,
@@ -0,0 +1,183 @@
+import os
+
+# --- CONFIGURATION ---
+DEFAULT_BACKEND = 'forest'
+
+# ============================================================
+# BACKEND INTERFACE
+# ============================================================
+class Backend:
+    # fit() builds a model from the six-feature frame; predict_risk() returns
+    # P(heart disease) per row. Models are plain sklearn estimators, so they
+    # go through persistence.save_model/load_model like before.
+    name = None
+    model_classes = ()
+
+    def fit(self, X, y, n_estimators=100, max_depth=12, n_jobs=-1, random_state=42, progress=None):
+        raise NotImplementedError
+
+    def predict_risk(self, model, X):
+        return model.predict_proba(as_frame(model, X))[:, 1]
+
+    def predict_risk_spread(self, model, X):
+        # (risk, spread): spread is the standard deviation of the ensemble's
+        # votes, or None for models that do not vote
+        return self.predict_risk(model, X), None
+
+    def handles(self, model):
+        return type(model).__name__ in self.model_classes
+
+def as_frame(model, X):
+    # Models fitted on a DataFrame expect their column names back; pandas is
+    # only imported here so the generated scorer path never loads it
+    if hasattr(model, 'feature_names_in_') and not hasattr(X, 'columns'):
+        import pandas as pd
+        return pd.DataFrame(X, columns=model.feature_names_in_)
+    return X
+
+def _grow(mdl, size_param, total, X, y, progress):
+    # warm_start builds the same model a single fit() would, in steps we can report
+    step = max(1, total // 10)
+    done = 0
+    while done < total:
+        done = min(total, done + step)
+        mdl.set_params(**{size_param: done})
+        mdl.fit(X, y)
+        if progress:
+            progress(done, total)
+    mdl.set_params(warm_start=False)
+    return mdl
+
+class ForestBackend(Backend):
+    name = 'forest'
+    model_classes = ('RandomForestClassifier',)
+
+    def fit(self, X, y, n_estimators=100, max_depth=12, n_jobs=-1, random_state=42, progress=None):
+        from sklearn.ensemble import RandomForestClassifier
+        mdl = RandomForestClassifier(n_estimators=0, max_depth=max_depth, n_jobs=n_jobs,
+                                     random_state=random_state, warm_start=True)
+        return _grow(mdl, 'n_estimators', n_estimators, X, y, progress)
+
+    def predict_risk_spread(self, model, X):
+        # One pass over the trees: the per-tree probabilities predict_proba
+        # averages (summed in the same order) and their dispersion
+        import numpy as np
+        X = np.ascontiguousarray(getattr(X, 'values', X), dtype=np.float32)
+        col = list(model.classes_).index(1)
+        total = np.zeros(len(X))
+        total_sq = np.zeros(len(X))
+        for est in model.estimators_:
+            p = est.predict_proba(X, check_input=False)[:, col]
+            total += p
+            total_sq += p * p
+        n = len(model.estimators_)
+        mean = total / n
+        return mean, np.sqrt(np.maximum(total_sq / n - mean * mean, 0.0))
+
+class BinnedForestBackend(ForestBackend):
+    # The same forest grown on uint8 bin codes (binning.py). Features are
+    # binned once up front instead of every node sorting raw floats; the
+    # edges are saved with the model and applied again before scoring.
+    name = 'binned'
+    model_classes = ('BinnedForest',)
+
+    def fit(self, X, y, n_estimators=100, max_depth=12, n_jobs=-1, random_state=42, progress=None):
+        from binning import BinnedForest, fit_edges, apply_edges
+        edges = fit_edges(X)
+        forest = super().fit(apply_edges(X, edges), y, n_estimators=n_estimators, max_depth=max_depth,
+                             n_jobs=n_jobs, random_state=random_state, progress=progress)
+        return BinnedForest(edges, forest, getattr(X, 'columns', None))
+
+    def predict_risk(self, model, X):
+        return model.forest_.predict_proba(model.transform(X))[:, 1]
+
+    def predict_risk_spread(self, model, X):
+        return super().predict_risk_spread(model.forest_, model.transform(X))
+
+class HistGradientBoostingBackend(Backend):
+    # Bins each feature into at most 255 levels and grows shallow boosted
+    # trees; small on disk and cheap to evaluate for six tabular features.
+    name = 'hist_gb'
+    model_classes = ('HistGradientBoostingClassifier',)
+
+    def fit(self, X, y, n_estimators=100, max_depth=12, n_jobs=-1, random_state=42, progress=None):
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        # Boosting rounds replace trees; shallow trees replace the forest's deep ones.
+        # n_jobs is honoured through OMP_NUM_THREADS set by train_runner.
+        mdl = HistGradientBoostingClassifier(max_iter=0, max_depth=min(max_depth, 6), learning_rate=0.1,
+                                             early_stopping=False, random_state=random_state,
+                                             warm_start=True)
+        return _grow(mdl, 'max_iter', n_estimators, X, y, progress)
+
+class CompiledBackend(Backend):
+    # Modules written by export_scorer.py: plain Python, no sklearn at all
+    name = 'compiled'
+
+    def fit(self, X, y, **params):
+        raise NotImplementedError("compiled scorers are exported from a trained forest")
+
+    def predict_risk(self, model, X):
+        import numpy as np
+        rows = X.tolist() if hasattr(X, 'tolist') else X
+        return np.array([p[1] for p in model.predict_proba(rows)])
+
+    def predict_risk_spread(self, model, X):
+        # Scorers exported before predict_spread_one existed only give the mean
+        if not hasattr(model, 'predict_spread_one'):
+            return self.predict_risk(model, X), None
+        import numpy as np
+        rows = X.tolist() if hasattr(X, 'tolist') else X
+        out = np.array([model.predict_spread_one(row) for row in rows]).reshape(-1, 2)
+        return out[:, 0], out[:, 1]
+
+    def handles(self, model):
+        return getattr(model, 'HEARTGUARD_SCORER', False)
+
+class CompactBackend(Backend):
+    # Quantized forests written by compact_model.py; numpy only
+    name = 'compact'
+
+    def fit(self, X, y, **params):
+        raise NotImplementedError("compact models are converted from a trained forest")
+
+    def predict_risk_spread(self, model, X):
+        return model.predict_spread(X)
+
+    def handles(self, model):
+        return getattr(model, 'HEARTGUARD_COMPACT', False)
+
+BACKENDS = {b.name: b for b in (ForestBackend(), BinnedForestBackend(), HistGradientBoostingBackend())}
+COMPILED = CompiledBackend()
+COMPACT = CompactBackend()
+
+def get_backend(name=None):
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{name}'. Choose from: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name]
+
+def backend_for(model):
+    if COMPILED.handles(model):
+        return COMPILED
+    if COMPACT.handles(model):
+        return COMPACT
+    for backend in BACKENDS.values():
+        if backend.handles(model):
+            return backend
+    # Anything else with predict_proba is scored the generic way
+    return Backend()
+
+def predict_risk(model, X):
+    return backend_for(model).predict_risk(model, X)
+
+def predict_risk_spread(model, X):
+    return backend_for(model).predict_risk_spread(model, X)
+
+def model_path(base, name=None):
+    # Non-default backends keep their own artifact next to the forest's,
+    # so switching the config back and forth never forces a retrain
+    name = name or DEFAULT_BACKEND
+    if name == DEFAULT_BACKEND:
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}.{name}{ext}"
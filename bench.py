@@ -0,0 +1,488 @@
+import numpy as np
+import argparse
+import json
+import time
+
+# --- HELPERS ---
+def best_of(fn, repeat=5):
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+def print_table(title, header, rows):
+    print(f"\n{title}")
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    for line in [header] + rows:
+        print("  ".join(str(x).rjust(w) for x, w in zip(line, widths)))
+
+# --- 1. BRIDGE TRANSPORT ---
+def bench_transport(args):
+    from transport import pack, unpack
+
+    rng = np.random.default_rng(0)
+    labels = ["HIGH RISK", "MEDIUM RISK", "HEALTHY"]
+    results = []
+    for n in args.rows:
+        risk = np.round(rng.random(n) * 100, 1)
+        status = np.asarray(labels, dtype=object)[rng.integers(0, 3, n)]
+
+        def plain():
+            return json.dumps([{"risk": float(r), "status": s} for r, s in zip(risk, status)])
+
+        def packed():
+            return json.dumps(pack({"risk": (risk, 'f4'), "status": (status, 'label', labels)}))
+
+        t_json, s_json = best_of(plain)
+        t_pack, s_pack = best_of(packed)
+        p_json, _ = best_of(lambda: json.loads(s_json))
+        p_pack, _ = best_of(lambda: unpack(json.loads(s_pack)))
+        results.append([f"{n:,}", "json", f"{len(s_json):,}", f"{t_json:.1f}", f"{p_json:.1f}"])
+        results.append([f"{n:,}", "packed", f"{len(s_pack):,}", f"{t_pack:.1f}", f"{p_pack:.1f}"])
+
+    print_table("Bridge payloads (risk + status per row)",
+                ["rows", "format", "bytes", "build ms", "parse ms"], results)
+
+# --- 2. MODEL BACKENDS ---
+def model_bytes(mdl):
+    import io
+    import joblib
+    buf = io.BytesIO()
+    joblib.dump(mdl, buf)
+    return buf.tell()
+
+def split_data(args):
+    from sklearn.model_selection import train_test_split
+    from train_runner import load_training_data
+    X, y = load_training_data(args.data, args.layout)
+    return train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+
+def latency_ms(mdl, score, X_test, calls=200):
+    # Single-patient calls, the way Api.predict uses the model
+    rows = [X_test.iloc[[i % len(X_test)]] for i in range(calls)]
+    t0 = time.perf_counter()
+    for row in rows:
+        score(mdl, row)
+    return (time.perf_counter() - t0) / calls * 1000
+
+def bench_backends(args):
+    from sklearn.metrics import roc_auc_score
+    from backends import get_backend
+
+    X_train, X_test, y_train, y_test = split_data(args)
+    results = []
+    for name in args.backends:
+        backend = get_backend(name)
+        t0 = time.perf_counter()
+        mdl = backend.fit(X_train, y_train, n_estimators=args.trees, max_depth=args.depth)
+        fit_s = time.perf_counter() - t0
+        # Score single rows on one thread, like the UI does
+        if hasattr(mdl, 'n_jobs'):
+            mdl.set_params(n_jobs=1)
+        batch_ms, prob = best_of(lambda: backend.predict_risk(mdl, X_test), repeat=3)
+        results.append([
+            name, f"{fit_s:.2f}", f"{latency_ms(mdl, backend.predict_risk, X_test):.2f}",
+            f"{batch_ms / len(X_test) * 1000:.1f}", f"{model_bytes(mdl) / 1024:,.0f}",
+            f"{roc_auc_score(y_test, prob):.4f}"
+        ])
+    print_table(f"Backends on {args.data} ({len(X_train):,} train / {len(X_test):,} test rows)",
+                ["backend", "fit s", "1-row ms", "batch us/row", "size KB", "AUC"], results)
+
+# --- 3. COLD START ---
+STARTUP_PROBES = {
+    'joblib + sklearn': (
+        "import pandas as pd, joblib\n"
+        "mdl = joblib.load({model!r})\n"
+        "prob = mdl.predict_proba(pd.DataFrame([ROW], columns=mdl.feature_names_in_))[0][1]\n"
+    ),
+    'generated scorer': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('heart_scorer', {scorer!r})\n"
+        "scorer = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(scorer)\n"
+        "prob = scorer.predict_proba([ROW])[0][1]\n"
+    )
+}
+
+def bench_startup(args):
+    import subprocess
+    import sys
+    results = []
+    for name, body in STARTUP_PROBES.items():
+        # Fresh interpreter per run: import + load + first score, then peak RSS
+        code = (
+            "import time, json, resource\n"
+            "t0 = time.perf_counter()\n"
+            "ROW = [45, 1, 2, 239.0, 130.0, 150.0]\n"
+            + body.format(model=args.model, scorer=args.scorer) +
+            "print(json.dumps({'s': time.perf_counter() - t0, 'prob': float(prob),"
+            " 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+        )
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = min(runs, key=lambda r: r['s'])
+        results.append([name, f"{best['s'] * 1000:,.0f}", f"{best['rss'] / 1024:,.0f}", f"{best['prob']:.6f}"])
+    print_table("Cold start to first prediction (best of %d)" % args.runs,
+                ["path", "ms", "peak RSS MB", "P(disease)"], results)
+
+# --- 4. SHARED ENGINE ---
+def bench_engine(args):
+    # The one code path every front end goes through: cold load, then
+    # single predictions and batch evaluation per front end's rule set
+    import subprocess
+    import sys
+    code = (
+        "import time, json, resource\n"
+        "t0 = time.perf_counter()\n"
+        "from engine import Engine\n"
+        "e = Engine().load(block=True)\n"
+        "res = e.predict([45, 1, 2, 239.0, 130.0, 150.0])\n"
+        "print(json.dumps({'s': time.perf_counter() - t0, 'risk': res.get('risk'),"
+        " 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+    )
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    cold = min(runs, key=lambda r: r['s'])
+    print(f"\nCold load to first prediction: {cold['s'] * 1000:,.0f} ms, "
+          f"peak RSS {cold['rss'] / 1024:,.0f} MB (best of {args.runs})")
+
+    from engine import Engine
+    engine = Engine().load(block=True)
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.integers(25, 85, args.rows), rng.integers(0, 2, args.rows), rng.integers(1, 5, args.rows),
+        rng.integers(150, 350, args.rows), rng.integers(95, 190, args.rows), rng.integers(90, 200, args.rows)
+    ]).astype(np.float64)
+    rows = X[:args.calls].tolist()
+    results = []
+    for ruleset in args.rulesets:
+        t0 = time.perf_counter()
+        for row in rows:
+            engine.predict(row, ruleset)
+        single_ms = (time.perf_counter() - t0) / len(rows) * 1000
+        batch_ms, _ = best_of(lambda: engine.evaluate(X, ruleset), repeat=3)
+        results.append([ruleset, f"{single_ms:.3f}", f"{batch_ms / len(X) * 1000:.2f}"])
+    print_table(f"Engine ({engine.model_file}, {len(X):,}-row batches)",
+                ["rules", "predict ms", "batch us/row"], results)
+
+# --- 5. OUT-OF-CORE TRAINING ---
+def bench_ooc(args):
+    # Same train/test split for both: the in-memory forest and chunked
+    # sub-forests merged into one, at each chunk size
+    import os
+    import tempfile
+    from sklearn.metrics import roc_auc_score, accuracy_score
+    from backends import get_backend
+    from ooc_train import fit_out_of_core
+    from train_runner import LAYOUTS
+
+    X_train, X_test, y_train, y_test = split_data(args)
+    spec = LAYOUTS[args.layout]
+    results = []
+
+    t0 = time.perf_counter()
+    mdl = get_backend('forest').fit(X_train, y_train, n_estimators=args.trees, max_depth=args.depth, n_jobs=1)
+    fit_s = time.perf_counter() - t0
+    prob = mdl.predict_proba(X_test)[:, 1]
+    results.append(["in memory", f"{len(X_train):,}", 1, f"{fit_s:.2f}", "-",
+                    f"{roc_auc_score(y_test, prob):.4f}", f"{accuracy_score(y_test, prob >= 0.5):.4f}"])
+
+    # The training split written back out in the source layout, for the chunked reader
+    frame = X_train.rename(columns={v: k for k, v in spec['columns'].items()})
+    labels = {v: k for k, v in spec['labels'].items()} if spec['labels'] else None
+    frame[spec['target']] = y_train.map(labels) if labels else y_train
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        frame.to_csv(path, index=False)
+        for chunk in args.chunks:
+            mdl, _, stats = fit_out_of_core(path, args.layout, args.trees, args.depth, chunk, args.workers,
+                                            log=lambda msg: None)
+            prob = mdl.predict_proba(X_test)[:, 1]
+            results.append([f"chunks of {stats['chunk_rows']:,}", f"{stats['rows']:,}", stats['chunks'],
+                            f"{stats['seconds']:.2f}", f"{stats['worker_peak_rss_mb']:,.0f}",
+                            f"{roc_auc_score(y_test, prob):.4f}", f"{accuracy_score(y_test, prob >= 0.5):.4f}"])
+    finally:
+        os.remove(path)
+    print_table(f"Out-of-core vs in-memory forest ({args.trees} trees, {len(X_test):,} test rows)",
+                ["training", "rows", "chunks", "fit s", "worker MB", "AUC", "accuracy"], results)
+
+# --- 6. COMPACT MODEL ---
+def bench_compact(args):
+    # The joblib forest against its compact conversions: file and in-memory
+    # size, single-row and batch latency, and the worst risk deviation
+    import pandas as pd
+    from persistence import read_model
+    from compact_model import compact_forest, sample_rows, max_deviation, deviation_bound, FEATURES
+
+    mdl = read_model(args.model, FEATURES)
+    mdl.set_params(n_jobs=1)
+    X = sample_rows(args.rows)
+    row = X[:1]
+    results = []
+    frame, one = pd.DataFrame(X, columns=FEATURES), pd.DataFrame(row, columns=FEATURES)
+    single_ms, _ = best_of(lambda: [mdl.predict_proba(one) for _ in range(args.calls)])
+    batch_ms, _ = best_of(lambda: mdl.predict_proba(frame), repeat=3)
+    size = model_bytes(mdl)
+    results.append(["sklearn", f"{size / 1024:,.0f}", "1.0x", f"{single_ms / args.calls:.3f}",
+                    f"{batch_ms / len(X) * 1000:.2f}", "-", "-"])
+    for bits in args.leaf_bits:
+        compact = compact_forest(mdl, bits)
+        single_ms, _ = best_of(lambda: [compact.predict_proba(row) for _ in range(args.calls)])
+        batch_ms, _ = best_of(lambda: compact.predict_proba(X), repeat=3)
+        nbytes = model_bytes(compact)
+        results.append([f"compact {bits}-bit", f"{nbytes / 1024:,.0f}", f"{size / nbytes:.1f}x",
+                        f"{single_ms / args.calls:.3f}", f"{batch_ms / len(X) * 1000:.2f}",
+                        f"{max_deviation(mdl, compact, X):.4f}", f"{deviation_bound(mdl, compact):.4f}"])
+    print_table(f"Compact model ({args.model}, {len(mdl.estimators_)} trees, {len(X):,} rows)",
+                ["format", "KB", "smaller", "predict ms", "batch us/row", "max risk delta", "bound"], results)
+
+# --- 7. SCORING DAEMON ---
+def bench_daemon(args):
+    # A window's cold start and per-call latency, in-process vs through a
+    # daemon started here on a private socket
+    import os
+    import subprocess
+    import sys
+    import tempfile
+    from daemon import DaemonClient, DaemonUnavailable
+    sock = os.path.join(tempfile.mkdtemp(prefix='heartguard-bench-'), 'bench.sock')
+    code = (
+        "import time, json, resource\n"
+        "t0 = time.perf_counter()\n"
+        "from engine import Engine\n"
+        "e = Engine()\n"
+        "{connect}\n"
+        "res = e.predict([45, 1, 2, 239.0, 130.0, 150.0])\n"
+        "t1 = time.perf_counter()\n"
+        "for _ in range({calls}): e.predict([45, 1, 2, 239.0, 130.0, 150.0])\n"
+        "print(json.dumps({{'s': t1 - t0, 'ms': (time.perf_counter() - t1) / {calls} * 1000, 'risk': res.get('risk'),"
+        " 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))\n"
+    )
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'daemon.py')
+    server = subprocess.Popen([sys.executable, script, '--socket', sock], stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                DaemonClient(sock).ping()
+                break
+            except DaemonUnavailable:
+                if time.time() > deadline or server.poll() is not None:
+                    raise SystemExit("The benchmark daemon did not start")
+                time.sleep(0.1)
+        results = []
+        for name, connect in (("in-process", "e.load(block=True)"),
+                              ("daemon client", f"assert e.connect({sock!r})")):
+            runs = []
+            for _ in range(args.runs):
+                out = subprocess.run([sys.executable, '-c', code.format(connect=connect, calls=args.calls)],
+                                     capture_output=True, text=True, check=True)
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r['s'])
+            results.append([name, f"{best['s'] * 1000:,.0f}", f"{best['rss'] / 1024:,.0f}",
+                            f"{best['ms']:.3f}", best['risk']])
+    finally:
+        server.terminate()
+        server.wait()
+    print_table(f"Window start and predict(), in-process vs daemon (best of {args.runs})",
+                ["window", "first predict ms", "peak RSS MB", "predict ms", "risk"], results)
+
+# --- 8. EARLY-EXIT BANDS ---
+def bench_bands(args):
+    # Full scoring vs stopping once the band is settled, for each model form
+    # the engine can load; average trees per row is what the early exit saves
+    import os
+    from persistence import read_model
+    from train_runner import load_training_data
+    from rules import RuleTable, RULESETS
+    from compact_model import compact_forest, FEATURES
+    from export_scorer import load_scorer
+    from early_exit import band_estimate
+    from backends import predict_risk
+
+    mdl = read_model(args.model, FEATURES)
+    mdl.set_params(n_jobs=1)
+    models = [("sklearn", mdl), ("compact", compact_forest(mdl))]
+    if os.path.exists(args.scorer):
+        models.append(("generated scorer", load_scorer(args.scorer)))
+    X = load_training_data(args.data, args.layout)[0].to_numpy(dtype=np.float64)[:args.rows]
+    results = []
+    for ruleset in args.rulesets:
+        table = RuleTable(RULESETS[ruleset])
+        for name, model in models:
+            full_ms, prob = best_of(lambda: predict_risk(model, X), repeat=3)
+            early_ms, est = best_of(lambda: band_estimate(model, X, table), repeat=3)
+            agree = (table.evaluate(X, est.risk).band == table.evaluate(X, np.round(prob * 100, 1)).band).mean()
+            results.append([ruleset, name, f"{full_ms / len(X) * 1000:.1f}", f"{early_ms / len(X) * 1000:.1f}",
+                            f"{est.mean_trees:.1f} / {est.n_trees}", f"{(est.trees < est.n_trees).mean():.1%}",
+                            f"{agree:.2%}"])
+    print_table(f"Early-exit band evaluation ({len(X):,} rows of {args.data})",
+                ["rules", "model", "full us/row", "early us/row", "avg trees", "stopped early", "same band"],
+                results)
+    bench_band_ties(mdl, X, args)
+
+def tie_votes(n_trees, risk, rng):
+    # Per-tree P(class 1) in 1/10000 steps whose mean is exactly `risk` points;
+    # summed in different orders the float total lands either side of it
+    base = round(risk * 100)
+    votes = np.full(n_trees, base)
+    half = n_trees // 2
+    step = rng.integers(-min(base, 10000 - base), min(base, 10000 - base) + 1, half)
+    votes[:half] += step
+    votes[half:2 * half] -= step
+    return rng.permutation(votes) / 10000
+
+def bench_band_ties(mdl, X, args, trials=200):
+    # Pins rows on exact .x5 ties next to every risk threshold: every leaf of a
+    # tree gets the same vote, so each row's risk is exactly threshold +/- 0.05.
+    # The early exit must keep the full risk inside its bounds and in its band.
+    import copy
+    from rules import RuleTable, RULESETS
+    from early_exit import band_estimate, risk_conditions
+    from backends import predict_risk
+
+    rng = np.random.default_rng(0)
+    forest = copy.deepcopy(mdl)
+    rows = X[:10]
+    results = []
+    for ruleset in args.rulesets:
+        table = RuleTable(RULESETS[ruleset])
+        for _, threshold in risk_conditions(table):
+            for risk in (threshold - 0.05, threshold + 0.05):
+                outside = flips = 0
+                for _ in range(trials):
+                    for est, p in zip(forest.estimators_, tie_votes(len(forest.estimators_), risk, rng)):
+                        est.tree_.value[:, 0, :] = [1.0 - p, p]
+                    # A fresh wrapper each time; the leaf bounds are cached per model object
+                    model = copy.copy(forest)
+                    full = np.round(predict_risk(model, rows) * 100, 1)
+                    est = band_estimate(model, rows, table)
+                    outside += int(((full < est.low) | (full > est.high)).sum())
+                    flips += int((table.evaluate(rows, est.risk).band != table.evaluate(rows, full).band).sum())
+                results.append([ruleset, f"{risk:.2f}", f"{trials * len(rows):,}", outside, flips])
+    print_table("Exact ties at the band thresholds (sklearn forest)",
+                ["rules", "risk", "rows", "outside bounds", "band flips"], results)
+    if any(r[3] or r[4] for r in results):
+        raise SystemExit("❌ early exit disagrees with full scoring on tied rows")
+
+# --- 9. PRE-BINNED TRAINING ---
+BINNING_PROBE = (
+    "import json, time, resource\n"
+    "import pandas as pd\n"
+    "from sklearn.metrics import roc_auc_score\n"
+    "from sklearn.model_selection import train_test_split\n"
+    "from train_runner import load_training_data\n"
+    "from backends import get_backend\n"
+    "X, y = load_training_data({data!r}, {layout!r})\n"
+    "X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)\n"
+    "X_train = pd.concat([X_train] * {copies}, ignore_index=True)\n"
+    "y_train = pd.concat([y_train] * {copies}, ignore_index=True)\n"
+    "backend = get_backend({backend!r})\n"
+    "base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "t0 = time.perf_counter()\n"
+    "mdl = backend.fit(X_train, y_train, n_estimators={trees}, max_depth={depth}, n_jobs=1)\n"
+    "fit = time.perf_counter() - t0\n"
+    "peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "print(json.dumps({{'fit': fit, 'rows': len(X_train), 'mb': (peak - base) / 1024,"
+    " 'auc': roc_auc_score(y_test, backend.predict_risk(mdl, X_test))}}))\n"
+)
+
+def bench_binning(args):
+    # Raw-float forest vs the same forest on uint8 bins; each fit runs in a
+    # fresh interpreter so the memory column is that fit's growth alone
+    import subprocess
+    import sys
+    results = []
+    for copies in args.copies:
+        for backend in ('forest', 'binned'):
+            code = BINNING_PROBE.format(data=args.data, layout=args.layout, copies=copies, backend=backend,
+                                        trees=args.trees, depth=args.depth)
+            out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            results.append([f"{r['rows']:,}", backend, f"{r['fit']:.2f}", f"{r['mb']:,.0f}", f"{r['auc']:.4f}"])
+    print_table(f"Raw vs pre-binned forest fit ({args.trees} trees, depth {args.depth}, one core)",
+                ["train rows", "backend", "fit s", "fit MB", "AUC"], results)
+
+BENCHMARKS = {
+    'transport': bench_transport,
+    'backends': bench_backends,
+    'startup': bench_startup,
+    'engine': bench_engine,
+    'ooc': bench_ooc,
+    'compact': bench_compact,
+    'daemon': bench_daemon,
+    'bands': bench_bands,
+    'binning': bench_binning
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HeartGuard performance benchmarks.")
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    p = sub.add_parser('transport', help="JSON vs packed typed-array payloads")
+    p.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+
+    p = sub.add_parser('backends', help="Training time, latency, size and AUC per model backend")
+    p.add_argument('--data', default='train.csv')
+    p.add_argument('--layout', default='app')
+    p.add_argument('--backends', nargs='+', default=['forest', 'binned', 'hist_gb'])
+    p.add_argument('--trees', type=int, default=100)
+    p.add_argument('--depth', type=int, default=12)
+
+    p = sub.add_parser('startup', help="Cold start with sklearn vs the generated scorer")
+    p.add_argument('--model', default='heart_model.joblib')
+    p.add_argument('--scorer', default='heart_scorer.py')
+    p.add_argument('--runs', type=int, default=3)
+
+    p = sub.add_parser('engine', help="Cold load and scoring through the shared engine")
+    p.add_argument('--rulesets', nargs='+', default=['final', 'full', 'hey', 'checkup'])
+    p.add_argument('--rows', type=int, default=10000)
+    p.add_argument('--calls', type=int, default=500)
+    p.add_argument('--runs', type=int, default=3)
+
+    p = sub.add_parser('ooc', help="Chunked out-of-core training vs in-memory: time, memory, accuracy")
+    p.add_argument('--data', default='train.csv')
+    p.add_argument('--layout', default='app')
+    p.add_argument('--trees', type=int, default=100)
+    p.add_argument('--depth', type=int, default=12)
+    p.add_argument('--chunks', type=int, nargs='+', default=[500, 1000, 2000])
+    p.add_argument('--workers', type=int, default=2)
+
+    p = sub.add_parser('compact', help="Compact quantized forest vs joblib: size, latency, risk deviation")
+    p.add_argument('--model', default='heart_model.joblib')
+    p.add_argument('--leaf-bits', type=int, nargs='+', default=[16, 8])
+    p.add_argument('--rows', type=int, default=10000)
+    p.add_argument('--calls', type=int, default=100)
+
+    p = sub.add_parser('daemon', help="Window start, memory and predict latency with and without the daemon")
+    p.add_argument('--runs', type=int, default=3)
+    p.add_argument('--calls', type=int, default=200)
+
+    p = sub.add_parser('bands', help="Early-exit band evaluation: trees used, latency, band agreement")
+    p.add_argument('--model', default='heart_model.joblib')
+    p.add_argument('--scorer', default='heart_scorer.py')
+    p.add_argument('--data', default='train.csv')
+    p.add_argument('--layout', default='app')
+    p.add_argument('--rulesets', nargs='+', default=['final', 'checkup'])
+    p.add_argument('--rows', type=int, default=2000)
+
+    p = sub.add_parser('binning', help="Forest fit on raw floats vs uint8 bins: time, memory, AUC")
+    p.add_argument('--data', default='train.csv')
+    p.add_argument('--layout', default='app')
+    p.add_argument('--trees', type=int, default=100)
+    p.add_argument('--depth', type=int, default=12)
+    p.add_argument('--copies', type=int, nargs='+', default=[1, 10],
+                   help="Training split repeated this many times, for a larger fit")
+
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.bench](args)
+
+if __name__ == '__main__':
+    main()
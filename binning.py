@@ -0,0 +1,60 @@
+import numpy as np
+
+# --- CONFIGURATION ---
+# At most this many bins per feature, so every code fits a uint8
+MAX_BINS = 256
+
+# ============================================================
+# BIN EDGES
+# ============================================================
+# A feature with few distinct values (age in years, the chest pain levels,
+# vitals recorded in whole units) gets one bin per value and loses nothing;
+# the trees can split between any two values they could split before.
+# Wider features get quantile edges. Values equal to an edge go to the lower
+# bin, the same side a tree sends them for `x <= threshold`.
+def feature_edges(values, max_bins=MAX_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    distinct = np.unique(values[~np.isnan(values)])
+    if len(distinct) <= max_bins:
+        edges = (distinct[:-1] + distinct[1:]) / 2
+    else:
+        edges = np.unique(np.quantile(distinct, np.linspace(0, 1, max_bins + 1)[1:-1]))
+    return edges.astype(np.float64)
+
+def fit_edges(X, max_bins=MAX_BINS):
+    X = np.asarray(getattr(X, 'values', X), dtype=np.float64)
+    return [feature_edges(X[:, j], max_bins) for j in range(X.shape[1])]
+
+def apply_edges(X, edges):
+    # uint8 codes; NaN lands in the top bin
+    X = np.asarray(getattr(X, 'values', X), dtype=np.float64).reshape(-1, len(edges))
+    out = np.empty(X.shape, dtype=np.uint8)
+    for j, e in enumerate(edges):
+        out[:, j] = np.searchsorted(e, X[:, j], side='left')
+    return out
+
+# ============================================================
+# BINNED FOREST
+# ============================================================
+class BinnedForest:
+    # A RandomForestClassifier grown on uint8 bin codes, with the bin edges
+    # it was trained with. predict_proba bins raw vitals the same way first.
+    def __init__(self, edges, forest, feature_names=None):
+        self.edges_ = edges
+        self.forest_ = forest
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_features_in_ = len(edges)
+        self.n_estimators = getattr(forest, 'n_estimators', None)
+
+    @property
+    def classes_(self):
+        return self.forest_.classes_
+
+    def transform(self, X):
+        return apply_edges(X, self.edges_)
+
+    def predict_proba(self, X):
+        return self.forest_.predict_proba(self.transform(X))
+
+    def n_bins(self):
+        return [len(e) + 1 for e in self.edges_]
@@ -0,0 +1,177 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from rules import RuleTable, RULESETS
+from persistence import read_model
+# The artifact the app scores with, including the HEARTGUARD_BACKEND choice
+from engine import MODEL_FILE
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+CHUNK_ROWS = 50000
+
+# Input layouts understood by initialize_engine in the desktop variants.
+# 'app' is the train.csv layout, 'uci' is the heart2.py dataset layout.
+COLUMN_MAPS = {
+    'app': {f: f for f in FEATURES},
+    'uci': {
+        'age': 'Age',
+        'sex': 'Sex',
+        'cp': 'Chest pain type',
+        'chol': 'Cholesterol',
+        'trestbps': 'BP',
+        'thalach': 'Max HR'
+    }
+}
+
+def detect_layout(columns):
+    cols = set(columns)
+    for name, mapping in COLUMN_MAPS.items():
+        if cols.issuperset(mapping):
+            return name
+    raise ValueError(f"Input has none of the known column layouts: {sorted(COLUMN_MAPS)}")
+
+# --- 1. WORKER SIDE ---
+# Each worker loads the forest once and keeps it for every chunk it scores.
+_model = None
+_rules = RuleTable(RULESETS['final'], FEATURES)
+
+def _init_worker(model_file):
+    global _model
+    _model = read_model(model_file, FEATURES)
+    # The pool already spreads chunks over the cores
+    if hasattr(_model, 'n_jobs'):
+        _model.n_jobs = 1
+
+def score_block(X):
+    prob = np.full(len(X), np.nan)
+    ok = ~np.isnan(X).any(axis=1)
+    if ok.any():
+        df_input = pd.DataFrame(X[ok], columns=FEATURES)
+        prob[ok] = _model.predict_proba(df_input)[:, 1] * 100
+    risk = np.round(prob, 1)
+    status = _rules.evaluate(X, risk).status
+    status[~ok] = "INVALID"
+    return risk, status
+
+# --- 2. OUTPUT WRITERS ---
+class CsvWriter:
+    def __init__(self, path):
+        self.f = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.f, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.f.close()
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema, compression='zstd')
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def open_writer(path):
+    if path.endswith('.parquet'):
+        return ParquetWriter(path)
+    return CsvWriter(path)
+
+# --- 3. PIPELINE ---
+def read_chunks(path, chunk_rows):
+    # Column names are stripped the same way hey.py cleans train.csv
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        yield chunk
+
+def feature_block(chunk, mapping):
+    X = chunk[list(mapping)].rename(columns=mapping)[FEATURES]
+    return X.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+def run(input_path, output_path, model_file=MODEL_FILE, workers=None,
+        chunk_rows=CHUNK_ROWS, layout=None, log=sys.stderr, progress=None):
+    if not os.path.exists(model_file):
+        raise FileNotFoundError(f"Model file '{model_file}' not found. Launch the app once to train it.")
+
+    workers = workers or os.cpu_count() or 1
+    # At most two chunks per worker are held in memory at any time
+    max_in_flight = workers * 2
+    pending = deque()
+    writer = open_writer(output_path)
+    mapping = None
+    rows = 0
+    start = time.perf_counter()
+
+    def flush_one():
+        nonlocal rows
+        chunk, fut = pending.popleft()
+        risk, status = fut.result()
+        chunk['risk'] = risk
+        chunk['status'] = status
+        writer.write(chunk)
+        rows += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{rows:,} rows scored ({rows / elapsed:,.0f} rows/s)", file=log)
+        if progress:
+            # May raise to stop the run (e.g. a cancelled background job)
+            progress(rows)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_file,)) as pool:
+            for chunk in read_chunks(input_path, chunk_rows):
+                if mapping is None:
+                    mapping = COLUMN_MAPS[layout or detect_layout(chunk.columns)]
+                pending.append((chunk, pool.submit(score_block, feature_block(chunk, mapping))))
+                if len(pending) >= max_in_flight:
+                    flush_one()
+            while pending:
+                flush_one()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"Done: {rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)", file=log)
+    return {"rows": rows, "seconds": elapsed, "rows_per_sec": rate}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large CSV of patient vitals with the HeartGuard model.")
+    parser.add_argument('input', help="CSV file with patient vitals")
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--model', default=MODEL_FILE, help="Trained model file")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows read per chunk")
+    parser.add_argument('--layout', choices=sorted(COLUMN_MAPS), default=None,
+                        help="Input column layout (default: detect from header)")
+    args = parser.parse_args(argv)
+    try:
+        run(args.input, args.output, model_file=args.model, workers=args.workers,
+            chunk_rows=args.chunk_rows, layout=args.layout)
+    except (FileNotFoundError, ImportError) as e:
+        # run() is also called from background jobs, so only the CLI exits
+        raise SystemExit(str(e))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import os
+import sys
+import numpy as np
+from persistence import read_meta, read_model, save_model, sha256_file
+
+# --- CONFIGURATION ---
+MODEL_FILE = 'heart_model.joblib'
+COMPACT_FILE = 'heart_model.compact.joblib'
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+# 8 or 16; a leaf is off by at most half a step, 50 / (2**bits - 1) risk points
+LEAF_BITS = 16
+# Largest allowed risk deviation from the source forest, in percentage points
+TOLERANCE = 0.1
+# Rows scored per pass; bounds the (rows x trees) working arrays
+BLOCK_ROWS = 4096
+
+# ============================================================
+# COMPACT FOREST
+# ============================================================
+# Per node: float32 threshold, uint8 feature, int16 (or int32) child indices
+# local to the tree, 9 bytes against the 80 sklearn keeps. Only P(class 1) is
+# kept per leaf, quantized. A leaf tests feature 0 against +inf and its left
+# child is itself, so every row can take max_depth steps without checking for
+# leaves; its `right` holds its slot in leaf_value.
+class CompactForest:
+    HEARTGUARD_COMPACT = True
+
+    def __init__(self, offsets, leaf_offsets, feature, threshold, left, right, leaf_value, leaf_bits,
+                 max_depth, n_features):
+        self.offsets = offsets
+        self.leaf_offsets = leaf_offsets
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.leaf_bits = leaf_bits
+        self.leaf_scale = 1.0 / (2 ** leaf_bits - 1)
+        self.max_depth = max_depth
+        self.n_estimators = len(offsets)
+        self.n_features_in_ = n_features
+        self.classes_ = np.array([0, 1])
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.offsets, self.leaf_offsets, self.feature, self.threshold,
+                                      self.left, self.right, self.leaf_value))
+
+    def tree_votes(self, X):
+        # P(class 1) of every tree for every row, shape (rows, trees)
+        X = np.ascontiguousarray(getattr(X, 'values', X), dtype=np.float32).reshape(-1, self.n_features_in_)
+        out = np.empty((len(X), self.n_estimators))
+        for start in range(0, len(X), BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = self._votes(X[start:start + BLOCK_ROWS])
+        return out
+
+    def _votes(self, X, first=0, last=None):
+        # X: float32 rows; votes of trees first..last-1 only (early_exit.py scores in blocks)
+        offsets = self.offsets[first:last]
+        flat = X.ravel()
+        row = (np.arange(len(X)) * self.n_features_in_)[:, None]
+        node = np.broadcast_to(offsets, (len(X), len(offsets)))
+        for _ in range(self.max_depth):
+            x = flat[row + self.feature[node]]
+            node = offsets + np.where(x > self.threshold[node], self.right[node], self.left[node])
+        slot = self.leaf_offsets[first:last] + self.right[node]
+        return self.leaf_value[slot] * self.leaf_scale
+
+    def predict_proba(self, X):
+        p1 = self.tree_votes(X).mean(axis=1)
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict_spread(self, X):
+        votes = self.tree_votes(X)
+        return votes.mean(axis=1), votes.std(axis=1)
+
+# ============================================================
+# CONVERSION
+# ============================================================
+def _float32_floor(threshold):
+    # sklearn compares float32 inputs with float64 thresholds. Rounding each
+    # threshold down to the nearest float32 keeps every comparison the same.
+    t32 = threshold.astype(np.float32)
+    up = t32.astype(np.float64) > threshold
+    t32[up] = np.nextafter(t32[up], np.float32(-np.inf))
+    return t32
+
+def compact_forest(mdl, leaf_bits=LEAF_BITS):
+    if leaf_bits not in (8, 16):
+        raise ValueError("leaf_bits must be 8 or 16")
+    if not hasattr(mdl, 'estimators_') or not all(hasattr(e, 'tree_') for e in mdl.estimators_):
+        raise ValueError(f"{type(mdl).__name__} is not a tree ensemble; only forests can be compacted")
+    if list(mdl.classes_) != [0, 1] or getattr(mdl, 'n_outputs_', 1) != 1:
+        raise ValueError("Only binary single-output forests can be compacted")
+    if mdl.n_features_in_ > np.iinfo(np.uint8).max + 1:
+        raise ValueError(f"{mdl.n_features_in_} features do not fit a uint8 feature id")
+
+    trees = [e.tree_ for e in mdl.estimators_]
+    index_type = np.int16 if max(t.node_count for t in trees) <= np.iinfo(np.int16).max else np.int32
+    levels = 2 ** leaf_bits - 1
+    offsets, leaf_offsets = [], []
+    parts = {k: [] for k in ('feature', 'threshold', 'left', 'right', 'leaf_value')}
+    nodes = leaves = 0
+    for t in trees:
+        leaf = t.children_left == -1
+        value = t.value[:, 0, :].astype(np.float64)
+        total = value.sum(axis=1)
+        total[total == 0.0] = 1.0
+        slots = np.cumsum(leaf) - 1
+        offsets.append(nodes)
+        leaf_offsets.append(leaves)
+        parts['feature'].append(np.where(leaf, 0, t.feature))
+        parts['threshold'].append(np.where(leaf, np.float32(np.inf), _float32_floor(t.threshold)))
+        parts['left'].append(np.where(leaf, np.arange(t.node_count), t.children_left))
+        parts['right'].append(np.where(leaf, slots, t.children_right))
+        parts['leaf_value'].append(np.round(value[leaf, 1] / total[leaf] * levels))
+        nodes += t.node_count
+        leaves += int(leaf.sum())
+    flat = {k: np.concatenate(v) for k, v in parts.items()}
+    return CompactForest(
+        offsets=np.asarray(offsets, dtype=np.int32),
+        leaf_offsets=np.asarray(leaf_offsets, dtype=np.int32),
+        feature=flat['feature'].astype(np.uint8),
+        threshold=flat['threshold'].astype(np.float32),
+        left=flat['left'].astype(index_type),
+        right=flat['right'].astype(index_type),
+        leaf_value=flat['leaf_value'].astype(np.uint8 if leaf_bits == 8 else np.uint16),
+        leaf_bits=leaf_bits,
+        max_depth=max(t.max_depth for t in trees),
+        n_features=mdl.n_features_in_
+    )
+
+def sample_rows(rows=2000, seed=0):
+    # Random vitals across the app's input ranges (same as export_scorer's check)
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(1, 101, rows), rng.integers(0, 2, rows), rng.integers(1, 5, rows),
+        rng.uniform(80, 600, rows), rng.uniform(60, 250, rows), rng.uniform(40, 220, rows)
+    ]).astype(np.float64)
+
+def deviation_bound(mdl, compact):
+    # Guaranteed largest |risk difference| in percentage points, for any input.
+    # Thresholds compare exactly as sklearn's (_float32_floor), so a row only
+    # moves by its leaves' rounding; the mean over trees moves by at most the
+    # mean of each tree's worst leaf.
+    exact = []
+    for est in mdl.estimators_:
+        t = est.tree_
+        value = t.value[t.children_left == -1, 0, :].astype(np.float64)
+        total = value.sum(axis=1)
+        total[total == 0.0] = 1.0
+        exact.append(value[:, 1] / total)
+    error = np.abs(compact.leaf_value * compact.leaf_scale - np.concatenate(exact))
+    return float(np.maximum.reduceat(error, compact.leaf_offsets).mean() * 100)
+
+def max_deviation(mdl, compact, X):
+    # Largest |risk difference| in percentage points on the rows X
+    import pandas as pd
+    expected = mdl.predict_proba(pd.DataFrame(X, columns=FEATURES))[:, 1]
+    return float(np.abs(compact.predict_proba(X)[:, 1] - expected).max() * 100)
+
+def export_compact(model_file=MODEL_FILE, compact_file=COMPACT_FILE, leaf_bits=LEAF_BITS, tolerance=TOLERANCE,
+                   rows=2000):
+    # Refuses to write a compact model that can drift further than `tolerance`
+    # on any input; the sampled rows are only a cross-check on the bound
+    mdl = read_model(model_file, FEATURES)
+    compact = compact_forest(mdl, leaf_bits)
+    bound = deviation_bound(mdl, compact)
+    if bound > tolerance:
+        raise ValueError(f"risk can deviate by up to {bound:.4f} points (> {tolerance}); "
+                         f"try more leaf bits")
+    deviation = max_deviation(mdl, compact, sample_rows(rows))
+    if deviation > bound + 1e-9:
+        raise ValueError(f"sampled rows deviate by {deviation:.4f} points, over the {bound:.4f} bound")
+    meta = read_meta(model_file) or {}
+    save_model(compact, compact_file, FEATURES, backend='compact', leaf_bits=leaf_bits,
+               source_sha256=meta.get('sha256') or sha256_file(model_file), deviation_bound=round(bound, 6),
+               max_deviation=round(deviation, 6), tolerance=tolerance)
+    return {"compact": compact_file, "trees": compact.n_estimators, "nodes": len(compact.feature),
+            "bytes": os.path.getsize(compact_file), "source_bytes": os.path.getsize(model_file),
+            "deviation_bound": bound, "max_deviation": deviation}
+
+# ============================================================
+# LOADING FROM THE APP
+# ============================================================
+def load_fresh_compact(model_file=MODEL_FILE, compact_file=COMPACT_FILE):
+    # Only used while it was built from the artifact on disk
+    if not (os.path.exists(compact_file) and os.path.exists(model_file)):
+        return None
+    try:
+        meta = read_meta(compact_file) or {}
+        source = read_meta(model_file) or {}
+        if meta.get('source_sha256') != (source.get('sha256') or sha256_file(model_file)):
+            return None
+        return read_model(compact_file, FEATURES)
+    except Exception as e:
+        print(f"Compact model ignored: {e}")
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the trained forest in the compact quantized format.")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--out', default=COMPACT_FILE)
+    parser.add_argument('--leaf-bits', type=int, choices=(8, 16), default=LEAF_BITS)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Max risk deviation, percentage points")
+    parser.add_argument('--rows', type=int, default=2000, help="Random rows scored to cross-check the bound")
+    args = parser.parse_args(argv)
+    try:
+        info = export_compact(args.model, args.out, args.leaf_bits, args.tolerance, args.rows)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"Wrote {info['compact']}: {info['trees']} trees, {info['nodes']:,} nodes, "
+          f"{info['bytes'] / 1024:,.0f} KB (was {info['source_bytes'] / 1024:,.0f} KB), "
+          f"risk deviation at most {info['deviation_bound']:.4f} points "
+          f"({info['max_deviation']:.4f} on {args.rows:,} sampled rows)")
+
+if __name__ == '__main__':
+    # Run from the imported module so the pickle names compact_model.CompactForest, not __main__
+    from compact_model import main
+    main()
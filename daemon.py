@@ -0,0 +1,324 @@
+import argparse
+import json
+import math
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import numpy as np
+
+# --- CONFIGURATION ---
+def _default_socket():
+    # In a directory only this user can open: $XDG_RUNTIME_DIR when the
+    # session has one, else a private heartguard-<uid> directory in the temp dir
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, 'heartguard', 'daemon.sock')
+    uid = os.getuid() if hasattr(os, 'getuid') else 'user'
+    return os.path.join(tempfile.gettempdir(), f"heartguard-{uid}", 'daemon.sock')
+
+# One daemon per user; every window of that user connects to the same path
+SOCKET_PATH = os.environ.get('HEARTGUARD_SOCKET') or _default_socket()
+CONNECT_TIMEOUT = 0.5
+# A large batch is scored before the reply; the socket waits this long for it
+REPLY_TIMEOUT = 60.0
+MAX_FRAME = 64 << 20
+N_FEATURES = 6
+
+# ============================================================
+# PROTOCOL
+# ============================================================
+# Every message is a frame: <u32 length><body>, little-endian.
+# Requests:  <u8 op>             PING, INFO
+#            <u8 op><u32 rows>   SCORE, followed by rows x 6 float64 vitals
+# Replies:   <u8 OK>                                          PING
+#            <u8 OK><u32 rows><u8 has_spread><u8 n><version>  SCORE, followed by
+#                rows float64 P(disease) and, if has_spread, rows float64 spread
+#            <u8 OK><utf-8 JSON>                              INFO
+#            <u8 NO_MODEL><f64 training progress or NaN>      nothing to score with yet
+#            <u8 ERROR><utf-8 message>
+FRAME = struct.Struct('<I')
+OP_PING, OP_SCORE, OP_INFO = 0, 1, 2
+OK, NO_MODEL, ERROR = 0, 1, 2
+SCORE_REQUEST = struct.Struct('<BI')
+SCORE_REPLY = struct.Struct('<BIBB')
+NO_MODEL_REPLY = struct.Struct('<Bd')
+
+class DaemonUnavailable(ConnectionError):
+    pass
+
+# ============================================================
+# OWNERSHIP
+# ============================================================
+# The socket carries patient vitals and returns the risk shown to the
+# clinician, so both ends must belong to the same account. The directory is
+# checked too: whoever can write to it can swap the socket.
+def _private_dir(directory):
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{directory} must be a directory owned by this user with mode 0700")
+
+def check_socket(path):
+    if not hasattr(os, 'getuid'):
+        return
+    _private_dir(os.path.dirname(os.path.abspath(path)))
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a socket owned by this user")
+
+def make_socket_dir(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        _private_dir(directory)
+
+def peer_uid(sock):
+    # Linux reports the connected process's uid; None where that is unavailable
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+def same_user(sock):
+    uid = peer_uid(sock)
+    return uid is None or uid == os.getuid()
+
+def recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError("connection closed mid-frame")
+        got += k
+    return bytes(buf)
+
+def send_frame(sock, body):
+    sock.sendall(FRAME.pack(len(body)) + body)
+
+def recv_frame(sock):
+    # None when the peer closed cleanly between frames
+    head = sock.recv(FRAME.size)
+    if not head:
+        return None
+    if len(head) < FRAME.size:
+        head += recv_exact(sock, FRAME.size - len(head))
+    (size,) = FRAME.unpack(head)
+    if size > MAX_FRAME:
+        raise ValueError(f"frame of {size:,} bytes is over the {MAX_FRAME:,} limit")
+    return recv_exact(sock, size)
+
+# ============================================================
+# SERVER
+# ============================================================
+class _Handler(socketserver.BaseRequestHandler):
+    # One connection per window, kept open for all of its requests
+    def handle(self):
+        engine = self.server.engine
+        if not same_user(self.request):
+            return
+        while True:
+            try:
+                body = recv_frame(self.request)
+            except (ConnectionError, ValueError):
+                return
+            if body is None:
+                return
+            try:
+                reply = self.server.dispatch(engine, body)
+            except Exception as e:
+                reply = bytes([ERROR]) + f"{type(e).__name__}: {e}".encode()
+            try:
+                send_frame(self.request, reply)
+            except OSError:
+                return
+
+# Missing where Python has no AF_UNIX (older Windows); the client then always falls back
+_UnixServer = getattr(socketserver, 'UnixStreamServer', object)
+
+class ScoringDaemon(socketserver.ThreadingMixIn, _UnixServer):
+    daemon_threads = True
+
+    def __init__(self, engine, path=SOCKET_PATH):
+        self.engine = engine
+        self.path = path
+        claim_socket(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, engine, body):
+        op = body[0]
+        if op == OP_PING:
+            return bytes([OK])
+        if op == OP_INFO:
+            return bytes([OK]) + json.dumps(engine.info(), default=str).encode()
+        if op != OP_SCORE:
+            raise ValueError(f"unknown op {op}")
+        _, rows = SCORE_REQUEST.unpack_from(body)
+        X = np.frombuffer(body, dtype='<f8', offset=SCORE_REQUEST.size)
+        if len(X) != rows * N_FEATURES:
+            raise ValueError(f"{rows} rows need {rows * N_FEATURES} values, got {len(X)}")
+        prob, spread = engine.score(X.reshape(rows, N_FEATURES))
+        if prob is None:
+            progress = engine.trainer.progress if engine.training else math.nan
+            return NO_MODEL_REPLY.pack(NO_MODEL, progress)
+        active = engine.models.active
+        version = (active.version if active else '').encode()
+        parts = [SCORE_REPLY.pack(OK, rows, spread is not None, len(version)), version,
+                 np.ascontiguousarray(prob, dtype='<f8').tobytes()]
+        if spread is not None:
+            parts.append(np.ascontiguousarray(spread, dtype='<f8').tobytes())
+        return b''.join(parts)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def claim_socket(path):
+    # Creates the private directory. A socket file left by a crashed daemon
+    # is removed; a live one, or one owned by someone else, is not.
+    try:
+        make_socket_dir(path)
+    except OSError as e:
+        raise RuntimeError(f"Cannot use {path}: {e}")
+    if not os.path.lexists(path):
+        return
+    try:
+        check_socket(path)
+    except OSError as e:
+        raise RuntimeError(f"Cannot use {path}: {e}")
+    try:
+        DaemonClient(path).ping()
+    except DaemonUnavailable:
+        os.remove(path)
+        return
+    raise RuntimeError(f"A scoring daemon is already listening on {path}")
+
+# ============================================================
+# CLIENT
+# ============================================================
+class DaemonClient:
+    # Thread-safe; one socket reused for every call. A broken connection is
+    # retried once, then DaemonUnavailable tells the caller to score itself.
+    def __init__(self, path=SOCKET_PATH, timeout=REPLY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        # From the last SCORE reply: the daemon's model version, and its
+        # training progress while it has no model (None otherwise)
+        self.version = None
+        self.progress = None
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise DaemonUnavailable("Unix sockets are not supported on this platform")
+        try:
+            check_socket(self.path)
+        except FileNotFoundError as e:
+            raise DaemonUnavailable(f"no daemon on {self.path}: {e}")
+        except OSError as e:
+            raise DaemonUnavailable(f"daemon socket not trusted: {e}")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(self.path)
+            trusted = same_user(sock)
+        except OSError as e:
+            sock.close()
+            raise DaemonUnavailable(f"no daemon on {self.path}: {e}")
+        if not trusted:
+            sock.close()
+            raise DaemonUnavailable(f"the process on {self.path} belongs to another user")
+        sock.settimeout(self.timeout)
+        return sock
+
+    def _call(self, body):
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    send_frame(self._sock, body)
+                    reply = recv_frame(self._sock)
+                    if reply is None:
+                        raise ConnectionError("daemon closed the connection")
+                    break
+                except DaemonUnavailable:
+                    raise
+                except (OSError, ValueError) as e:
+                    self.close()
+                    if attempt:
+                        raise DaemonUnavailable(f"daemon on {self.path} stopped answering: {e}")
+        if reply[0] == ERROR:
+            raise RuntimeError(f"daemon: {reply[1:].decode(errors='replace')}")
+        return reply
+
+    def ping(self):
+        self._call(bytes([OP_PING]))
+        return True
+
+    def info(self):
+        return json.loads(self._call(bytes([OP_INFO]))[1:])
+
+    def score(self, X):
+        # Same contract as Engine.score: (prob, spread or None), or (None, None)
+        X = np.ascontiguousarray(X, dtype='<f8').reshape(-1, N_FEATURES)
+        reply = self._call(SCORE_REQUEST.pack(OP_SCORE, len(X)) + X.tobytes())
+        if reply[0] == NO_MODEL:
+            (_, progress) = NO_MODEL_REPLY.unpack(reply)
+            self.progress = None if math.isnan(progress) else progress
+            return None, None
+        _, rows, has_spread, n = SCORE_REPLY.unpack_from(reply)
+        offset = SCORE_REPLY.size + n
+        self.version = reply[SCORE_REPLY.size:offset].decode() or None
+        self.progress = None
+        prob = np.frombuffer(reply, dtype='<f8', count=rows, offset=offset)
+        spread = np.frombuffer(reply, dtype='<f8', count=rows, offset=offset + rows * 8) if has_spread else None
+        return prob, spread
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hold one warm scoring engine for every HeartGuard window.")
+    parser.add_argument('--socket', default=SOCKET_PATH)
+    args = parser.parse_args(argv)
+    if _UnixServer is object:
+        raise SystemExit("Unix domain sockets are not available here; each window scores in-process")
+    try:
+        # Checked before the model is loaded, so a second start fails fast
+        claim_socket(args.socket)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    from engine import get_engine
+    engine = get_engine().load().watch()
+    server = ScoringDaemon(engine, args.socket)
+    # kill/logout: close the server so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    active = engine.models.active
+    print(f"HeartGuard scoring daemon on {args.socket} "
+          f"(model {active.version if active else 'training'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import datetime
+import threading
+
+# ==============================
+# CONFIGURATION
+# ==============================
+MYSQL_CONFIG = {
+    'host': "localhost",
+    'user': "root",
+    'password': "",  # put your mysql password
+    'database': "heartguard"
+}
+# HEARTGUARD_DB=sqlite:///heartguard.db runs everything against a local file
+# instead of MySQL (the stand-in used for development and load tests)
+DB_URL = os.environ.get('HEARTGUARD_DB', 'mysql')
+
+SCHEMA = {
+    'mysql': [
+        """CREATE TABLE IF NOT EXISTS predictions (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            age INT, sex TINYINT, chest_pain TINYINT,
+            cholesterol FLOAT, bp FLOAT, max_hr FLOAT,
+            risk FLOAT, status VARCHAR(20),
+            created_at DATETIME NOT NULL,
+            patient_id VARCHAR(64) NULL
+        )"""
+    ],
+    'sqlite': [
+        """CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            age INTEGER, sex INTEGER, chest_pain INTEGER,
+            cholesterol REAL, bp REAL, max_hr REAL,
+            risk REAL, status TEXT,
+            created_at TEXT NOT NULL,
+            patient_id TEXT
+        )"""
+    ]
+}
+
+# Applied to tables created before the column/index existed
+COLUMN_MIGRATIONS = [
+    ('predictions', 'patient_id', {'mysql': "VARCHAR(64) NULL", 'sqlite': "TEXT"})
+]
+INDEXES = [
+    # A patient's readings are one contiguous range of this index
+    ('predictions', 'idx_predictions_patient_time', "patient_id, created_at")
+]
+
+# ==============================
+# CONNECTION WRAPPER
+# ==============================
+class Database:
+    # One connection shared by every js_api worker thread, so all access is
+    # serialized here. Queries are written with %s placeholders (MySQL style).
+    def __init__(self, conn, dialect):
+        self.conn = conn
+        self.dialect = dialect
+        self.lock = threading.RLock()
+        # Monthly partitions (partitions.py); on sqlite `predictions` is then a view
+        self.partitioned = False
+        # Set by connect(); long reads open a connection of their own with it
+        self.url = None
+
+    def sql(self, query):
+        return query.replace('%s', '?') if self.dialect == 'sqlite' else query
+
+    def ts(self, value):
+        # sqlite has no DATETIME type; ISO text sorts and compares the same way
+        if self.dialect == 'sqlite' and isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat(sep=' ') if isinstance(value, datetime.datetime) else value.isoformat()
+        return value
+
+    def execute(self, query, params=(), commit=True):
+        with self.lock:
+            cur = self.conn.cursor()
+            try:
+                cur.execute(self.sql(query), params)
+                rowcount, lastrowid = cur.rowcount, cur.lastrowid
+            finally:
+                cur.close()
+            if commit:
+                self.conn.commit()
+            return rowcount, lastrowid
+
+    def executemany(self, query, rows, commit=True):
+        with self.lock:
+            cur = self.conn.cursor()
+            try:
+                cur.executemany(self.sql(query), rows)
+            finally:
+                cur.close()
+            if commit:
+                self.conn.commit()
+
+    def query(self, query, params=()):
+        with self.lock:
+            cur = self.conn.cursor()
+            try:
+                cur.execute(self.sql(query), params)
+                return cur.fetchall()
+            finally:
+                cur.close()
+
+    def stream(self, query, params=(), batch=10000):
+        # Yields lists of at most `batch` rows. The MySQL cursor is unbuffered,
+        # so the result set stays on the server instead of in client memory.
+        with self.lock:
+            cur = self.conn.cursor(buffered=False) if self.dialect == 'mysql' else self.conn.cursor()
+            try:
+                cur.execute(self.sql(query), params)
+                while True:
+                    rows = cur.fetchmany(batch)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cur.close()
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def upsert_add(self, table, keys, adds, rows, commit=True):
+        # INSERT new groups, add the counters onto groups that already exist
+        cols = list(keys) + list(adds)
+        marks = ", ".join(["%s"] * len(cols))
+        if self.dialect == 'sqlite':
+            tail = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ", ".join(
+                f"{c} = {c} + excluded.{c}" for c in adds)
+        else:
+            tail = "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = {c} + VALUES({c})" for c in adds)
+        self.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({marks}) {tail}", rows, commit)
+
+    def columns(self, table):
+        if self.dialect == 'sqlite':
+            return {row[1] for row in self.query(f"PRAGMA table_info({table})")}
+        return {row[0] for row in self.query(f"SHOW COLUMNS FROM {table}")}
+
+    def indexes(self, table):
+        if self.dialect == 'sqlite':
+            return {row[1] for row in self.query(f"PRAGMA index_list({table})")}
+        return {row[2] for row in self.query(f"SHOW INDEX FROM {table}")}
+
+    def ensure_schema(self, statements=None):
+        for stmt in statements or SCHEMA[self.dialect]:
+            self.execute(stmt)
+        if statements is None:
+            self.migrate()
+
+    def is_view(self, table):
+        if self.dialect == 'sqlite':
+            return bool(self.query("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = %s", (table,)))
+        return False
+
+    def migrate(self):
+        # A partitioned stand-in table is a view; its partitions get the indexes
+        views = {t for t, _, _ in COLUMN_MIGRATIONS + INDEXES if self.is_view(t)}
+        self.partitioned = self.partitioned or 'predictions' in views
+        for table, column, types in COLUMN_MIGRATIONS:
+            if table in views:
+                continue
+            if column not in self.columns(table):
+                print(f"Adding {table}.{column}")
+                self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {types[self.dialect]}")
+        for table, name, cols in INDEXES:
+            if table in views:
+                continue
+            if name not in self.indexes(table):
+                print(f"Creating index {name}")
+                self.execute(f"CREATE INDEX {name} ON {table} ({cols})")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.lock.acquire()
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.db.conn.commit()
+            else:
+                self.db.conn.rollback()
+        finally:
+            self.db.lock.release()
+
+def connect(url=None):
+    url = url or DB_URL
+    if url.startswith('sqlite:///'):
+        conn = sqlite3.connect(url[len('sqlite:///'):], check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        db = Database(conn, 'sqlite')
+    else:
+        import mysql.connector
+        db = Database(mysql.connector.connect(**MYSQL_CONFIG), 'mysql')
+    db.url = url
+    db.ensure_schema()
+    return db
+
+def insert_prediction(db, age, sex, cp, chol, bp, hr, risk, status, created_at=None, patient_id=None):
+    query = """INSERT INTO predictions
+                 (age, sex, chest_pain, cholesterol, bp, max_hr, risk, status, created_at, patient_id)
+                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+    params = (age, sex, cp, chol, bp, hr, risk, status, db.ts(created_at or datetime.datetime.now()), patient_id)
+    if db.partitioned and db.dialect == 'sqlite':
+        # Routed by the view's trigger, which does not report the new id
+        with db.transaction():
+            db.execute(query, params, commit=False)
+            return db.query("SELECT seq FROM sqlite_sequence WHERE name = 'prediction_ids'")[0][0]
+    _, row_id = db.execute(query, params)
+    return row_id
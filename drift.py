@@ -0,0 +1,160 @@
+import argparse
+import math
+import threading
+from bisect import bisect_right
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+# Fixed bin edges per feature, wide enough for the app's input ranges. The
+# live histograms never grow: len(edges) + 1 counters per feature.
+BIN_EDGES = {
+    'Age': [30, 40, 50, 60, 70],
+    'Sex': [0.5],
+    'Chest pain type': [1.5, 2.5, 3.5],
+    'Cholesterol': [180, 200, 220, 240, 260, 280, 300, 340],
+    'BP': [110, 120, 130, 140, 150, 160, 180],
+    'Max HR': [100, 120, 135, 150, 165, 180]
+}
+# PSI rule of thumb: < 0.1 stable, 0.1-0.2 moderate shift, > 0.2 significant
+PSI_MODERATE = 0.1
+PSI_THRESHOLD = 0.2
+MIN_SAMPLES = 200
+# Counts are halved whenever this many samples have accumulated, so the live
+# histogram tracks the recent population rather than all time
+HORIZON = 5000
+EPSILON = 1e-4
+
+# --- 1. TRAINING-TIME BASELINE ---
+def build_baseline(X, features=FEATURES):
+    # Stored in the model sidecar by train_runner
+    import numpy as np
+    X = np.asarray(X, dtype=np.float64)
+    baseline = {"rows": int(len(X)), "features": {}}
+    for j, name in enumerate(features):
+        edges = BIN_EDGES[name]
+        counts = np.bincount(np.searchsorted(edges, X[:, j], side='right'), minlength=len(edges) + 1)
+        baseline["features"][name] = {
+            "edges": list(edges),
+            "expected": [round(float(c) / max(1, len(X)), 6) for c in counts]
+        }
+    return baseline
+
+def psi(expected, actual):
+    total = sum(actual)
+    if not total:
+        return 0.0
+    score = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e, EPSILON)
+        a = max(a / total, EPSILON)
+        score += (a - e) * math.log(a / e)
+    return score
+
+# --- 2. LIVE MONITOR ---
+class DriftMonitor:
+    # update() is a handful of bisects under a lock, cheap enough for every predict()
+    def __init__(self, baseline=None, features=FEATURES, threshold=PSI_THRESHOLD,
+                 min_samples=MIN_SAMPLES, horizon=HORIZON):
+        self.features = features
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.horizon = horizon
+        self.baseline = None
+        self.version = None
+        self._lock = threading.Lock()
+        self.set_baseline(baseline)
+
+    def set_baseline(self, baseline, version=None):
+        with self._lock:
+            old = self.baseline
+            self.baseline = baseline
+            self.version = version
+            spec = baseline["features"] if baseline else {f: {"edges": BIN_EDGES[f]} for f in self.features}
+            self.edges = [spec[f]["edges"] for f in self.features]
+            # Samples seen so far stay valid as long as the bins did not change
+            same_bins = old is not None and baseline is not None and all(
+                old["features"][f]["edges"] == baseline["features"][f]["edges"] for f in self.features)
+            if not same_bins:
+                self.counts = [[0.0] * (len(e) + 1) for e in self.edges]
+                self.samples = 0.0
+                self.total_seen = 0
+
+    def update(self, row):
+        with self._lock:
+            for counts, edges, v in zip(self.counts, self.edges, row):
+                counts[bisect_right(edges, v)] += 1
+            self.samples += 1
+            self.total_seen += 1
+            if self.samples >= self.horizon:
+                self._decay()
+
+    def update_batch(self, X):
+        import numpy as np
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        with self._lock:
+            for j, (counts, edges) in enumerate(zip(self.counts, self.edges)):
+                add = np.bincount(np.searchsorted(edges, X[:, j], side='right'), minlength=len(counts))
+                for i, c in enumerate(add):
+                    counts[i] += float(c)
+            self.samples += len(X)
+            self.total_seen += len(X)
+            while self.samples >= self.horizon:
+                self._decay()
+
+    def _decay(self):
+        for counts in self.counts:
+            for i in range(len(counts)):
+                counts[i] /= 2
+        self.samples /= 2
+
+    def metrics(self):
+        with self._lock:
+            counts = [list(c) for c in self.counts]
+            samples, total_seen = self.samples, self.total_seen
+        out = {
+            "baseline": self.baseline is not None,
+            "baseline_rows": self.baseline["rows"] if self.baseline else None,
+            "model_version": self.version,
+            "samples": round(samples),
+            "total_seen": total_seen,
+            "threshold": self.threshold,
+            "drift": False,
+            "features": {}
+        }
+        if self.baseline is None:
+            out["message"] = "No training baseline in the model sidecar; retrain to enable drift checks"
+            return out
+        for name, actual in zip(self.features, counts):
+            score = psi(self.baseline["features"][name]["expected"], actual)
+            level = "significant" if score > self.threshold else "moderate" if score > PSI_MODERATE else "stable"
+            out["features"][name] = {"psi": round(score, 4), "level": level}
+        ready = samples >= self.min_samples
+        drifted = [f for f, m in out["features"].items() if m["level"] == "significant"]
+        out["drift"] = ready and bool(drifted)
+        out["drifted_features"] = drifted if ready else []
+        if not ready:
+            out["message"] = f"Collecting samples ({round(samples)}/{self.min_samples})"
+        return out
+
+def baseline_from_meta(meta):
+    return (meta or {}).get("drift_baseline")
+
+# --- 3. BACKFILL FOR EXISTING ARTIFACTS ---
+def main(argv=None):
+    from persistence import read_meta, update_meta
+    from train_runner import LAYOUTS, load_training_data
+    parser = argparse.ArgumentParser(description="Store a drift baseline in an existing model's sidecar.")
+    parser.add_argument('--model', default='heart_model.joblib')
+    parser.add_argument('--data', default='train.csv')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='app')
+    args = parser.parse_args(argv)
+    if read_meta(args.model) is None:
+        raise SystemExit(f"{args.model} has no sidecar; load it once in the app first")
+    X, _ = load_training_data(args.data, args.layout)
+    update_meta(args.model, drift_baseline=build_baseline(X.to_numpy()))
+    print(f"Baseline from {len(X):,} rows of {args.data} stored for {args.model}")
+
+if __name__ == '__main__':
+    main()
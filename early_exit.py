@@ -0,0 +1,165 @@
+import operator
+import weakref
+import numpy as np
+
+# --- CONFIGURATION ---
+# Trees scored between checks on the bounds
+BLOCK_TREES = 10
+# Bounds are widened by this many risk points before rounding. Full scoring
+# adds the same votes in another order, so a risk of exactly 70.05 can come
+# out just under or just over it and round either way.
+TIE_MARGIN = 1e-9
+
+# ============================================================
+# BOUNDS
+# ============================================================
+# After k of N trees the final risk lies between (sum of k votes + the lowest
+# leaf of every remaining tree) / N and the same with the highest leaves.
+# Once both ends round into the same band the rest of the trees cannot change
+# it. Bands are monotone in risk, so comparing the two ends is enough.
+# A row still unsettled after the last tree sits on an exact tie; it is
+# scored again by its backend so it gets the band full scoring gives it.
+_leaf_range = weakref.WeakKeyDictionary()
+
+def risk_conditions(table):
+    # The (op, threshold) tests a rule table's bands apply to risk
+    return [b['when'][1:] for b in table.bands if b['when'] is not None and b['when'][0] == 'risk']
+
+def _same_band(conds, low, high):
+    same = np.ones(len(low), dtype=bool)
+    for op, threshold in conds:
+        same &= op(low, threshold) == op(high, threshold)
+    return same
+
+def is_scorer(model):
+    return getattr(model, 'HEARTGUARD_SCORER', False)
+
+def supports(model):
+    if is_scorer(model) or getattr(model, 'HEARTGUARD_COMPACT', False):
+        return True
+    return hasattr(model, 'estimators_') and all(hasattr(e, 'tree_') for e in model.estimators_) \
+        and list(getattr(model, 'classes_', [])) == [0, 1]
+
+def leaf_range(model):
+    # (lowest, highest) P(class 1) leaf of every tree, in tree order
+    cached = _leaf_range.get(model)
+    if cached is not None:
+        return cached
+    if is_scorer(model):
+        leaf = np.asarray(model.FEATURE) < 0
+        p1 = np.asarray(model.P1)
+        roots = np.asarray(model.ROOTS)
+        lo = np.minimum.reduceat(np.where(leaf, p1, np.inf), roots)
+        hi = np.maximum.reduceat(np.where(leaf, p1, -np.inf), roots)
+    elif getattr(model, 'HEARTGUARD_COMPACT', False):
+        p1 = model.leaf_value * model.leaf_scale
+        lo = np.minimum.reduceat(p1, model.leaf_offsets)
+        hi = np.maximum.reduceat(p1, model.leaf_offsets)
+    else:
+        lo, hi = [], []
+        for est in model.estimators_:
+            t = est.tree_
+            value = t.value[t.children_left == -1, 0, :]
+            p1 = value[:, 1] / np.maximum(value.sum(axis=1), 1e-300)
+            lo.append(p1.min())
+            hi.append(p1.max())
+        lo, hi = np.asarray(lo), np.asarray(hi)
+    # rest[k] = sum over trees k..N-1
+    out = (np.append(np.cumsum(lo[::-1])[::-1], 0.0), np.append(np.cumsum(hi[::-1])[::-1], 0.0))
+    _leaf_range[model] = out
+    return out
+
+# ============================================================
+# EVALUATION
+# ============================================================
+class BandEstimate:
+    # risk: the mean of the trees that were scored, kept inside [low, high];
+    # it always falls in the same band as the full forest's risk.
+    # trees is None when the model had to be scored in full.
+    def __init__(self, risk, low, high, trees, n_trees):
+        self.risk = risk
+        self.low = low
+        self.high = high
+        self.trees = trees
+        self.n_trees = n_trees
+
+    def __len__(self):
+        return len(self.risk)
+
+    @property
+    def mean_trees(self):
+        return float(self.trees.mean()) if self.trees is not None and len(self.trees) else None
+
+def _votes(model, X, first, last):
+    if getattr(model, 'HEARTGUARD_COMPACT', False):
+        return model._votes(X, first, last)
+    col = list(model.classes_).index(1)
+    return np.column_stack([est.predict_proba(X, check_input=False)[:, col]
+                            for est in model.estimators_[first:last]])
+
+def _band_numpy(model, X, conds, block):
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    rest_lo, rest_hi = leaf_range(model)
+    n_trees = len(rest_lo) - 1
+    n = len(X)
+    total = np.zeros(n)
+    trees = np.zeros(n, dtype=np.int32)
+    low, high = np.zeros(n), np.zeros(n)
+    active = np.arange(n)
+    for first in range(0, n_trees, block):
+        if not len(active):
+            break
+        last = min(n_trees, first + block)
+        total[active] += _votes(model, X[active], first, last).sum(axis=1)
+        trees[active] = last
+        lo = np.round((total[active] + rest_lo[last]) / n_trees * 100 - TIE_MARGIN, 1)
+        hi = np.round((total[active] + rest_hi[last]) / n_trees * 100 + TIE_MARGIN, 1)
+        low[active], high[active] = lo, hi
+        active = active[~_same_band(conds, lo, hi)]
+    return total, trees, low, high, n_trees
+
+# numpy ufuncs are slow on single floats; the per-row scorer loop uses these
+_SCALAR_OPS = {np.greater: operator.gt, np.greater_equal: operator.ge, np.less: operator.lt,
+               np.less_equal: operator.le, np.equal: operator.eq}
+
+def _band_scorer(scorer, X, conds, block):
+    # Same walk as the generated predict_proba_one, one row at a time
+    conds = [(_SCALAR_OPS.get(op, op), cut) for op, cut in conds]
+    rest_lo, rest_hi = (r.tolist() for r in leaf_range(scorer))
+    n_trees = scorer.N_TREES
+    feature, threshold, left, right, p1 = scorer.FEATURE, scorer.THRESHOLD, scorer.LEFT, scorer.RIGHT, scorer.P1
+    n = len(X)
+    total, trees = np.zeros(n), np.zeros(n, dtype=np.int32)
+    low, high = np.zeros(n), np.zeros(n)
+    for i, row in enumerate(np.asarray(X, dtype=np.float64).tolist()):
+        x = [scorer._as_float32(v) for v in row]
+        s = 0.0
+        for k, node in enumerate(scorer.ROOTS, 1):
+            f = feature[node]
+            while f >= 0:
+                node = left[node] if x[f] <= threshold[node] else right[node]
+                f = feature[node]
+            s += p1[node]
+            if k % block and k < n_trees:
+                continue
+            lo = round((s + rest_lo[k]) / n_trees * 100 - TIE_MARGIN, 1)
+            hi = round((s + rest_hi[k]) / n_trees * 100 + TIE_MARGIN, 1)
+            if all(op(lo, cut) == op(hi, cut) for op, cut in conds):
+                break
+        total[i], trees[i], low[i], high[i] = s, k, lo, hi
+    return total, trees, low, high, n_trees
+
+def band_estimate(model, X, table, block=BLOCK_TREES):
+    # Scores trees in order and stops, per row, once the band is settled
+    conds = risk_conditions(table)
+    X = np.asarray(getattr(X, 'values', X), dtype=np.float64).reshape(-1, len(table.features))
+    if is_scorer(model):
+        total, trees, low, high, n_trees = _band_scorer(model, X, conds, block)
+    else:
+        total, trees, low, high, n_trees = _band_numpy(model, X, conds, block)
+    risk = np.clip(np.round(total / np.maximum(trees, 1) * 100, 1), low, high)
+    tied = ~_same_band(conds, low, high)
+    if tied.any():
+        from backends import predict_risk
+        risk[tied] = low[tied] = high[tied] = np.round(predict_risk(model, X[tied]) * 100, 1)
+    return BandEstimate(risk, low, high, trees, n_trees)
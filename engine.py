@@ -0,0 +1,298 @@
+import os
+import time
+import datetime
+import threading
+import numpy as np
+from rules import RuleTable, RULESETS
+from persistence import load_model, read_meta
+from train_runner import TrainingRunner
+from model_manager import ModelManager
+from backends import model_path, predict_risk_spread
+from export_scorer import load_fresh_scorer
+from compact_model import load_fresh_compact
+from drift import DriftMonitor, baseline_from_meta
+from shadow import ShadowScorer
+from early_exit import BandEstimate, band_estimate, supports as supports_early_exit
+from daemon import DaemonClient, DaemonUnavailable, SOCKET_PATH
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+# 'forest' (RandomForest), 'binned' (RandomForest on uint8 bins, see binning.py)
+# or 'hist_gb' (histogram gradient boosting)
+MODEL_BACKEND = os.environ.get('HEARTGUARD_BACKEND', 'forest')
+# The one artifact every front end loads
+MODEL_FILE = model_path('heart_model.joblib', MODEL_BACKEND)
+# Written by export_scorer.py; when it matches MODEL_FILE, loading skips sklearn and pandas
+SCORER_FILE = 'heart_scorer.py'
+# Written by compact_model.py; used next, while it matches MODEL_FILE (numpy only)
+COMPACT_FILE = model_path(MODEL_FILE, 'compact')
+# First file found is used for training: the app export, then the UCI export
+DATA_SOURCES = [('train.csv', 'app'), ('Train.xlsx - Sheet1.csv', 'uci')]
+N_ESTIMATORS = 100
+MAX_DEPTH = 12
+# Rows per chunk for out-of-core training (ooc_train.py); unset trains in memory
+TRAIN_CHUNK_ROWS = int(os.environ.get('HEARTGUARD_TRAIN_CHUNK_ROWS', 0)) or None
+FALLBACK_RISK = 25.5
+# Tree votes this spread out (std dev, in risk points) get a "recheck vitals" note
+LOW_CONFIDENCE_SPREAD = 30.0
+# Candidate artifacts scored in shadow next to the live model (os.pathsep-separated)
+SHADOW_MODELS = [p for p in os.environ.get('HEARTGUARD_SHADOW', '').split(os.pathsep) if p]
+
+# ============================================================
+# ENGINE
+# ============================================================
+class Engine:
+    # Loader, scorer and rule tables for every front end. Nothing is read
+    # from disk until the first prediction (or an explicit load()).
+    def __init__(self, model_file=MODEL_FILE, scorer_file=SCORER_FILE, compact_file=COMPACT_FILE,
+                 data_sources=DATA_SOURCES,
+                 backend=MODEL_BACKEND, n_estimators=N_ESTIMATORS, max_depth=MAX_DEPTH, features=FEATURES,
+                 chunk_rows=TRAIN_CHUNK_ROWS):
+        self.model_file = model_file
+        self.scorer_file = scorer_file
+        self.compact_file = compact_file
+        self.data_sources = data_sources
+        self.backend = backend
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.features = features
+        self.chunk_rows = chunk_rows
+        # Requests read models.model; a new artifact is swapped in without a restart
+        self.models = ModelManager(model_file, features)
+        # Live input histograms compared with the training data of the active model
+        self.drift = DriftMonitor(features=features)
+        self.trainer = None
+        # Created on the first candidate; None keeps predict() free of shadow work
+        self.shadow = None
+        # DaemonClient while a daemon.py process does the scoring for this one
+        self.remote = None
+        self._tables = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        # Apart from _lock: load() adds the configured shadows while holding it
+        self._shadow_lock = threading.Lock()
+
+    # --- 1. LOADING ---
+    def training_data(self):
+        for path, layout in self.data_sources:
+            if os.path.exists(path):
+                return path, layout
+        return None
+
+    def load(self, block=False):
+        # Generated scorer, compact model, then the joblib artifact, else train in the background.
+        # block=True waits for that training run (the older front ends start that way).
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                t0 = time.perf_counter()
+                mdl = load_fresh_scorer(self.model_file, self.scorer_file)
+                if mdl is None:
+                    mdl = load_fresh_compact(self.model_file, self.compact_file)
+                if mdl is None:
+                    mdl = load_model(self.model_file, self.features)
+                if mdl is not None:
+                    self.models.adopt(mdl, time.perf_counter() - t0)
+                elif self.training_data():
+                    self.start_training()
+                for path in SHADOW_MODELS:
+                    try:
+                        self.add_shadow(path)
+                    except Exception as e:
+                        print(f"Shadow model {path} not loaded: {e}")
+        trainer = self.trainer
+        if block and trainer is not None:
+            trainer.wait()
+        return self
+
+    def start_training(self, profile_dir=None):
+        # Trains in its own process; the artifact is swapped in as soon as it is saved.
+        # profile_dir: the run is profiled inside that process (see profiling.py)
+        source = self.training_data()
+        if source is None:
+            raise FileNotFoundError(f"No training data found ({', '.join(p for p, _ in self.data_sources)})")
+        if self.trainer is None or not self.trainer.running:
+            self.trainer = TrainingRunner(source[0], self.model_file, layout=source[1], backend=self.backend,
+                                          n_estimators=self.n_estimators, max_depth=self.max_depth,
+                                          chunk_rows=self.chunk_rows, profile_dir=profile_dir,
+                                          on_event=self._on_training_event)
+            self.trainer.start()
+        return self.trainer
+
+    def connect(self, path=SOCKET_PATH):
+        # Scores through a running daemon.py instead of loading the model here.
+        # False, and nothing changes, when no daemon answers.
+        client = DaemonClient(path)
+        try:
+            client.ping()
+        except DaemonUnavailable:
+            return False
+        self.remote = client
+        print(f"Scoring through the HeartGuard daemon on {path}")
+        return True
+
+    def _on_training_event(self, event):
+        # A daemon watches the artifact and swaps it in itself
+        if event["event"] == "done" and self.remote is None:
+            self.models.reload()
+
+    def watch(self):
+        self.models.start()
+        return self
+
+    @property
+    def model(self):
+        if not self._loaded:
+            self.load()
+        return self.models.model
+
+    @property
+    def training(self):
+        if self.remote is not None and self.remote.progress is not None:
+            return True
+        return self.trainer is not None and self.trainer.running
+
+    @property
+    def progress(self):
+        if self.remote is not None and self.remote.progress is not None:
+            return self.remote.progress
+        return self.trainer.progress if self.trainer else 0.0
+
+    def rules(self, name='final'):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = RuleTable(RULESETS[name], self.features)
+        return table
+
+    def add_shadow(self, path, name=None):
+        with self._shadow_lock:
+            if self.shadow is None:
+                self.shadow = ShadowScorer(self.rules('final'), self.features, primary=lambda: self.models.model)
+        return self.shadow.add(path, name)
+
+    def remove_shadow(self, name):
+        if self.shadow is None:
+            raise KeyError(f"No shadow model '{name}'")
+        self.shadow.remove(name)
+
+    def shadow_report(self):
+        return self.shadow.report() if self.shadow else {"models": []}
+
+    def sync_drift(self):
+        # The baseline follows the live model; the sidecar is only re-read after a swap
+        if self.remote is not None:
+            version = self.remote.version
+        else:
+            active = self.models.active
+            version = active.version if active else None
+        if version != self.drift.version:
+            try:
+                meta = read_meta(self.model_file)
+            except Exception:
+                meta = None
+            self.drift.set_baseline(baseline_from_meta(meta), version)
+
+    # --- 2. SCORING ---
+    def score(self, X):
+        # (P(disease) per row, tree-vote spread or None); (None, None) without a model
+        if self.remote is not None:
+            try:
+                return self.remote.score(X)
+            except DaemonUnavailable as e:
+                # From here on this process loads and scores on its own
+                print(f"{e}; scoring in-process")
+                self.remote = None
+        mdl = self.model
+        if mdl is None:
+            return None, None
+        return predict_risk_spread(mdl, np.asarray(X, dtype=np.float64).reshape(-1, len(self.features)))
+
+    def predict(self, values, ruleset='final', fallback=FALLBACK_RISK, clamp=None):
+        # values: [age, sex, chest pain, cholesterol, bp, max hr]. fallback is a
+        # risk or a function of values, used while no model is available.
+        prob, votes = self.score([values])
+        spread = None
+        if prob is not None:
+            risk = prob[0] * 100
+            if votes is not None:
+                spread = round(float(votes[0]) * 100, 1)
+        elif self.training:
+            return {"error": f"The AI model is still training ({self.progress * 100:.0f}%). "
+                             "Please try again shortly."}
+        else:
+            risk = fallback(*values) if callable(fallback) else fallback
+        risk = round(risk, 1)
+        if prob is not None and self.shadow is not None:
+            # Queued for the candidates; never waits on them
+            self.shadow.submit([values], [risk])
+        if clamp:
+            risk = max(clamp[0], min(clamp[1], risk))
+
+        self.sync_drift()
+        self.drift.update(values)
+        result = self.rules(ruleset).assess_one(values, risk)
+        result["timestamp"] = datetime.datetime.now().strftime("%I:%M %p")
+        result["spread"] = spread
+        result["low_confidence"] = spread is not None and spread >= LOW_CONFIDENCE_SPREAD
+        return result
+
+    def evaluate(self, X, ruleset='final'):
+        # Batch form of predict(): (risk, spread, Assessment) with numpy columns
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.features))
+        prob, votes = self.score(X) if len(X) else (None, None)
+        spread = None
+        scored = prob is not None
+        if scored:
+            prob = prob * 100
+            if votes is not None:
+                spread = np.round(votes * 100, 1)
+        else:
+            prob = np.full(len(X), FALLBACK_RISK)
+        risk = np.round(prob, 1)
+        if scored and self.shadow is not None:
+            self.shadow.submit(X, risk)
+        self.sync_drift()
+        self.drift.update_batch(X)
+        return risk, spread, self.rules(ruleset).evaluate(X, risk)
+
+    def evaluate_bands(self, X, ruleset='final'):
+        # Band-only form of evaluate(): (BandEstimate, Assessment). Each row stops
+        # scoring trees once its band is settled; risk is an estimate inside the bounds.
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.features))
+        mdl = self.model if self.remote is None else None
+        if mdl is None or not len(X) or not supports_early_exit(mdl):
+            risk, _, result = self.evaluate(X, ruleset)
+            return BandEstimate(risk, risk, risk, None, None), result
+        table = self.rules(ruleset)
+        estimate = band_estimate(mdl, X, table)
+        # Not sent to shadow candidates: they are compared on exact risks
+        self.sync_drift()
+        self.drift.update_batch(X)
+        return estimate, table.evaluate(X, estimate.risk)
+
+    def info(self):
+        return {
+            "model_file": self.model_file,
+            "backend": self.backend,
+            "loaded": self._loaded,
+            "daemon": self.remote.path if self.remote else None,
+            "training": self.trainer.status() if self.trainer else {"state": "idle"},
+            **self.models.info()
+        }
+
+def parse_vitals(data):
+    # The input dict every front end sends over the bridge
+    return [int(data['Age']), int(data['Sex']), int(data['CP']),
+            float(data['Chol']), float(data['BP']), float(data['HR'])]
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    # One engine per process, shared by whichever front end imported it
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = Engine()
+    return _engine
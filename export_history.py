@@ -0,0 +1,209 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from db import connect
+
+# --- CONFIGURATION ---
+EXPORT_DIR = 'exports'
+STATE_FILE = '_export_state.json'
+BATCH_ROWS = 10000
+# Rows younger than this wait for the next run (inserts may still be committing)
+SETTLE_SECONDS = 2
+# Date partitions written at once; each holds a file handle and a buffered row group
+MAX_OPEN_WRITERS = 8
+
+COLUMNS = ['id', 'age', 'sex', 'chest_pain', 'cholesterol', 'bp', 'max_hr', 'risk', 'status', 'created_at', 'patient_id']
+
+# ============================================================
+# HELPERS
+# ============================================================
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def as_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+def read_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {"last_id": 0, "runs": 0, "rows": 0}
+    with open(path) as f:
+        return json.load(f)
+
+def write_state(out_dir, state):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# ============================================================
+# PARTITIONED PARQUET OUTPUT
+# ============================================================
+class PartitionedWriter:
+    # One file per created_at date: <out>/created_date=YYYY-MM-DD/part-<first id>.parquet.
+    # Files are named after the run's starting watermark, so a run that dies
+    # before saving its state is simply overwritten by the retry.
+    # Rows come in id order, so roughly date order: only the most recently
+    # used dates stay open. A date that comes back after its file was
+    # finished gets another file, part-<first id>-<n>.parquet.
+    def __init__(self, out_dir, run_id, compression='zstd', max_open=MAX_OPEN_WRITERS):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.out_dir = out_dir
+        self.run_id = run_id
+        self.compression = compression
+        self.schema = pyarrow.schema([
+            ('id', pyarrow.int64()), ('age', pyarrow.int16()), ('sex', pyarrow.int8()),
+            ('chest_pain', pyarrow.int8()), ('cholesterol', pyarrow.float64()), ('bp', pyarrow.float64()),
+            ('max_hr', pyarrow.float64()), ('risk', pyarrow.float64()),
+            ('status', pyarrow.dictionary(pyarrow.int8(), pyarrow.string())),
+            ('created_at', pyarrow.timestamp('s')), ('patient_id', pyarrow.string())
+        ])
+        self.max_open = max(1, max_open)
+        # Open writers, least recently used first
+        self.writers = {}
+        self.parts = {}
+        self.files = []
+
+    def _writer(self, day):
+        if day in self.writers:
+            self.writers[day] = self.writers.pop(day)
+            return self.writers[day][0]
+        while len(self.writers) >= self.max_open:
+            self._finish(next(iter(self.writers)))
+        folder = os.path.join(self.out_dir, f"created_date={day}")
+        os.makedirs(folder, exist_ok=True)
+        part = self.parts.get(day, 0)
+        self.parts[day] = part + 1
+        suffix = f"-{part}" if part else ""
+        path = os.path.join(folder, f"part-{self.run_id:012d}{suffix}.parquet")
+        tmp = path + '.tmp'
+        self.writers[day] = (self.pq.ParquetWriter(tmp, self.schema, compression=self.compression), tmp, path)
+        return self.writers[day][0]
+
+    def _finish(self, day):
+        # A file leaves self.writers once it is renamed, so abort() after a
+        # failure only touches the ones still pending
+        writer, tmp, path = self.writers[day]
+        writer.close()
+        os.replace(tmp, path)
+        del self.writers[day]
+        self.files.append(path)
+
+    def write(self, rows):
+        # Rows arrive in id order, which is close to date order, so a batch
+        # usually splits into one or two partitions
+        by_day = {}
+        for row in rows:
+            row = list(row)
+            row[9] = as_datetime(row[9])
+            by_day.setdefault(row[9].date().isoformat(), []).append(row)
+        for day, part in by_day.items():
+            columns = list(zip(*part))
+            arrays = [self.pa.array(col, type=field.type if i != 8 else self.pa.string())
+                      for i, (col, field) in enumerate(zip(columns, self.schema))]
+            arrays[8] = arrays[8].dictionary_encode().cast(self.schema.field('status').type)
+            self._writer(day).write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        for day in list(self.writers):
+            self._finish(day)
+        return self.files
+
+    def abort(self):
+        # Drops the unfinished files; best effort, so the error that got us
+        # here is the one that is raised
+        for writer, tmp, _ in self.writers.values():
+            try:
+                writer.close()
+            except Exception:
+                pass
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        self.writers = {}
+
+# ============================================================
+# EXPORT
+# ============================================================
+def export(out_dir=EXPORT_DIR, batch=BATCH_ROWS, full=False, url=None, compression='zstd'):
+    os.makedirs(out_dir, exist_ok=True)
+    state = read_state(out_dir)
+    start_id = 0 if full else state["last_id"]
+
+    db = connect(url)
+    t0 = time.perf_counter()
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=SETTLE_SECONDS)
+    # Fix the upper bound first so rows inserted during the run go to the next one
+    end_id = db.query("SELECT MAX(id) FROM predictions WHERE created_at <= %s", (db.ts(cutoff),))[0][0] or 0
+    if end_id <= start_id:
+        db.close()
+        print(f"Nothing new since id {start_id}")
+        return {"rows": 0, "files": [], "last_id": start_id}
+
+    writer = PartitionedWriter(out_dir, start_id, compression)
+    rows_done = 0
+    last_id = start_id
+    try:
+        for rows in db.stream(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE id > %s AND id <= %s ORDER BY id",
+            (start_id, end_id), batch
+        ):
+            writer.write(rows)
+            rows_done += len(rows)
+            last_id = rows[-1][0]
+            elapsed = time.perf_counter() - t0
+            print(f"   {rows_done:,} rows  ({rows_done / elapsed:,.0f} rows/s)", end='\r', flush=True)
+        files = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        db.close()
+
+    state = {
+        "last_id": last_id,
+        "runs": state.get("runs", 0) + 1,
+        "rows": (0 if full else state.get("rows", 0)) + rows_done,
+        "updated_at": datetime.datetime.now().isoformat(timespec='seconds')
+    }
+    write_state(out_dir, state)
+
+    elapsed = time.perf_counter() - t0
+    rss = peak_rss_mb()
+    print()
+    print(f"Exported {rows_done:,} rows (ids {start_id + 1}-{last_id}) into {len(files)} file(s) "
+          f"in {elapsed:.2f}s: {rows_done / elapsed:,.0f} rows/s"
+          + (f", peak RSS {rss:,.0f} MB" if rss is not None else ""))
+    return {"rows": rows_done, "files": files, "last_id": last_id, "seconds": elapsed, "peak_rss_mb": rss}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the predictions table to date-partitioned Parquet files.")
+    parser.add_argument('--out', default=EXPORT_DIR)
+    parser.add_argument('--batch', type=int, default=BATCH_ROWS, help="Rows fetched per round trip")
+    parser.add_argument('--full', action='store_true', help="Ignore the watermark and export every row (use a fresh --out directory)")
+    parser.add_argument('--db', default=None, help="Database URL (default: HEARTGUARD_DB or MySQL)")
+    parser.add_argument('--compression', default='zstd', choices=['zstd', 'snappy', 'gzip', 'none'])
+    args = parser.parse_args(argv)
+    export(args.out, args.batch, args.full, args.db, args.compression)
+
+if __name__ == '__main__':
+    main()
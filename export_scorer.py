@@ -0,0 +1,195 @@
+import argparse
+import base64
+import os
+import sys
+import numpy as np
+from persistence import read_meta, read_model, sha256_file
+
+# --- CONFIGURATION ---
+MODEL_FILE = 'heart_model.joblib'
+SCORER_FILE = 'heart_scorer.py'
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+
+# ============================================================
+# GENERATED MODULE TEMPLATE
+# ============================================================
+TEMPLATE = '''# Generated by export_scorer.py from {model_name} -- do not edit.
+# Reproduces RandomForestClassifier.predict_proba without sklearn, pandas or numpy.
+import base64
+import struct
+import sys
+from array import array
+
+HEARTGUARD_SCORER = True
+MODEL_SHA256 = {sha256!r}
+FEATURES = {features!r}
+N_TREES = {n_trees}
+
+def _unpack(code, data):
+    a = array(code)
+    a.frombytes(base64.b64decode(data))
+    if sys.byteorder != 'little':
+        a.byteswap()
+    return a
+
+# All trees share one set of node arrays; ROOTS holds each tree's first node
+ROOTS = _unpack('i', {roots!r})
+FEATURE = _unpack('i', {feature!r})
+THRESHOLD = _unpack('d', {threshold!r})
+LEFT = _unpack('i', {left!r})
+RIGHT = _unpack('i', {right!r})
+P0 = _unpack('d', {p0!r})
+P1 = _unpack('d', {p1!r})
+
+_f32 = struct.Struct('f')
+
+def _as_float32(v):
+    # sklearn casts inputs to float32 before comparing with the float64 thresholds
+    try:
+        return _f32.unpack(_f32.pack(v))[0]
+    except OverflowError:
+        return float('inf') if v > 0 else float('-inf')
+
+def predict_proba_one(row):
+    x = [_as_float32(float(v)) for v in row]
+    s0 = s1 = 0.0
+    for node in ROOTS:
+        f = FEATURE[node]
+        while f >= 0:
+            node = LEFT[node] if x[f] <= THRESHOLD[node] else RIGHT[node]
+            f = FEATURE[node]
+        s0 += P0[node]
+        s1 += P1[node]
+    return [s0 / N_TREES, s1 / N_TREES]
+
+def predict_proba(rows):
+    return [predict_proba_one(row) for row in rows]
+
+def predict_spread_one(row):
+    # Mean and standard deviation of the per-tree P(class 1) votes
+    x = [_as_float32(float(v)) for v in row]
+    s = sq = 0.0
+    for node in ROOTS:
+        f = FEATURE[node]
+        while f >= 0:
+            node = LEFT[node] if x[f] <= THRESHOLD[node] else RIGHT[node]
+            f = FEATURE[node]
+        p = P1[node]
+        s += p
+        sq += p * p
+    mean = s / N_TREES
+    return [mean, max(sq / N_TREES - mean * mean, 0.0) ** 0.5]
+'''
+
+def _b64(arr, dtype):
+    return base64.b64encode(np.ascontiguousarray(arr, dtype=dtype).tobytes()).decode('ascii')
+
+# ============================================================
+# EXPORT
+# ============================================================
+def flatten_forest(mdl):
+    if not hasattr(mdl, 'estimators_') or not all(hasattr(e, 'tree_') for e in mdl.estimators_):
+        raise ValueError(f"{type(mdl).__name__} is not a tree ensemble; only forests can be exported")
+    if list(mdl.classes_) != [0, 1] or getattr(mdl, 'n_outputs_', 1) != 1:
+        raise ValueError("Only binary single-output forests can be exported")
+
+    roots, parts = [], {k: [] for k in ('feature', 'threshold', 'left', 'right', 'p0', 'p1')}
+    offset = 0
+    for est in mdl.estimators_:
+        t = est.tree_
+        leaf = t.children_left == -1
+        # Same normalisation DecisionTreeClassifier.predict_proba applies per leaf
+        value = t.value[:, 0, :].astype(np.float64)
+        total = value.sum(axis=1)
+        total[total == 0.0] = 1.0
+        roots.append(offset)
+        parts['feature'].append(np.where(leaf, -1, t.feature))
+        parts['threshold'].append(t.threshold)
+        parts['left'].append(np.where(leaf, -1, t.children_left + offset))
+        parts['right'].append(np.where(leaf, -1, t.children_right + offset))
+        parts['p0'].append(value[:, 0] / total)
+        parts['p1'].append(value[:, 1] / total)
+        offset += t.node_count
+
+    flat = {k: np.concatenate(v) for k, v in parts.items()}
+    flat['roots'] = np.asarray(roots)
+    return flat
+
+def export_scorer(model_file=MODEL_FILE, scorer_file=SCORER_FILE, features=FEATURES):
+    mdl = read_model(model_file, features)
+    meta = read_meta(model_file) or {}
+    flat = flatten_forest(mdl)
+    source = TEMPLATE.format(
+        model_name=os.path.basename(model_file),
+        sha256=meta.get('sha256') or sha256_file(model_file),
+        features=list(features),
+        n_trees=len(mdl.estimators_),
+        roots=_b64(flat['roots'], '<i4'),
+        feature=_b64(flat['feature'], '<i4'),
+        threshold=_b64(flat['threshold'], '<f8'),
+        left=_b64(flat['left'], '<i4'),
+        right=_b64(flat['right'], '<i4'),
+        p0=_b64(flat['p0'], '<f8'),
+        p1=_b64(flat['p1'], '<f8')
+    )
+    tmp = scorer_file + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(source)
+    os.replace(tmp, scorer_file)
+    return {"scorer": scorer_file, "trees": len(mdl.estimators_), "nodes": len(flat['feature']),
+            "bytes": len(source)}
+
+def verify_scorer(model_file=MODEL_FILE, scorer_file=SCORER_FILE, rows=2000, seed=0):
+    # Random vitals across the app's input ranges, compared bit for bit
+    scorer = load_scorer(scorer_file)
+    mdl = read_model(model_file, FEATURES)
+    mdl.set_params(n_jobs=1)  # sums the trees in order, like the generated loop
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(1, 101, rows), rng.integers(0, 2, rows), rng.integers(1, 5, rows),
+        rng.uniform(80, 600, rows), rng.uniform(60, 250, rows), rng.uniform(40, 220, rows)
+    ]).astype(np.float64)
+    import pandas as pd
+    expected = mdl.predict_proba(pd.DataFrame(X, columns=FEATURES))
+    got = np.asarray(scorer.predict_proba(X.tolist()))
+    return int((expected != got).any(axis=1).sum())
+
+# ============================================================
+# LOADING FROM THE APP
+# ============================================================
+def load_scorer(scorer_file=SCORER_FILE):
+    import importlib.util
+    name = os.path.splitext(os.path.basename(scorer_file))[0]
+    spec = importlib.util.spec_from_file_location(name, scorer_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_fresh_scorer(model_file=MODEL_FILE, scorer_file=SCORER_FILE):
+    # The generated module is only used while it matches the artifact on disk
+    if not (os.path.exists(scorer_file) and os.path.exists(model_file)):
+        return None
+    try:
+        scorer = load_scorer(scorer_file)
+        meta = read_meta(model_file) or {}
+        current = meta.get('sha256') or sha256_file(model_file)
+    except Exception as e:
+        print(f"Generated scorer ignored: {e}")
+        return None
+    return scorer if getattr(scorer, 'MODEL_SHA256', None) == current else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained forest as a dependency-free Python module.")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--out', default=SCORER_FILE)
+    parser.add_argument('--no-verify', action='store_true', help="Skip the bit-for-bit comparison with sklearn")
+    args = parser.parse_args(argv)
+    info = export_scorer(args.model, args.out)
+    print(f"Wrote {info['scorer']}: {info['trees']} trees, {info['nodes']:,} nodes, {info['bytes'] / 1024:,.0f} KB")
+    if not args.no_verify:
+        mismatches = verify_scorer(args.model, args.out)
+        print("predict_proba reproduced exactly" if not mismatches else f"❌ {mismatches} rows differ from sklearn")
+        sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,22 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 import webview
-import joblib
 import os
-import datetime
+import time
 import base64
-
-# --- CONFIGURATION ---
-MODEL_FILE = 'heart_model.joblib'
-DATA_FILE = 'train.csv'
+from transport import pack, TRANSPORT_JS
+from history import PredictionLog, VIRTUAL_LIST_JS, PAGE_ROWS
+from jobs import JobManager, JobCancelled
+from engine import get_engine, parse_vitals, LOW_CONFIDENCE_SPREAD
+from profiling import Profiler
 
 # --- 1. AI ENGINE ---
-def initialize_engine():
-    features = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
-    if os.path.exists(MODEL_FILE):
-        return joblib.load(MODEL_FILE), features
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-        df['Heart Disease'] = df['Heart Disease'].map({'Absence': 0, 'Presence': 1})
-        X = df[features]
-        y = df['Heart Disease']
-        mdl = RandomForestClassifier(n_estimators=100, max_depth=12, n_jobs=-1, random_state=42)
-        mdl.fit(X, y)
-        joblib.dump(mdl, MODEL_FILE)
-        return mdl, features
-    else:
-        return None, features
-
-model, feature_names = initialize_engine()
+# Shared with every other front end; the model loads on first use
+engine = get_engine()
+rule_table = engine.rules('final')
+# Every prediction this session, paged into the history view
+history = PredictionLog(rule_table.status)
+# On-demand captures for the diagnostics panel; idle costs nothing
+profiler = Profiler(engine)
 
 def get_icon_base64(path):
     try:
@@ -41,48 +29,191 @@ def get_icon_base64(path):
 icon_data = get_icon_base64("icon.png")
 
 # --- 2. BACKEND API ---
+def rows_to_matrix(rows):
+    return np.array([parse_vitals(r) for r in rows], dtype=np.float64).reshape(-1, len(engine.features))
+
+def score_matrix(X):
+    # Shared by score_batch and the background scoring job
+    risk, spread, result = engine.evaluate(X, 'final')
+    history.append(X, risk, result.status, source='batch')
+    return risk, spread, result
+
+def batch_response(risk, spread, result, packed):
+    low = spread >= LOW_CONFIDENCE_SPREAD if spread is not None else np.zeros(len(risk), dtype=bool)
+    if packed:
+        columns = {
+            "risk": (risk, 'f4'),
+            "status": (result.status, 'label', list(rule_table.status)),
+            "low_confidence": (low, 'u1')
+        }
+        if spread is not None:
+            columns["spread"] = (spread, 'f4')
+        return pack(columns, rows=len(risk))
+    rows_out = result.rows()
+    for i, row in enumerate(rows_out):
+        row["spread"] = float(spread[i]) if spread is not None else None
+        row["low_confidence"] = bool(low[i])
+    return rows_out
+
 class Api:
     def predict(self, data):
         try:
-            age, sex = int(data['Age']), int(data['Sex'])
-            cp, chol = int(data['CP']), float(data['Chol'])
-            bp, hr = float(data['BP']), float(data['HR'])
-
-            if model:
-                df_input = pd.DataFrame([[age, sex, cp, chol, bp, hr]], columns=feature_names)
-                prob = model.predict_proba(df_input)[0][1] * 100
-            else:
-                prob = 25.5 
-            
-            risk = round(prob, 1)
-            med_tips = []
-            food_tips = ["Eat fresh fruits and vegetables every day."]
-            
-            if bp > 140:
-                med_tips.append("Your Blood Pressure is high. Please see a doctor.")
-                food_tips.append("Use much less salt in your food.")
-            if chol > 240:
-                med_tips.append("Your Cholesterol is high. A doctor can help lower it.")
-                food_tips.append("Avoid fried foods. Eat more oats and beans.")
-            
-            if risk > 70:
-                status, color = "HIGH RISK", "#ff4757"
-                med_tips.append("CRITICAL: High risk! See a heart specialist immediately.")
-            elif risk > 30:
-                status, color = "MEDIUM RISK", "#ffa502"
-                med_tips.append("CAUTION: Medium risk detected. Watch your health closely.")
-            else:
-                status, color = "HEALTHY", "#2ed573"
-                med_tips.append("Your heart looks healthy! Keep up your good lifestyle.")
-
-            return {
-                "risk": risk, "color": color, "status": status,
-                "medical": med_tips, "food": food_tips,
-                "timestamp": datetime.datetime.now().strftime("%I:%M %p")
-            }
+            values = parse_vitals(data)
+            result = engine.predict(values, 'final')
+            if "error" not in result:
+                history.append([values], [result["risk"]], [result["status"]])
+            return result
+        except Exception as e: return {"error": str(e)}
+
+    def score_batch(self, rows, packed=False):
+        # Bulk results go back as typed-array columns when packed=True
+        try:
+            X = rows_to_matrix(rows)
+            return batch_response(*score_matrix(X), packed)
+        except Exception as e: return {"error": str(e)}
+
+    def score_bands(self, rows, packed=False):
+        # Band only: trees stop once a row's band is settled, so risk is an
+        # estimate between risk_low and risk_high
+        try:
+            X = rows_to_matrix(rows)
+            estimate, result = engine.evaluate_bands(X, 'final')
+            trees = estimate.trees if estimate.trees is not None else np.zeros(len(X))
+            if packed:
+                return pack({
+                    "status": (result.status, 'label', list(rule_table.status)),
+                    "risk": (estimate.risk, 'f4'),
+                    "risk_low": (estimate.low, 'f4'),
+                    "risk_high": (estimate.high, 'f4'),
+                    "trees": (trees, 'u2')
+                }, rows=len(X), mean_trees=estimate.mean_trees)
+            return [{"status": s, "risk": float(r), "risk_low": float(lo), "risk_high": float(hi), "trees": int(t)}
+                    for s, r, lo, hi, t in zip(result.status, estimate.risk, estimate.low, estimate.high, trees)]
+        except Exception as e: return {"error": str(e)}
+
+    def history_page(self, start, limit=PAGE_ROWS, packed=False):
+        try:
+            return history.page(int(start), int(limit), packed)
+        except Exception as e: return {"error": str(e)}
+
+    def get_metrics(self):
+        engine.sync_drift()
+        return {"model_version": engine.drift.version, "drift": engine.drift.metrics()}
+
+    def submit_job(self, kind, params=None):
+        try:
+            return jobs.submit(kind, params).status()
+        except Exception as e: return {"error": str(e)}
+
+    def job_status(self, job_id=None):
+        try:
+            return jobs.status(job_id)
+        except Exception as e: return {"error": str(e)}
+
+    def cancel_job(self, job_id):
+        try:
+            return jobs.cancel(job_id).status()
+        except Exception as e: return {"error": str(e)}
+
+    def model_info(self):
+        return engine.info()
+
+    def train_status(self):
+        return engine.trainer.status() if engine.trainer else {"state": "idle"}
+
+    def retrain(self):
+        try:
+            return engine.start_training().status()
+        except Exception as e: return {"error": str(e)}
+
+    def start_profile(self, seconds=30, target='predict'):
+        # target: 'predict' (this window), 'startup' (cold load) or 'training' (one run)
+        try:
+            return profiler.start(float(seconds), target, api=self)
+        except Exception as e: return {"error": str(e)}
+
+    def stop_profile(self):
+        try:
+            return profiler.stop()
+        except Exception as e: return {"error": str(e)}
+
+    def profile_status(self):
+        return profiler.status()
+
+    def add_shadow(self, path, name=None):
+        # Candidate scored on the same inputs in the background; answers still come from the live model
+        try:
+            engine.add_shadow(path, name or None)
+            return engine.shadow_report()
+        except Exception as e: return {"error": str(e)}
+
+    def remove_shadow(self, name):
+        try:
+            engine.remove_shadow(name)
+            return engine.shadow_report()
         except Exception as e: return {"error": str(e)}
 
-# --- 3. UI DEFINITION ---
+    def shadow_report(self):
+        return engine.shadow_report()
+
+# --- 3. BACKGROUND JOBS ---
+# Long operations run on the job pool; the UI polls job_status instead of
+# awaiting one bridge call for minutes.
+jobs = JobManager()
+
+def job_score_rows(job, rows, chunk_rows=1000):
+    X = rows_to_matrix(rows)
+    parts = []
+    counts = {s: 0 for s in rule_table.status}
+    for start in range(0, len(X), chunk_rows):
+        job.report(start, len(X), f"{start:,} / {len(X):,} rows")
+        risk, spread, result = score_matrix(X[start:start + chunk_rows])
+        parts.append((risk, spread, result.status))
+        for s in result.status:
+            counts[s] += 1
+        job.add_partial({"rows": start + len(risk), **counts})
+    risk = np.concatenate([p[0] for p in parts]) if parts else np.zeros(0)
+    status = np.concatenate([p[2] for p in parts]) if parts else np.zeros(0, dtype=object)
+    columns = {"risk": (risk, 'f4'), "status": (status, 'label', list(rule_table.status))}
+    if parts and parts[0][1] is not None:
+        columns["spread"] = (np.concatenate([p[1] for p in parts]), 'f4')
+    job.report(len(X), len(X), f"{len(X):,} rows scored")
+    return pack(columns, rows=len(risk), counts=counts)
+
+def job_score_file(job, input, output, workers=None):
+    # bulk_score pipeline; progress is counted against the input's line count
+    import bulk_score
+    with open(input, 'rb') as f:
+        total = max(1, sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1)
+    def progress(rows):
+        job.report(rows, total, f"{rows:,} / ~{total:,} rows")
+        job.add_partial({"rows": rows})
+    try:
+        with open(os.devnull, 'w') as quiet:
+            return bulk_score.run(input, output, model_file=engine.model_file, workers=workers,
+                                  progress=progress, log=quiet)
+    except JobCancelled:
+        job.message = f"Cancelled; {output} holds the rows scored so far"
+        raise
+
+def job_retrain(job):
+    runner = engine.start_training()
+    try:
+        while runner.running:
+            job.report(runner.progress, 1.0, runner.log[-1] if runner.log else "Training")
+            time.sleep(0.5)
+    except JobCancelled:
+        runner.cancel()
+        raise
+    if runner.state != "done":
+        raise RuntimeError(runner.error or "Training failed")
+    return runner.status()
+
+jobs.register('score_rows', job_score_rows)
+jobs.register('score_file', job_score_file)
+jobs.register('retrain', job_retrain)
+
+# --- 4. UI DEFINITION ---
 html_ui = f"""
 <!DOCTYPE html>
 <html>
@@ -164,6 +295,13 @@ html_ui = f"""
         .tip-box:hover {{ transform: scale(1.02); box-shadow: 0 10px 20px rgba(0,0,0,0.03); }}
         .tip-icon {{ font-size: 1.2rem; min-width: 40px; height: 40px; border-radius: 10px; display: flex; align-items: center; justify-content: center; }}
         
+        .history-head, .vl-row {{ display: flex; align-items: center; border-bottom: 1px solid rgba(0,0,0,0.04); font-size: 0.85rem; }}
+        .history-head {{ font-weight: 800; font-size: 0.7rem; color: #636e72; text-transform: uppercase; padding-bottom: 6px; }}
+        .history-head span, .vl-cell {{ flex: 1; padding: 0 6px; white-space: nowrap; overflow: hidden; }}
+        #history {{ height: 320px; position: relative; }}
+        .diag-table {{ font-family: monospace; font-size: 0.75rem; white-space: pre; max-height: 260px; overflow: auto; }}
+        .job-row {{ border-bottom: 1px solid rgba(0,0,0,0.04); padding: 8px 0; font-size: 0.85rem; }}
+
         .section-title {{ font-weight: 800; font-size: 0.75rem; color: #b2bec3; text-transform: uppercase; margin-bottom: 15px; display: block; }}
     </style>
 </head>
@@ -173,7 +311,13 @@ html_ui = f"""
             <div class="col-md-3 sidebar">
                 <div class="brand-box">
                     {"<img src='" + icon_data + "' style='width:35px'>" if icon_data else "<i class='fa-solid fa-heart-pulse fa-2x text-danger'></i>"}
-                    <div class="brand-title">HEARTGUARD</div>
+                    <div class="brand-title" ondblclick="toggleDiagnostics()">HEARTGUARD</div>
+                </div>
+
+                <div id="drift-flag" class="alert alert-warning small py-2" style="display:none;">
+                    <i class="fa-solid fa-triangle-exclamation"></i>
+                    Patient inputs have drifted from the training data: <span id="drift-features"></span>.
+                    Predictions may be less reliable.
                 </div>
 
                 <label class="form-label">Patient Age</label>
@@ -216,6 +360,10 @@ html_ui = f"""
                                     <div id="score">0%</div>
                                     <div id="label">...</div>
                                 </div>
+                                <div id="confidence" class="alert alert-warning small py-2 mt-3" style="display:none;">
+                                    <i class="fa-solid fa-circle-question"></i>
+                                    Low confidence, recheck vitals (model votes spread &plusmn;<span id="spread"></span> pts)
+                                </div>
                                 <p class="small text-muted mb-0">Updated: <span id="ts"></span></p>
                             </div>
                         </div>
@@ -229,10 +377,58 @@ html_ui = f"""
                         </div>
                     </div>
                 </div>
+
+                <div class="result-card mt-4">
+                    <span class="section-title">Prediction History (<span id="history-count">0</span>)</span>
+                    <div class="history-head">
+                        <span>#</span><span>Time</span><span>Age / Sex</span><span>BP / Chol / HR</span>
+                        <span>Risk</span><span>Status</span><span>Source</span>
+                    </div>
+                    <div id="history"></div>
+                </div>
+
+                <div class="result-card mt-4">
+                    <span class="section-title">Background Jobs</span>
+                    <div class="row g-2 mb-2">
+                        <div class="col-md-4"><input id="job-input" class="form-control" placeholder="Input CSV path"></div>
+                        <div class="col-md-4"><input id="job-output" class="form-control" placeholder="Output .csv / .parquet path"></div>
+                        <div class="col-md-2"><button class="btn btn-outline-danger w-100" onclick="submitJob('score_file')">Score file</button></div>
+                        <div class="col-md-2"><button class="btn btn-outline-secondary w-100" onclick="submitJob('retrain')">Retrain</button></div>
+                    </div>
+                    <div id="job-list" class="text-muted small">No jobs yet.</div>
+                </div>
+
+                <!-- Support only: shown by double-clicking the brand title -->
+                <div id="diagnostics" class="result-card mt-4" style="display:none;">
+                    <span class="section-title">Diagnostics: Profiling</span>
+                    <div class="row g-2 mb-2">
+                        <div class="col-md-4">
+                            <select id="profile-target" class="form-select">
+                                <option value="predict">Predictions (live window)</option>
+                                <option value="startup">Startup (cold load)</option>
+                                <option value="training">Training run</option>
+                            </select>
+                        </div>
+                        <div class="col-md-2"><input id="profile-seconds" type="number" class="form-control" value="30" min="1"></div>
+                        <div class="col-md-3"><button class="btn btn-outline-danger w-100" onclick="startProfile()">Start capture</button></div>
+                        <div class="col-md-3"><button class="btn btn-outline-secondary w-100" onclick="stopProfile()">Stop</button></div>
+                    </div>
+                    <div id="profile-state" class="text-muted small"></div>
+                    <div id="profile-summary" class="diag-table mt-2"></div>
+
+                    <span class="section-title mt-4">Shadow Models</span>
+                    <div class="row g-2 mb-2">
+                        <div class="col-md-9"><input id="shadow-path" class="form-control" placeholder="Candidate .joblib path"></div>
+                        <div class="col-md-3"><button class="btn btn-outline-secondary w-100" onclick="addShadow()">Add candidate</button></div>
+                    </div>
+                    <div id="shadow-report" class="diag-table"></div>
+                </div>
             </div>
         </div>
     </div>
 
+    <script>{TRANSPORT_JS}</script>
+    <script>{VIRTUAL_LIST_JS}</script>
     <script>
         const ageBox = document.getElementById('Age');
         for(let i=1; i<=100; i++) {{
@@ -241,6 +437,120 @@ html_ui = f"""
             ageBox.add(o);
         }}
 
+        async function checkDrift() {{
+            const m = await pywebview.api.get_metrics();
+            const flag = document.getElementById('drift-flag');
+            flag.style.display = m.drift.drift ? 'block' : 'none';
+            document.getElementById('drift-features').innerText = (m.drift.drifted_features || []).join(', ');
+        }}
+        window.addEventListener('pywebviewready', () => {{
+            HGHistory.init(document.getElementById('history'));
+            refreshJobs();
+            checkDrift();
+            setInterval(checkDrift, 60000);
+        }});
+
+        let jobTimer = null;
+        async function submitJob(kind) {{
+            const params = kind === 'score_file'
+                ? {{input: document.getElementById('job-input').value, output: document.getElementById('job-output').value}}
+                : {{}};
+            const res = await pywebview.api.submit_job(kind, params);
+            if (res.error) {{ alert(res.error); return; }}
+            refreshJobs();
+        }}
+
+        async function cancelJob(id) {{
+            await pywebview.api.cancel_job(id);
+            refreshJobs();
+        }}
+
+        async function refreshJobs() {{
+            const list = await pywebview.api.job_status();
+            if (list.error) return;
+            const colors = {{queued: 'secondary', running: 'primary', done: 'success', failed: 'danger', cancelled: 'warning'}};
+            const box = document.getElementById('job-list');
+            box.innerHTML = list.length ? list.map(j =>
+                `<div class="job-row">
+                    <div class="d-flex justify-content-between">
+                        <span><b>${{j.kind}}</b> <span class="badge bg-${{colors[j.state]}}">${{j.state}}</span> ${{j.created_at}}</span>
+                        ${{(j.state === 'queued' || j.state === 'running') && !j.cancel_requested
+                            ? `<button class="btn btn-sm btn-link text-danger p-0" onclick="cancelJob('${{j.id}}')">Cancel</button>` : ''}}
+                    </div>
+                    <div class="progress my-1" style="height:6px"><div class="progress-bar" style="width:${{j.progress}}%"></div></div>
+                    <div class="text-muted"></div>
+                </div>`).join('') : 'No jobs yet.';
+            // Errors and messages can carry the typed path and exception text: shown as text only
+            box.querySelectorAll('.job-row .text-muted').forEach((el, i) => {{
+                el.textContent = list[i].error || list[i].message || '';
+            }});
+            // Poll only while something is still queued or running
+            const active = list.some(j => j.state === 'queued' || j.state === 'running');
+            if (active && !jobTimer) jobTimer = setInterval(refreshJobs, 1000);
+            if (!active && jobTimer) {{ clearInterval(jobTimer); jobTimer = null; HGHistory.poll(); }}
+        }}
+
+        let profileTimer = null;
+        function toggleDiagnostics() {{
+            const panel = document.getElementById('diagnostics');
+            panel.style.display = panel.style.display === 'none' ? 'block' : 'none';
+            if (panel.style.display === 'block') {{ refreshProfile(); refreshShadow(); }}
+        }}
+
+        async function addShadow() {{
+            const res = await pywebview.api.add_shadow(document.getElementById('shadow-path').value);
+            if (res.error) {{ alert(res.error); return; }}
+            refreshShadow();
+        }}
+
+        async function refreshShadow() {{
+            const r = await pywebview.api.shadow_report();
+            const box = document.getElementById('shadow-report');
+            if (!r.models.length) {{ box.innerText = 'No candidates.'; return; }}
+            box.innerText =
+                `live model: ${{r.primary_us_per_row_p50 ?? '-'}} us/row p50; ` +
+                `${{r.scored}} rows shadowed, ${{r.dropped}} dropped (${{(r.drop_rate * 100).toFixed(1)}}%)\n` +
+                r.models.map(m =>
+                    `${{m.name}} [${{m.version}}]: ${{m.rows}} rows, band ${{(m.band_disagreement * 100).toFixed(1)}}%, ` +
+                    `>=${{r.risk_delta}} pts ${{(m.risk_disagreement * 100).toFixed(1)}}%, ` +
+                    `mean delta ${{m.mean_abs_delta}}, ${{m.us_per_row_p50 ?? '-'}} us/row p50` +
+                    (m.errors ? `, ${{m.errors}} errors (${{m.last_error}})` : '')).join('\n');
+        }}
+
+        async function startProfile() {{
+            const res = await pywebview.api.start_profile(
+                document.getElementById('profile-seconds').value, document.getElementById('profile-target').value);
+            if (res.error) {{ alert(res.error); return; }}
+            refreshProfile();
+        }}
+
+        async function stopProfile() {{
+            await pywebview.api.stop_profile();
+            refreshProfile();
+        }}
+
+        async function refreshProfile() {{
+            const s = await pywebview.api.profile_status();
+            const state = document.getElementById('profile-state');
+            if (s.state === 'running') {{
+                state.innerText = `Capturing ${{s.target}}: ${{s.elapsed}} s` +
+                    (s.target === 'predict' ? ` of ${{s.seconds}} s, ${{s.calls}} calls` : '') + ` -> ${{s.dir}}`;
+                if (!profileTimer) profileTimer = setInterval(refreshProfile, 1000);
+                return;
+            }}
+            if (profileTimer) {{ clearInterval(profileTimer); profileTimer = null; }}
+            const last = s.last;
+            if (!last) {{ state.innerText = 'No capture yet.'; return; }}
+            state.innerText = `Last capture: ${{last.target}}, ${{last.seconds}} s -> ${{last.dir}}` +
+                (last.error ? ` (${{last.error}})` : '');
+            const fns = (last.functions || []).slice(0, 12).map(f =>
+                `${{f.cumulative_ms.toFixed(1).padStart(10)}} ms  ${{String(f.calls).padStart(7)}}x  ${{f.function}}`);
+            const allocs = (last.allocations || []).slice(0, 8).map(a =>
+                `${{a.kb.toFixed(1).padStart(10)}} KB  ${{String(a.blocks).padStart(7)}}   ${{a.site}}`);
+            document.getElementById('profile-summary').innerText =
+                'Top functions (cumulative)\n' + fns.join('\n') + '\n\nTop allocation sites\n' + allocs.join('\n');
+        }}
+
         function animateValue(obj, start, end, duration) {{
             let startTimestamp = null;
             const step = (timestamp) => {{
@@ -265,6 +575,10 @@ html_ui = f"""
             }};
 
             const res = await pywebview.api.predict(inputs);
+            if (res.error) {{
+                alert(res.error);
+                return;
+            }}
             document.getElementById('idle').style.display = 'none';
             document.getElementById('active').style.display = 'block';
 
@@ -279,6 +593,10 @@ html_ui = f"""
             labelTxt.style.color = res.color;
             ring.style.borderColor = res.color;
             document.getElementById('ts').innerText = res.timestamp;
+            HGHistory.poll();
+            document.getElementById('confidence').style.display = res.low_confidence ? 'block' : 'none';
+            document.getElementById('spread').innerText = res.spread;
+            checkDrift();
 
             document.getElementById('med-list').innerHTML = res.medical.map(m => 
                 `<div class="tip-box">
@@ -302,5 +620,8 @@ html_ui = f"""
 """
 
 if __name__ == '__main__':
+    # Thin client when daemon.py is running; otherwise the model loads in this window
+    if not engine.connect():
+        engine.load().watch()
     window = webview.create_window("HeartGuard AI", html=html_ui, js_api=Api(), width=1300, height=900)
     webview.start()
@@ -1,38 +1,12 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 import webview
-import joblib
-import os
 import sys
+from engine import get_engine
 
 # ============================================================
-# PHASE 1: LOGIC CODE (AI Brain with Persistence)
+# PHASE 1: LOGIC CODE (Shared AI Engine)
 # ============================================================
-MODEL_PATH = 'heart_pro_model.pkl'
-FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
-
-def initialize_logic():
-    if os.path.exists(MODEL_PATH):
-        print("⚡ PHASE 1: Loading Pre-Trained AI Brain... (Instant)")
-        return joblib.load(MODEL_PATH)
-    
-    print("🚀 PHASE 1: First-time setup. Training on dataset...")
-    try:
-        df = pd.read_csv('train.csv')
-        X = df[FEATURES]
-        y = df['Heart Disease'].map({'Absence': 0, 'Presence': 1})
-
-        model = RandomForestClassifier(n_estimators=30, max_depth=10, n_jobs=-1, random_state=42)
-        model.fit(X, y)
-
-        joblib.dump(model, MODEL_PATH)
-        print("✅ Training Complete. Model saved.")
-        return model
-    except Exception as e:
-        print(f"❌ Critical Error in Logic: {e}")
-        sys.exit()
-
-brain = initialize_logic()
+# Same artifact as the other front ends; trained on first run if missing
+engine = get_engine()
 
 # ============================================================
 # PHASE 2: DESIGN CODE (WITH LOGO HEADER)
@@ -238,14 +212,18 @@ async function requestAI() {
 # ============================================================
 class HeartAPI:
     def predict(self, inputs):
-        df_input = pd.DataFrame([inputs], columns=FEATURES)
-        risk = brain.predict_proba(df_input)[0][1]
-        return round(risk * 100, 2)
+        prob, _ = engine.score([inputs])
+        return round(float(prob[0]) * 100, 2)
 
 # ============================================================
 # PHASE 4: DEPLOYMENT
 # ============================================================
 if __name__ == '__main__':
+    print("⚡ PHASE 1: Loading AI Brain...")
+    engine.load(block=True)
+    if engine.model is None:
+        print(f"❌ Critical Error in Logic: {engine.trainer.error if engine.trainer else 'no model or training data'}")
+        sys.exit()
     api = HeartAPI()
 
     window = webview.create_window(
@@ -1,34 +1,11 @@
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 import webview
-import joblib
 import os
-import datetime
 import base64
-
-# --- CONFIGURATION ---
-MODEL_FILE = 'heart_model.joblib'
-DATA_FILE = 'train.csv'
+from engine import get_engine, parse_vitals
 
 # --- 1. AI ENGINE ---
-def initialize_engine():
-    features = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
-    if os.path.exists(MODEL_FILE):
-        return joblib.load(MODEL_FILE), features
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-        df['Heart Disease'] = df['Heart Disease'].map({'Absence': 0, 'Presence': 1})
-        X = df[features]
-        y = df['Heart Disease']
-        mdl = RandomForestClassifier(n_estimators=100, max_depth=12, n_jobs=-1, random_state=42)
-        mdl.fit(X, y)
-        joblib.dump(mdl, MODEL_FILE)
-        return mdl, features
-    else:
-        return None, features
-
-model, feature_names = initialize_engine()
+# Shared engine: same artifact, loader and rules as the other front ends
+engine = get_engine()
 
 def get_icon_base64(path):
     try:
@@ -44,42 +21,7 @@ icon_data = get_icon_base64("icon.png")
 class Api:
     def predict(self, data):
         try:
-            age, sex = int(data['Age']), int(data['Sex'])
-            cp, chol = int(data['CP']), float(data['Chol'])
-            bp, hr = float(data['BP']), float(data['HR'])
-
-            if model:
-                df_input = pd.DataFrame([[age, sex, cp, chol, bp, hr]], columns=feature_names)
-                prob = model.predict_proba(df_input)[0][1] * 100
-            else:
-                prob = 25.5 
-            
-            risk = round(prob, 1)
-            med_tips = []
-            food_tips = ["Eat fresh fruits and vegetables every day."]
-            
-            if bp > 140:
-                med_tips.append("Your Blood Pressure is high. Please see a doctor.")
-                food_tips.append("Use much less salt in your food.")
-            if chol > 240:
-                med_tips.append("Your Cholesterol is high. A doctor can help lower it.")
-                food_tips.append("Avoid fried foods. Eat more oats and beans.")
-            
-            if risk > 70:
-                status, color = "HIGH RISK", "#ff4757"
-                med_tips.append("CRITICAL: High risk! See a heart specialist immediately.")
-            elif risk > 30:
-                status, color = "MEDIUM RISK", "#ffa502"
-                med_tips.append("CAUTION: Medium risk detected. Watch your health closely.")
-            else:
-                status, color = "HEALTHY", "#2ed573"
-                med_tips.append("Your heart looks healthy! Keep up your good lifestyle.")
-
-            return {
-                "risk": risk, "color": color, "status": status,
-                "medical": med_tips, "food": food_tips,
-                "timestamp": datetime.datetime.now().strftime("%I:%M %p")
-            }
+            return engine.predict(parse_vitals(data), 'final')
         except Exception as e: return {"error": str(e)}
 
 # --- 3. UI DEFINITION ---
@@ -302,5 +244,7 @@ html_ui = f"""
 """
 
 if __name__ == '__main__':
+    # A running daemon.py already holds the model; otherwise load it here
+    engine.connect() or engine.load(block=True)
     window = webview.create_window("HeartGuard AI", html=html_ui, js_api=Api(), width=1300, height=900)
     webview.start()
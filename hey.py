@@ -1,113 +1,20 @@
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 import webview
-import joblib
-import os
-import datetime
-import random
-
-# --- CONFIGURATION ---
-MODEL_FILE = 'heart_model.joblib'
-DATA_FILE = 'train.csv'
+from engine import get_engine, parse_vitals
 
 # --- 1. AI ENGINE ---
-def initialize_engine():
-    features = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
-    if os.path.exists(MODEL_FILE):
-        try: return joblib.load(MODEL_FILE), features
-        except: pass
-
-    if os.path.exists(DATA_FILE):
-        try:
-            df = pd.read_csv(DATA_FILE)
-            df.columns = [c.strip() for c in df.columns]
-            if 'Heart Disease' in df.columns:
-                df['Heart Disease'] = df['Heart Disease'].map({'Absence':0,'Presence':1}).fillna(0)
-            X = df[features]
-            y = df['Heart Disease']
-            mdl = RandomForestClassifier(n_estimators=150, max_depth=12, n_jobs=-1, random_state=42)
-            mdl.fit(X, y)
-            joblib.dump(mdl, MODEL_FILE)
-            return mdl, features
-        except: return None, features
-    return None, features
+# Shared engine: same artifact, loader and rules as the other front ends
+engine = get_engine()
 
-model, feature_names = initialize_engine()
+def fallback_risk(age, sex, cp, chol, bp, hr):
+    # Simple score used only while no model is available
+    return (age*0.3) + (chol/10) + (bp/5) + (cp*10) - (hr/10)
 
 # --- 2. BACKEND API ---
 class Api:
     def predict(self, data):
         try:
-            age, sex = int(data['Age']), int(data['Sex'])
-            cp, chol = int(data['CP']), float(data['Chol'])
-            bp, hr = float(data['BP']), float(data['HR'])
-
-            # 1. Evaluate Individual Levels
-            bp_lvl = "Normal"
-            if bp >= 140: bp_lvl = "High"
-            elif bp < 90: bp_lvl = "Low"
-
-            hr_lvl = "Normal"
-            if hr >= 100: hr_lvl = "High"
-            elif hr < 50: hr_lvl = "Low"
-
-            chol_lvl = "Normal"
-            if chol >= 240: chol_lvl = "High"
-
-            # 2. Emergency Check
-            is_emergency = False
-            emergency_msg = ""
-            if bp > 180 or hr > 160 or hr < 40 or cp == 4:
-                is_emergency = True
-                emergency_msg = "CRITICAL: Your vitals are at a dangerous level. Please seek medical help immediately."
-
-            # 3. AI Prediction
-            if model:
-                df_input = pd.DataFrame([[age, sex, cp, chol, bp, hr]], columns=feature_names)
-                prob = model.predict_proba(df_input)[0][1] * 100
-            else:
-                prob = (age*0.3) + (chol/10) + (bp/5) + (cp*10) - (hr/10)
-
-            risk = max(2, min(98, round(prob, 1)))
-
-            # 4. Dynamic Tips
-            health_tips = [
-                "Walking 30 mins a day strengthens the heart muscle.",
-                "Reduce salt intake to lower high blood pressure.",
-                "Eat more fiber (oats, beans) to lower bad cholesterol.",
-                "Avoid smoking to keep your arteries flexible.",
-                "Manage stress through deep breathing or meditation.",
-                "Omega-3 in fish is like 'oil' for your heart's health."
-            ]
-            
-            emergency_tips = [
-                "Sit down and try to remain calm.",
-                "Loosen tight clothing to breathe easier.",
-                "Call your local emergency number (e.g., 108).",
-                "Do not try to drive yourself to the hospital."
-            ]
-
-            # 5. Result Status
-            if is_emergency:
-                status, color = "EMERGENCY", "#d63031"
-                display_msg = emergency_msg
-                tips_to_show = emergency_tips
-            elif risk > 40:
-                status, color = "HIGH RISK", "#e17055"
-                display_msg = "Your heart needs more care. Talk to a doctor about these numbers."
-                tips_to_show = random.sample(health_tips, 3)
-            else:
-                status, color = "HEALTHY", "#00b894"
-                display_msg = "Great job! Your heart vitals look good. Keep your healthy habits."
-                tips_to_show = random.sample(health_tips, 3)
-
-            return {
-                "risk": risk, "status": status, "color": color, "msg": display_msg,
-                "bp_val": f"{bp} ({bp_lvl})", "hr_val": f"{hr} ({hr_lvl})", "chol_val": f"{chol} ({chol_lvl})",
-                "tips": tips_to_show, "is_emergency": is_emergency,
-                "timestamp": datetime.datetime.now().strftime("%I:%M %p")
-            }
+            # Levels, emergency check and tips come from the 'hey' rule table
+            return engine.predict(parse_vitals(data), 'hey', fallback=fallback_risk, clamp=(2, 98))
         except Exception as e:
             return {"error": str(e)}
 
@@ -230,5 +137,7 @@ async function analyze(){
 """
 
 if __name__ == '__main__':
+    # A running daemon.py already holds the model; otherwise load it here
+    engine.connect() or engine.load(block=True)
     webview.create_window("HeartCheck AI Pro", html=html_ui, js_api=Api(), width=1200, height=850)
     webview.start()
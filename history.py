@@ -0,0 +1,225 @@
+import threading
+import time
+import numpy as np
+from transport import DTYPES, pack
+
+# --- CONFIGURATION ---
+HISTORY_ROWS = 200000
+PAGE_ROWS = 500
+
+# ============================================================
+# SESSION LOG
+# ============================================================
+class PredictionLog:
+    # Column arrays used as a ring: prediction number `seq` lives at
+    # seq % capacity. Appends and pages are slices, never per-row objects.
+    COLUMNS = {
+        'time': 'f8', 'age': 'u2', 'sex': 'u1', 'cp': 'u1',
+        'chol': 'f4', 'bp': 'f4', 'hr': 'f4', 'risk': 'f4', 'status': 'u1', 'source': 'u1'
+    }
+    SOURCES = ['single', 'batch']
+
+    def __init__(self, statuses, capacity=HISTORY_ROWS):
+        self.statuses = list(statuses)
+        self._codes = {s: i for i, s in enumerate(self.statuses)}
+        self.capacity = capacity
+        self.cols = {name: np.zeros(capacity, dtype=DTYPES[dt][0]) for name, dt in self.COLUMNS.items()}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def first(self):
+        return max(0, self.total - self.capacity)
+
+    def append(self, X, risk, status, source='single'):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 6)[-self.capacity:]
+        n = len(X)
+        if not n:
+            return self.total
+        values = {
+            'time': np.full(n, time.time()),
+            'age': np.clip(X[:, 0], 0, 65535), 'sex': np.clip(X[:, 1], 0, 255), 'cp': np.clip(X[:, 2], 0, 255),
+            'chol': X[:, 3], 'bp': X[:, 4], 'hr': X[:, 5],
+            'risk': np.asarray(risk, dtype=np.float64).reshape(-1)[-n:],
+            'status': np.fromiter((self._codes[s] for s in status), dtype=np.uint8, count=len(status))[-n:],
+            'source': np.full(n, self.SOURCES.index(source))
+        }
+        with self._lock:
+            idx = (self.total + np.arange(n)) % self.capacity
+            for name, col in self.cols.items():
+                col[idx] = values[name]
+            self.total += n
+            return self.total
+
+    def page(self, start, limit=PAGE_ROWS, packed=False):
+        # Rows [start, start + limit) in prediction order; limit=0 just reports the totals
+        with self._lock:
+            total, first = self.total, self.first
+            start = min(max(start, first), total)
+            end = min(total, start + max(0, limit))
+            idx = np.arange(start, end) % self.capacity
+            cols = {name: col[idx] for name, col in self.cols.items()}
+        if packed:
+            payload = pack({name: (cols[name], dt) for name, dt in self.COLUMNS.items()},
+                           rows=end - start, start=start, total=total, first=first)
+            payload["columns"]["status"]["labels"] = self.statuses
+            payload["columns"]["source"]["labels"] = self.SOURCES
+            return payload
+        rows = [
+            {"seq": start + i, "time": float(cols['time'][i]), "age": int(cols['age'][i]),
+             "sex": int(cols['sex'][i]), "cp": int(cols['cp'][i]), "chol": round(float(cols['chol'][i]), 1),
+             "bp": round(float(cols['bp'][i]), 1), "hr": round(float(cols['hr'][i]), 1),
+             "risk": round(float(cols['risk'][i]), 1),
+             "status": self.statuses[cols['status'][i]], "source": self.SOURCES[cols['source'][i]]}
+            for i in range(end - start)
+        ]
+        return {"start": start, "total": total, "first": first, "rows": rows}
+
+# ============================================================
+# BROWSER COMPONENTS
+# ============================================================
+# Embedded in html_ui after TRANSPORT_JS.
+VIRTUAL_LIST_JS = """
+// Renders only the rows in view (plus a small overscan) into a pool of
+// absolutely positioned nodes; a spacer element provides the scroll height.
+class VirtualList {
+    constructor(container, {rowHeight = 36, overscan = 6, renderRow}) {
+        this.el = container;
+        this.rowHeight = rowHeight;
+        this.overscan = overscan;
+        this.renderRow = renderRow;
+        this.count = 0;
+        this.pool = [];
+        this.frame = null;
+        this.spacer = document.createElement('div');
+        this.spacer.style.position = 'relative';
+        this.el.style.overflowY = 'auto';
+        this.el.appendChild(this.spacer);
+        this.el.addEventListener('scroll', () => this.refresh(), {passive: true});
+        window.addEventListener('resize', () => this.refresh());
+    }
+
+    setCount(n) {
+        this.count = n;
+        this.spacer.style.height = (n * this.rowHeight) + 'px';
+        this.refresh();
+    }
+
+    refresh() {
+        // At most one render per animation frame, however fast the scroll events come
+        if (!this.frame) this.frame = requestAnimationFrame(() => { this.frame = null; this.render(); });
+    }
+
+    render() {
+        const top = this.el.scrollTop, height = this.el.clientHeight;
+        const first = Math.max(0, Math.floor(top / this.rowHeight) - this.overscan);
+        const last = Math.min(this.count, Math.ceil((top + height) / this.rowHeight) + this.overscan);
+        while (this.pool.length < last - first) {
+            const node = document.createElement('div');
+            node.className = 'vl-row';
+            node.style.cssText = `position:absolute;left:0;right:0;height:${this.rowHeight}px;`;
+            this.spacer.appendChild(node);
+            this.pool.push(node);
+        }
+        this.pool.forEach((node, k) => {
+            const i = first + k;
+            if (i < last) {
+                node.style.transform = `translateY(${i * this.rowHeight}px)`;
+                node.style.display = '';
+                this.renderRow(node, i);
+            } else {
+                node.style.display = 'none';
+            }
+        });
+    }
+}
+
+// Fixed-size pages of a server-side list, fetched on demand and cached.
+class PagedSource {
+    constructor(fetchPage, {pageSize = 500, maxPages = 40, onLoad = null} = {}) {
+        this.fetchPage = fetchPage;
+        this.pageSize = pageSize;
+        this.maxPages = maxPages;
+        this.onLoad = onLoad;
+        this.pages = new Map();
+        this.pending = new Set();
+    }
+
+    get(i) {
+        const p = Math.floor(i / this.pageSize);
+        const page = this.pages.get(p);
+        if (page && i >= page.start && i - page.start < page.rows) return [page, i - page.start];
+        this.load(p);
+        return null;
+    }
+
+    async load(p) {
+        if (this.pending.has(p)) return;
+        this.pending.add(p);
+        try {
+            const page = await this.fetchPage(p * this.pageSize, this.pageSize);
+            this.pages.delete(p);
+            this.pages.set(p, page);
+            // Map keeps insertion order, so the first key is the oldest page
+            while (this.pages.size > this.maxPages) this.pages.delete(this.pages.keys().next().value);
+        } finally {
+            this.pending.delete(p);
+        }
+        if (this.onLoad) this.onLoad(p);
+    }
+
+    invalidateFrom(i) {
+        const p = Math.floor(i / this.pageSize);
+        for (const k of [...this.pages.keys()]) if (k >= p) this.pages.delete(k);
+    }
+}
+
+// Newest-first prediction history backed by Api.history_page.
+const HGHistory = {
+    total: 0,
+    first: 0,
+
+    init(container) {
+        this.source = new PagedSource(
+            async (start, limit) => HGTransport.decode(await pywebview.api.history_page(start, limit, true)),
+            {onLoad: () => this.list.refresh()}
+        );
+        this.list = new VirtualList(container, {renderRow: (node, v) => this.renderRow(node, v)});
+        return this.poll();
+    },
+
+    renderRow(node, v) {
+        const seq = this.total - 1 - v;
+        const hit = this.source.get(seq);
+        if (!hit) {
+            node.innerHTML = `<span class="vl-cell text-muted">#${seq + 1} ...</span>`;
+            return;
+        }
+        const [page, j] = hit, c = page.columns;
+        const time = new Date(c.time[j] * 1000).toLocaleTimeString();
+        const r1 = x => Math.round(x * 10) / 10;
+        node.innerHTML =
+            `<span class="vl-cell">#${seq + 1}</span><span class="vl-cell">${time}</span>` +
+            `<span class="vl-cell">${c.age[j]} / ${c.sex[j] ? 'M' : 'F'}</span>` +
+            `<span class="vl-cell">${r1(c.bp[j])} / ${r1(c.chol[j])} / ${r1(c.hr[j])}</span>` +
+            `<span class="vl-cell fw-bold">${c.risk[j].toFixed(1)}%</span>` +
+            `<span class="vl-cell">${HGTransport.label(c.status, j)}</span>` +
+            `<span class="vl-cell text-muted">${HGTransport.label(c.source, j)}</span>`;
+    },
+
+    async poll() {
+        // Pick up rows added since the last call without refetching cached pages
+        const info = await pywebview.api.history_page(this.total, 0, true);
+        const added = info.total - this.total;
+        if (added <= 0) return;
+        this.source.invalidateFrom(this.total);
+        this.total = info.total;
+        this.first = info.first;
+        const scroller = this.list.el;
+        // Newest rows go on top; keep whatever the user is reading in place
+        if (scroller.scrollTop > 0) scroller.scrollTop += added * this.list.rowHeight;
+        this.list.setCount(this.total - this.first);
+        document.getElementById('history-count').innerText = this.total.toLocaleString();
+    }
+};
+"""
@@ -0,0 +1,160 @@
+import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURATION ---
+JOB_WORKERS = 2
+MAX_ACTIVE = 16       # queued + running; further submits are refused
+KEEP_FINISHED = 50    # finished jobs (and their results) kept for job_status
+PARTIAL_ITEMS = 100   # partial results kept per job, newest last
+
+class JobCancelled(Exception):
+    pass
+
+# --- 1. JOBS ---
+class Job:
+    # Handlers get the job itself: report() for progress (and the cancellation
+    # point), add_partial() for results that are ready before the end.
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex[:10]
+        self.kind = kind
+        self.params = params
+        self.state = "queued"
+        self.progress = 0.0
+        self.message = ""
+        self.partial = deque(maxlen=PARTIAL_ITEMS)
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, done, total=None, message=None):
+        self.check()
+        if total:
+            self.progress = max(0.0, min(1.0, done / total))
+        if message is not None:
+            self.message = message
+
+    def add_partial(self, item):
+        self.partial.append(item)
+
+    def status(self, detail=False):
+        fmt = lambda t: datetime.datetime.fromtimestamp(t).strftime("%H:%M:%S") if t else None
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "progress": round(self.progress * 100, 1),
+            "message": self.message,
+            "error": self.error,
+            "created_at": fmt(self.created_at),
+            "started_at": fmt(self.started_at),
+            "finished_at": fmt(self.finished_at),
+            "cancel_requested": self.cancelled
+        }
+        if detail:
+            out["partial"] = list(self.partial)
+            out["result"] = self.result
+        return out
+
+# --- 2. MANAGER ---
+class JobManager:
+    def __init__(self, workers=JOB_WORKERS, max_active=MAX_ACTIVE, keep=KEEP_FINISHED):
+        self.handlers = {}
+        self.max_active = max_active
+        self.keep = keep
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+        return handler
+
+    def submit(self, kind, params=None):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type '{kind}'. Choose from: {', '.join(sorted(self.handlers))}")
+        with self._lock:
+            active = sum(1 for j in self.jobs.values() if not j.finished)
+            if active >= self.max_active:
+                raise RuntimeError(f"{active} jobs are already queued or running; try again later")
+            job = Job(kind, dict(params or {}))
+            self.jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.cancelled:
+            # Cancelled while queued; still counts against the retention cap
+            self._trim()
+            return
+        job.state = "running"
+        job.started_at = time.time()
+        try:
+            job.result = self.handlers[job.kind](job, **job.params)
+            job.progress = 1.0
+            job.state = "done"
+        except JobCancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.state = "failed"
+        except BaseException as e:
+            # SystemExit and the like must not leave the job "running" forever
+            job.error = f"{type(e).__name__}: {e}"
+            job.state = "failed"
+            raise
+        finally:
+            job.finished_at = time.time()
+            self._trim()
+
+    def _trim(self):
+        # Oldest finished jobs go first; running and queued jobs are never dropped
+        with self._lock:
+            finished = [jid for jid, j in self.jobs.items() if j.finished]
+            for jid in finished[:max(0, len(finished) - self.keep)]:
+                del self.jobs[jid]
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"No job '{job_id}' (finished jobs are kept for the last {self.keep})")
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job.finished:
+            job._cancel.set()
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.finished_at = time.time()
+        return job
+
+    def status(self, job_id=None):
+        if job_id:
+            return self.get(job_id).status(detail=True)
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [j.status() for j in reversed(jobs)]
+
+    def shutdown(self):
+        for job in list(self.jobs.values()):
+            job._cancel.set()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,184 @@
+import argparse
+import importlib
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+from bench import print_table
+
+# --- CONFIGURATION ---
+APP_MODULE = 'Full'
+STANDIN_DB = 'sqlite:///loadtest.db'
+LEVELS = [1, 2, 4, 8, 16, 32]
+CALLS_PER_LEVEL = 400
+# A level whose throughput is below this share of the best so far is where
+# performance falls off
+FALLOFF = 0.9
+
+# ============================================================
+# CALLING THE API
+# ============================================================
+def load_app(module, db_url, persist):
+    # The app connects at import time, so the stand-in URL must be set first.
+    # The engine would load the model on the first predict; it is loaded here
+    # so no timed call pays for it. Returns (app, seconds the load took).
+    os.environ['HEARTGUARD_DB'] = db_url
+    app = importlib.import_module(module)
+    if not persist:
+        app.db = None
+    t0 = time.perf_counter()
+    app.engine.load(block=True)
+    return app, time.perf_counter() - t0
+
+def sample_input(rng, patient_id):
+    return {
+        "PatientID": patient_id,
+        "Age": rng.randint(25, 85), "Sex": rng.randint(0, 1), "CP": rng.randint(1, 4),
+        "Chol": rng.randint(150, 350), "BP": rng.randint(95, 190), "HR": rng.randint(90, 200)
+    }
+
+def run_calls(api, calls, tag, seed):
+    # Every call carries its own patient ID, so the database check can tell
+    # exactly which inserts are missing or repeated
+    rng = random.Random(seed)
+    latencies, errors, ok_ids = [], [], []
+    # One untimed call first (first-use imports, caches); anonymous, so it is
+    # not part of the insert check
+    try:
+        api.predict(sample_input(random.Random(-1), ''))
+    except Exception:
+        pass
+    start = time.time()
+    for i in range(calls):
+        pid = f"{tag}-{seed}-{i}"
+        t0 = time.perf_counter()
+        try:
+            res = api.predict(sample_input(rng, pid))
+            failed = "error" in res
+        except Exception as e:
+            res, failed = {"error": f"{type(e).__name__}: {e}"}, True
+        latencies.append(time.perf_counter() - t0)
+        if failed:
+            errors.append(res["error"])
+        else:
+            ok_ids.append(pid)
+    return {"start": start, "end": time.time(), "latencies": latencies, "errors": errors, "ok_ids": ok_ids}
+
+def run_threads(app, level, calls, tag, load_seconds):
+    api = app.Api()  # pywebview also shares one Api instance between its worker threads
+    results = [None] * level
+    def work(i):
+        results[i] = {**run_calls(api, calls // level, tag, i), "load_seconds": load_seconds}
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(level)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+_app = None
+_app_db = {}
+_load_seconds = None
+
+def _init_process(module, db_url, persist):
+    global _app, _load_seconds
+    _app, _load_seconds = load_app(module, db_url, persist)
+
+def _process_calls(args):
+    calls, tag, seed = args
+    return {**run_calls(_app.Api(), calls, tag, seed), "load_seconds": _load_seconds}
+
+def run_processes(pool, level, calls, tag):
+    return pool.map(_process_calls, [(calls // level, tag, i) for i in range(level)], chunksize=1)
+
+# ============================================================
+# MEASURING
+# ============================================================
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def check_inserts(db, tag, ok_ids):
+    counts = dict(db.query("SELECT patient_id, COUNT(*) FROM predictions WHERE patient_id LIKE %s GROUP BY patient_id",
+                           (tag + '-%',)))
+    lost = sum(1 for pid in ok_ids if pid not in counts)
+    duplicated = sum(n - 1 for n in counts.values() if n > 1)
+    # Rows written for calls that reported an error
+    orphaned = len(set(counts) - set(ok_ids))
+    return lost, duplicated, orphaned
+
+def summarize(results, db, tag, persist):
+    latencies = [x for r in results for x in r["latencies"]]
+    errors = [e for r in results for e in r["errors"]]
+    ok_ids = [pid for r in results for pid in r["ok_ids"]]
+    wall = max(r["end"] for r in results) - min(r["start"] for r in results)
+    lost = duplicated = orphaned = '-'
+    if persist and db is not None:
+        lost, duplicated, orphaned = check_inserts(db, tag, ok_ids)
+    return {
+        "calls": len(latencies),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        # Slowest model load, outside the timings
+        "load": max(r["load_seconds"] for r in results),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "lost": lost, "duplicated": duplicated, "orphaned": orphaned
+    }
+
+def run(module=APP_MODULE, db_url=STANDIN_DB, modes=('threads', 'processes'), persist_options=(True, False),
+        levels=LEVELS, calls=CALLS_PER_LEVEL):
+    os.environ['HEARTGUARD_DB'] = db_url
+    from db import connect
+    checker = connect(db_url)
+    report = []
+    for mode in modes:
+        for persist in persist_options:
+            rows, best, falloff = [], 0.0, None
+            if mode == 'threads':
+                # One import per run; the connection is put back for persistent passes
+                app, load_seconds = load_app(module, db_url, True)
+                _app_db.setdefault(module, app.db)
+                app.db = _app_db[module] if persist else None
+            for level in levels:
+                tag = f"lt-{uuid.uuid4().hex[:8]}"
+                if mode == 'threads':
+                    results = run_threads(app, level, calls, tag, load_seconds)
+                else:
+                    ctx = multiprocessing.get_context('spawn')
+                    with ctx.Pool(level, _init_process, (module, db_url, persist)) as pool:
+                        results = run_processes(pool, level, calls, tag)
+                s = summarize(results, checker, tag, persist)
+                if falloff is None and best and s["throughput"] < FALLOFF * best:
+                    falloff = level
+                best = max(best, s["throughput"])
+                rows.append([level, s["calls"], f"{s['load']:.2f}", f"{s['throughput']:,.0f}", f"{s['p50']:.2f}",
+                             f"{s['p99']:.2f}", s["errors"], s["lost"], s["duplicated"], s["orphaned"]])
+                report.append({"mode": mode, "persist": persist, "level": level, **s})
+                if s["first_error"]:
+                    print(f"   [{mode} x{level}] first error: {s['first_error']}")
+            print_table(f"{mode}, persistence {'on' if persist else 'off'}",
+                        ["workers", "calls", "load s", "calls/s", "p50 ms", "p99 ms", "errors", "lost", "dup",
+                         "orphaned"], rows)
+            print(f"Performance falls off at {falloff} workers" if falloff
+                  else "No fall-off within the tested levels")
+    checker.close()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive Api.predict from many threads or processes at once.")
+    parser.add_argument('--module', default=APP_MODULE, help="App module whose Api class is tested")
+    parser.add_argument('--db', default=STANDIN_DB, help="Database the app writes to during the test")
+    parser.add_argument('--modes', nargs='+', choices=['threads', 'processes'], default=['threads', 'processes'])
+    parser.add_argument('--persist', choices=['both', 'on', 'off'], default='both')
+    parser.add_argument('--levels', type=int, nargs='+', default=LEVELS)
+    parser.add_argument('--calls', type=int, default=CALLS_PER_LEVEL, help="Calls per concurrency level")
+    args = parser.parse_args(argv)
+    persist = {'both': (True, False), 'on': (True,), 'off': (False,)}[args.persist]
+    run(args.module, args.db, args.modes, persist, args.levels, args.calls)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import os
+import time
+import datetime
+import threading
+from collections import deque
+from persistence import read_model, sha256_file
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+POLL_SECONDS = 5.0
+# A candidate must score these sample patients before it goes live
+PROBE_ROWS = [[45, 1, 2, 239, 130, 150], [63, 0, 4, 300, 170, 110]]
+
+def file_version(path):
+    return sha256_file(path)[:12]
+
+def validate_model(mdl, features=FEATURES):
+    if not hasattr(mdl, 'predict_proba'):
+        raise ValueError("model has no predict_proba")
+    n_in = getattr(mdl, 'n_features_in_', len(features))
+    if n_in != len(features):
+        raise ValueError(f"model expects {n_in} features, app sends {len(features)}")
+    import pandas as pd
+    prob = mdl.predict_proba(pd.DataFrame(PROBE_ROWS, columns=features))
+    if prob.shape != (len(PROBE_ROWS), 2) or not ((prob >= 0) & (prob <= 1)).all():
+        raise ValueError("model returned invalid probabilities")
+
+# --- 1. VERSIONS ---
+class ModelVersion:
+    def __init__(self, model, path, version, load_seconds, stamp):
+        self.model = model
+        self.path = path
+        self.version = version
+        self.load_seconds = load_seconds
+        self.stamp = stamp
+        self.loaded_at = datetime.datetime.now()
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "load_seconds": round(self.load_seconds, 3)
+        }
+
+# --- 2. MANAGER ---
+class ModelManager:
+    # The active version is replaced as a whole, never mutated. A request that
+    # grabbed .model keeps scoring on that forest even if a swap happens mid-call.
+    def __init__(self, path, features=FEATURES, poll_seconds=POLL_SECONDS,
+                 loader=None, history=20):
+        self.path = path
+        self.features = features
+        self.poll_seconds = poll_seconds
+        self.loader = loader
+        self.history = deque(maxlen=history)
+        self._active = None
+        self._rejected_stamp = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def model(self):
+        active = self._active
+        return active.model if active else None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _record(self, event, version=None, error=None):
+        entry = {"event": event, "at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        if version:
+            entry.update(version.describe())
+        if error:
+            entry["error"] = error
+        self.history.append(entry)
+
+    def adopt(self, model, load_seconds=0.0):
+        # Register a model that was already loaded or trained at startup
+        if model is None:
+            return None
+        stamp = self._stamp()
+        version = file_version(self.path) if stamp else "in-memory"
+        new = ModelVersion(model, self.path, version, load_seconds, stamp)
+        with self._lock:
+            self._active = new
+            self._record("initial", new)
+        return new
+
+    def reload(self):
+        with self._lock:
+            stamp = self._stamp()
+            if stamp is None:
+                return None
+            t0 = time.perf_counter()
+            try:
+                version = file_version(self.path)
+                mdl = self.loader(self.path) if self.loader else read_model(self.path, self.features)
+                validate_model(mdl, self.features)
+            except Exception as e:
+                # Keep serving the old model, but don't retry the same file
+                self._rejected_stamp = stamp
+                self._record("rejected", error=str(e))
+                print(f"Model reload rejected: {e}")
+                return None
+            new = ModelVersion(mdl, self.path, version, time.perf_counter() - t0, stamp)
+            self._active = new
+            self._record("swapped", new)
+            print(f"Model {new.version} live (loaded in {new.load_seconds:.2f}s)")
+            return new
+
+    def check(self):
+        stamp = self._stamp()
+        if stamp is None:
+            return None
+        active = self._active
+        if active is not None and active.stamp == stamp:
+            return None
+        if self._rejected_stamp == stamp:
+            return None
+        # Wait for the file to stop changing before reading it
+        time.sleep(min(1.0, self.poll_seconds))
+        if self._stamp() != stamp:
+            return None
+        return self.reload()
+
+    # --- 3. WATCHER ---
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def info(self):
+        active = self._active
+        return {
+            "active": active.describe() if active else None,
+            "watching": self._thread is not None and not self._stop.is_set(),
+            "history": list(self.history)
+        }
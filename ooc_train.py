@@ -0,0 +1,222 @@
+import argparse
+import math
+import os
+import shutil
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+# Rows per chunk; a worker holds one chunk (plus the trees it grows) at a time
+CHUNK_ROWS = 200000
+WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Address space a spawned worker needs before its first chunk (numpy, pandas, sklearn)
+MIN_WORKER_MB = 768
+
+def _peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+def count_rows(path):
+    with open(path, 'rb') as f:
+        return max(0, sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1)
+
+def _memory_limit_mb():
+    try:
+        import resource
+        limit = resource.getrlimit(resource.RLIMIT_AS)[0]
+    except ImportError:
+        return None
+    return None if limit == resource.RLIM_INFINITY else limit // (1024 * 1024)
+
+def split_memory(memory_mb, workers):
+    # RLIMIT_AS is per process and a worker would inherit the driver's whole
+    # ceiling, so the budget is shared out: (workers, driver MB, MB per worker).
+    # Fewer workers run when their shares would be under MIN_WORKER_MB.
+    workers = max(1, min(workers, memory_mb // MIN_WORKER_MB - 1))
+    per_worker = memory_mb // (workers + 1)
+    return workers, memory_mb - per_worker * workers, per_worker
+
+def split_trees(n_estimators, n_chunks):
+    # As even as possible: 100 trees over 3 chunks -> 34, 33, 33
+    return [n_estimators // n_chunks + (1 if i < n_estimators % n_chunks else 0) for i in range(n_chunks)]
+
+# ============================================================
+# WORKER PROCESS
+# ============================================================
+def _init_worker(memory_mb):
+    if memory_mb:
+        from train_runner import set_memory_limit
+        try:
+            set_memory_limit(memory_mb)
+        except (ImportError, ValueError, OSError):
+            pass  # the driver could set its own, so this is not expected
+
+def _fit_chunk(path, trees, max_depth, seed):
+    # Fits one sub-forest on one spilled chunk; the chunk file is removed after
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    with np.load(path) as data:
+        X = pd.DataFrame(data['X'], columns=FEATURES)
+        y = data['y']
+    os.remove(path)
+    if len(np.unique(y)) < 2:
+        # A single-class forest would vote with the wrong number of columns
+        return None, len(y), _peak_rss_mb(), _memory_limit_mb()
+    mdl = RandomForestClassifier(n_estimators=trees, max_depth=max_depth, random_state=seed, n_jobs=1)
+    mdl.fit(X, y)
+    return mdl, len(y), _peak_rss_mb(), _memory_limit_mb()
+
+# ============================================================
+# MERGING
+# ============================================================
+def merge_forests(forests, max_depth=None, random_state=42):
+    # One RandomForestClassifier whose estimators_ are all the sub-forests' trees.
+    # predict_proba averages over every tree, exactly as a single fit would.
+    from sklearn.ensemble import RandomForestClassifier
+    forests = [f for f in forests if f is not None]
+    if not forests:
+        raise ValueError("No chunk had both classes; nothing to merge")
+    first = forests[0]
+    for f in forests[1:]:
+        if list(f.classes_) != list(first.classes_):
+            raise ValueError(f"Sub-forests disagree on classes: {list(f.classes_)} vs {list(first.classes_)}")
+    trees = [t for f in forests for t in f.estimators_]
+    merged = RandomForestClassifier(n_estimators=len(trees), max_depth=max_depth, random_state=random_state)
+    merged.estimators_ = trees
+    for attr in ('estimator_', 'classes_', 'n_classes_', 'n_outputs_', 'n_features_in_', 'feature_names_in_'):
+        if hasattr(first, attr):
+            setattr(merged, attr, getattr(first, attr))
+    return merged
+
+def merge_baselines(parts):
+    # Row-weighted average of per-chunk drift baselines
+    rows = sum(b["rows"] for b in parts)
+    out = {"rows": rows, "features": {}}
+    for name, spec in parts[0]["features"].items():
+        expected = [sum(b["features"][name]["expected"][i] * b["rows"] for b in parts) / max(1, rows)
+                    for i in range(len(spec["expected"]))]
+        out["features"][name] = {"edges": spec["edges"], "expected": [round(e, 6) for e in expected]}
+    return out
+
+# ============================================================
+# DRIVER
+# ============================================================
+def fit_out_of_core(data_file, layout='app', n_estimators=100, max_depth=12, chunk_rows=CHUNK_ROWS,
+                    workers=WORKERS, random_state=42, progress=None, log=print, memory_mb=None):
+    # Streams the file once: each chunk is spilled to a temporary .npz and
+    # handed to a worker process, which fits its share of the trees. At most
+    # `workers` chunks are in flight, so memory is bounded by chunk size.
+    # memory_mb caps the driver and its workers together.
+    from train_runner import iter_training_chunks
+    from drift import build_baseline
+
+    total_rows = count_rows(data_file)
+    if not total_rows:
+        raise ValueError(f"{data_file} has no data rows")
+    # Every chunk must grow at least one tree
+    chunk_rows = max(chunk_rows, math.ceil(total_rows / n_estimators))
+    n_chunks = math.ceil(total_rows / chunk_rows)
+    trees = split_trees(n_estimators, n_chunks)
+    worker_mb = None
+    if memory_mb:
+        workers, driver_mb, worker_mb = split_memory(memory_mb, workers)
+        try:
+            from train_runner import set_memory_limit
+            set_memory_limit(driver_mb)
+            log(f"Memory ceiling {memory_mb:,} MB: {driver_mb:,} MB for the driver, {worker_mb:,} MB per worker")
+        except (ImportError, ValueError, OSError) as e:
+            log(f"Memory ceiling not applied: {e}")
+            worker_mb = None
+    log(f"{total_rows:,} rows in {n_chunks} chunk(s) of up to {chunk_rows:,}; "
+        f"{n_estimators} trees on {workers} worker(s)")
+
+    spill = tempfile.mkdtemp(prefix='heartguard-ooc-')
+    forests, baselines, worker_rss, worker_limits = [], [], [], []
+    rows = skipped = trees_done = 0
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(worker_mb,)) as pool:
+            pending = {}
+
+            def collect():
+                nonlocal rows, skipped, trees_done
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = pending.pop(fut)
+                    mdl, n, rss, limit = fut.result()
+                    rows += n
+                    worker_rss.append(rss)
+                    worker_limits.append(limit)
+                    if mdl is None:
+                        skipped += 1
+                        log(f"Chunk {i + 1}: only one class in {n:,} rows, skipped")
+                    else:
+                        forests.append((i, mdl))
+                    trees_done += trees[i]
+                    if progress:
+                        progress(trees_done, n_estimators)
+
+            for i, (X, y) in enumerate(iter_training_chunks(data_file, layout, chunk_rows)):
+                if i >= n_chunks:
+                    # The row count was a newline count; quoted newlines can throw it off
+                    trees.append(1)
+                baselines.append(build_baseline(X.to_numpy(), FEATURES))
+                path = os.path.join(spill, f'chunk-{i:05d}.npz')
+                np.savez(path, X=X.to_numpy(dtype=np.float32), y=y.to_numpy(dtype=np.int8))
+                del X, y
+                while len(pending) >= workers:
+                    collect()
+                pending[pool.submit(_fit_chunk, path, trees[i], max_depth, random_state + i)] = i
+            while pending:
+                collect()
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
+    # Chunk order, not completion order, so the same file gives the same model
+    model = merge_forests([m for _, m in sorted(forests, key=lambda p: p[0])], max_depth, random_state)
+    stats = {
+        "rows": rows,
+        "chunks": len(baselines),
+        "skipped_chunks": skipped,
+        "chunk_rows": chunk_rows,
+        "trees": len(model.estimators_),
+        "seconds": round(time.perf_counter() - t0, 2),
+        "worker_peak_rss_mb": round(max(r for r in worker_rss if r is not None), 1) if any(worker_rss) else None,
+        "worker_memory_limit_mb": max(m for m in worker_limits if m is not None) if any(worker_limits) else None,
+        "driver_peak_rss_mb": round(_peak_rss_mb() or 0, 1) or None
+    }
+    return model, merge_baselines(baselines), stats
+
+def main(argv=None):
+    from train_runner import LAYOUTS
+    from persistence import save_model
+    parser = argparse.ArgumentParser(description="Train the forest chunk by chunk for data larger than RAM.")
+    parser.add_argument('--data', default='train.csv')
+    parser.add_argument('--model', default='heart_model.joblib')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='app')
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--depth', type=int, default=12)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--memory-mb', type=int, default=None, help="Address-space ceiling for the driver and workers together")
+    args = parser.parse_args(argv)
+    model, baseline, stats = fit_out_of_core(
+        args.data, args.layout, args.trees, args.depth, args.chunk_rows, args.workers,
+        progress=lambda done, total: print(f"   {done}/{total} trees"), memory_mb=args.memory_mb)
+    save_model(model, args.model, FEATURES, backend='forest', training_rows=stats["rows"],
+               training_file=os.path.basename(args.data), drift_baseline=baseline,
+               out_of_core={k: v for k, v in stats.items() if k != "rows"})
+    print(f"✅ {stats['trees']} trees from {stats['rows']:,} rows in {stats['seconds']}s "
+          f"(worker peak {stats['worker_peak_rss_mb']} MB) -> {args.model}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+import argparse
+import datetime
+import gzip
+import csv
+import os
+import threading
+from db import connect, INDEXES
+
+# ==============================
+# CONFIGURATION
+# ==============================
+TABLE = 'predictions'
+COLUMNS = ['id', 'age', 'sex', 'chest_pain', 'cholesterol', 'bp', 'max_hr', 'risk', 'status', 'created_at', 'patient_id']
+# Whole months kept besides the current one; older partitions are dropped
+RETENTION_MONTHS = int(os.environ.get('HEARTGUARD_RETENTION_MONTHS', 24))
+# Empty partitions kept ready ahead of the calendar
+MONTHS_AHEAD = 3
+# Set to archive partitions (Parquet, or gzip CSV without pyarrow) before they are dropped
+ARCHIVE_DIR = os.environ.get('HEARTGUARD_ARCHIVE_DIR') or None
+MAINTENANCE_SECONDS = 6 * 3600
+BATCH_ROWS = 10000
+CATCH_ALL = 'pmax'
+
+# The stand-in keeps one table per month behind a `predictions` view; an
+# INSTEAD OF trigger routes inserts, and ids come from one shared sequence.
+SQLITE_PARTITION = """CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    age INTEGER, sex INTEGER, chest_pain INTEGER,
+    cholesterol REAL, bp REAL, max_hr REAL,
+    risk REAL, status TEXT,
+    created_at TEXT NOT NULL,
+    patient_id TEXT
+)"""
+SQLITE_IDS = "CREATE TABLE IF NOT EXISTS prediction_ids (id INTEGER PRIMARY KEY AUTOINCREMENT)"
+
+# ==============================
+# MONTHS
+# ==============================
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+def add_months(month, n):
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return datetime.date(y, m + 1, 1)
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+def partition_month(name):
+    # None for the catch-all
+    return None if name == CATCH_ALL else datetime.date(int(name[1:5]), int(name[5:7]), 1)
+
+def upper_bound(name):
+    # Rows in a partition are older than the start of the following month
+    month = partition_month(name)
+    return add_months(month, 1) if month else None
+
+# ==============================
+# INSPECTION
+# ==============================
+def is_partitioned(db):
+    if db.dialect == 'sqlite':
+        return bool(db.query("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = %s", (TABLE,)))
+    rows = db.query("""SELECT COUNT(PARTITION_NAME) FROM information_schema.PARTITIONS
+                       WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s""", (TABLE,))
+    return bool(rows and rows[0][0])
+
+def list_partitions(db):
+    # Names in range order, catch-all last
+    if db.dialect == 'sqlite':
+        tables = [r[0] for r in db.query("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE %s",
+                                         (TABLE + '_p%',))]
+        names = [t[len(TABLE) + 1:] for t in tables]
+    else:
+        names = [r[0] for r in db.query("""SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+                                           WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                                           AND PARTITION_NAME IS NOT NULL
+                                           ORDER BY PARTITION_ORDINAL_POSITION""", (TABLE,))]
+    return sorted(names, key=lambda n: (n == CATCH_ALL, n))
+
+def partition_source(db, name):
+    # FROM clause that reads exactly one partition
+    return f"{TABLE}_{name}" if db.dialect == 'sqlite' else f"{TABLE} PARTITION ({name})"
+
+def partition_stats(db, name):
+    rows, first_id, last_id = db.query(f"SELECT COUNT(*), MIN(id), MAX(id) FROM {partition_source(db, name)}")[0]
+    return {"name": name, "month": str(partition_month(name) or ''), "rows": rows,
+            "first_id": first_id, "last_id": last_id}
+
+# ==============================
+# SQLITE STAND-IN
+# ==============================
+def _sqlite_create(db, name):
+    table = f"{TABLE}_{name}"
+    db.execute(SQLITE_PARTITION.format(table=table), commit=False)
+    for on, index, cols in INDEXES:
+        if on == TABLE:
+            db.execute(f"CREATE INDEX IF NOT EXISTS {index}_{name} ON {table} ({cols})", commit=False)
+
+def _sqlite_route(db, names):
+    # View + trigger over the current partition set, with MySQL RANGE semantics:
+    # the first partition also takes anything older, the catch-all anything newer
+    db.execute(f"DROP VIEW IF EXISTS {TABLE}", commit=False)
+    cols = ', '.join(COLUMNS)
+    db.execute(f"CREATE VIEW {TABLE} AS " + " UNION ALL ".join(
+        f"SELECT {cols} FROM {TABLE}_{n}" for n in names), commit=False)
+    values = ', '.join(['last_insert_rowid()'] + [f"NEW.{c}" for c in COLUMNS[1:]])
+    routes, lower = [], None
+    for n in names:
+        upper = upper_bound(n)
+        cond = [f"NEW.created_at >= '{lower}'" if lower else None, f"NEW.created_at < '{upper}'" if upper else None]
+        where = " AND ".join(c for c in cond if c) or "1"
+        routes.append(f"INSERT INTO {TABLE}_{n} ({cols}) SELECT {values} WHERE {where};")
+        lower = upper
+    db.execute(f"""CREATE TRIGGER {TABLE}_insert INSTEAD OF INSERT ON {TABLE}
+                   BEGIN
+                       INSERT INTO prediction_ids (id) VALUES (NEW.id);
+                       {' '.join(routes)}
+                       DELETE FROM prediction_ids;
+                   END""", commit=False)
+
+def _sqlite_migrate(db, months):
+    with db.transaction():
+        db.execute("BEGIN", commit=False)
+        legacy = f"{TABLE}_unpartitioned"
+        db.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}", commit=False)
+        db.execute(SQLITE_IDS, commit=False)
+        names = [partition_name(m) for m in months] + [CATCH_ALL]
+        cols, lower = ', '.join(COLUMNS), None
+        for n in names:
+            _sqlite_create(db, n)
+            upper = upper_bound(n)
+            cond = [f"created_at >= '{lower}'" if lower else None, f"created_at < '{upper}'" if upper else None]
+            db.execute(f"INSERT INTO {TABLE}_{n} ({cols}) SELECT {cols} FROM {legacy} WHERE "
+                       + (" AND ".join(c for c in cond if c) or "1"), commit=False)
+            lower = upper
+        # Continue the id sequence where the old table stopped
+        last = db.query(f"SELECT MAX(id) FROM {legacy}")[0][0]
+        if last:
+            db.execute("INSERT INTO prediction_ids (id) VALUES (%s)", (last,), commit=False)
+            db.execute("DELETE FROM prediction_ids", commit=False)
+        db.execute(f"DROP TABLE {legacy}", commit=False)
+        _sqlite_route(db, names)
+
+def _sqlite_add(db, months):
+    with db.transaction():
+        db.execute("BEGIN", commit=False)
+        existing = list_partitions(db)
+        # New months are carved off the front of the catch-all
+        for m in months:
+            n = partition_name(m)
+            _sqlite_create(db, n)
+            src = f"{TABLE}_{CATCH_ALL}"
+            db.execute(f"INSERT INTO {TABLE}_{n} SELECT * FROM {src} WHERE created_at < %s",
+                       (str(upper_bound(n)),), commit=False)
+            db.execute(f"DELETE FROM {src} WHERE created_at < %s", (str(upper_bound(n)),), commit=False)
+        _sqlite_route(db, sorted(set(existing) | {partition_name(m) for m in months},
+                                 key=lambda n: (n == CATCH_ALL, n)))
+
+def _sqlite_drop(db, name):
+    with db.transaction():
+        db.execute("BEGIN", commit=False)
+        rest = [n for n in list_partitions(db) if n != name]
+        db.execute(f"DROP TABLE {TABLE}_{name}", commit=False)
+        _sqlite_route(db, rest)
+
+# ==============================
+# MYSQL
+# ==============================
+def _mysql_ranges(months):
+    return ", ".join(f"PARTITION {partition_name(m)} VALUES LESS THAN (TO_DAYS('{add_months(m, 1)}'))"
+                     for m in months)
+
+def _mysql_migrate(db, months):
+    # One table rebuild. The partition key has to be part of every unique key,
+    # so the primary key becomes (id, created_at); ids stay unique via AUTO_INCREMENT.
+    db.execute(f"""ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)
+                   PARTITION BY RANGE (TO_DAYS(created_at)) (
+                       {_mysql_ranges(months)},
+                       PARTITION {CATCH_ALL} VALUES LESS THAN MAXVALUE)""")
+
+def _mysql_add(db, months):
+    # Splitting the (normally empty) catch-all is a metadata change
+    db.execute(f"""ALTER TABLE {TABLE} REORGANIZE PARTITION {CATCH_ALL} INTO (
+                       {_mysql_ranges(months)},
+                       PARTITION {CATCH_ALL} VALUES LESS THAN MAXVALUE)""")
+
+def _mysql_drop(db, name):
+    db.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+
+# ==============================
+# MIGRATION AND UPKEEP
+# ==============================
+def ensure_partitions(db, ahead=MONTHS_AHEAD, now=None):
+    # Migrates an unpartitioned table (once), then keeps `ahead` future months
+    # ready. Returns the names of partitions created.
+    current = month_start(now or datetime.datetime.now())
+    last = add_months(current, ahead)
+    if not is_partitioned(db):
+        oldest = db.query(f"SELECT MIN(created_at) FROM {TABLE}")[0][0]
+        first = min(month_start(_as_datetime(oldest)), current) if oldest else current
+        months = [add_months(first, i) for i in range((last.year - first.year) * 12 + last.month - first.month + 1)]
+        print(f"Partitioning {TABLE} by month ({partition_name(months[0])}..{partition_name(months[-1])})")
+        (_sqlite_migrate if db.dialect == 'sqlite' else _mysql_migrate)(db, months)
+        db.partitioned = True
+        return [partition_name(m) for m in months] + [CATCH_ALL]
+    have = {partition_month(n) for n in list_partitions(db)} - {None}
+    newest = max(have) if have else add_months(current, -1)
+    months = []
+    m = add_months(newest, 1)
+    while m <= last:
+        months.append(m)
+        m = add_months(m, 1)
+    if months:
+        (_sqlite_add if db.dialect == 'sqlite' else _mysql_add)(db, months)
+    return [partition_name(m) for m in months]
+
+def drop_partition(db, name):
+    if name == CATCH_ALL:
+        raise ValueError("The catch-all partition is never dropped")
+    (_sqlite_drop if db.dialect == 'sqlite' else _mysql_drop)(db, name)
+
+def _as_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+def _rolled_up(db, last_id):
+    # The dashboard rollups must have folded a partition in before it goes
+    try:
+        mark = db.query("SELECT last_id FROM rollup_watermark WHERE name = %s", ('daily',))
+    except Exception:
+        return True  # rollups not in use
+    if mark and mark[0][0] >= last_id:
+        return True
+    from rollups import refresh
+    refresh(db)
+    return db.query("SELECT last_id FROM rollup_watermark WHERE name = %s", ('daily',))[0][0] >= last_id
+
+# ==============================
+# COMPACTION
+# ==============================
+def archive_partition(db, name, archive_dir):
+    # Writes every row of the partition to a compressed file and checks the
+    # count before anything is dropped. Parquet (zstd) when pyarrow is
+    # installed, in the export_history layout; gzip CSV otherwise.
+    stats = partition_stats(db, name)
+    query = f"SELECT {', '.join(COLUMNS)} FROM {partition_source(db, name)} ORDER BY id"
+    # stream() holds the connection's lock until the last row, and the app's
+    # inserts and history reads share `db`: read on a connection of our own
+    reader = connect(db.url) if db.url else db
+    try:
+        files = _write_archive(reader, name, query, archive_dir, stats)
+    finally:
+        if reader is not db:
+            reader.close()
+    return {**stats, "files": files}
+
+def _write_archive(db, name, query, archive_dir, stats):
+    written = 0
+    try:
+        from export_history import PartitionedWriter
+        import pyarrow  # noqa: F401
+    except ImportError:
+        PartitionedWriter = None
+    if PartitionedWriter is not None:
+        writer = PartitionedWriter(os.path.join(archive_dir, TABLE), stats["first_id"] or 0)
+        try:
+            for rows in db.stream(query, batch=BATCH_ROWS):
+                writer.write(rows)
+                written += len(rows)
+            files = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+    else:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{TABLE}-{name}.csv.gz")
+        with gzip.open(path + '.tmp', 'wt', newline='') as f:
+            out = csv.writer(f)
+            out.writerow(COLUMNS)
+            for rows in db.stream(query, batch=BATCH_ROWS):
+                out.writerows(rows)
+                written += len(rows)
+        os.replace(path + '.tmp', path)
+        files = [path]
+    if written != stats["rows"]:
+        raise RuntimeError(f"Archive of {name} has {written} rows, partition has {stats['rows']}")
+    return files
+
+def apply_retention(db, keep_months=RETENTION_MONTHS, archive_dir=ARCHIVE_DIR, now=None):
+    # Drops whole partitions older than the retention window. No row-wise DELETE.
+    cutoff = add_months(month_start(now or datetime.datetime.now()), -keep_months)
+    dropped = []
+    for name in list_partitions(db):
+        upper = upper_bound(name)
+        if upper is None or upper > cutoff:
+            continue
+        stats = partition_stats(db, name)
+        if stats["rows"] and not _rolled_up(db, stats["last_id"]):
+            print(f"Keeping {name}: not yet in the dashboard rollups")
+            continue
+        if archive_dir and stats["rows"]:
+            stats = archive_partition(db, name, archive_dir)
+        drop_partition(db, name)
+        print(f"Dropped partition {name} ({stats['rows']:,} rows)" + (" after archiving" if stats.get("files") else ""))
+        dropped.append(stats)
+    return dropped
+
+class MaintenanceJob:
+    # Background upkeep: future partitions, retention and optional compaction.
+    # Does nothing until the table has been partitioned (python partitions.py migrate).
+    def __init__(self, db, interval=MAINTENANCE_SECONDS, keep_months=RETENTION_MONTHS, archive_dir=ARCHIVE_DIR):
+        self.db = db
+        self.interval = interval
+        self.keep_months = keep_months
+        self.archive_dir = archive_dir
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        if not is_partitioned(self.db):
+            return None
+        return {"created": ensure_partitions(self.db),
+                "dropped": apply_retention(self.db, self.keep_months, self.archive_dir)}
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print("Partition maintenance error:", e)
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="partitions", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monthly partitions for the predictions table.")
+    parser.add_argument('action', choices=['migrate', 'status', 'retain'])
+    parser.add_argument('--db', default=None, help="Database URL (default: HEARTGUARD_DB or MySQL)")
+    parser.add_argument('--keep-months', type=int, default=RETENTION_MONTHS)
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Archive partitions here before dropping them")
+    args = parser.parse_args(argv)
+    db = connect(args.db)
+    try:
+        if args.action == 'migrate':
+            created = ensure_partitions(db)
+            print(f"{len(created)} partition(s) created" if created else "Already partitioned and up to date")
+        elif args.action == 'retain':
+            if not is_partitioned(db):
+                raise SystemExit("Not partitioned yet; run `python partitions.py migrate` first")
+            ensure_partitions(db)
+            dropped = apply_retention(db, args.keep_months, args.archive)
+            print(f"{len(dropped)} partition(s) dropped")
+        if not is_partitioned(db):
+            print(f"{TABLE} is not partitioned")
+        else:
+            for name in list_partitions(db):
+                s = partition_stats(db, name)
+                print(f"   {name:>8}  {s['rows']:>10,} rows  ids {s['first_id']}-{s['last_id']}")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
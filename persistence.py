@@ -0,0 +1,208 @@
+import joblib
+import os
+import json
+import hashlib
+import stat
+import tempfile
+import datetime
+
+# --- CONFIGURATION ---
+META_SUFFIX = '.meta.json'
+FORMAT_VERSION = 1
+
+# Read once at import: os.umask can only be read by setting it, which would
+# race with files other threads are creating
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+class CorruptModelError(Exception):
+    pass
+
+def meta_path(path):
+    return path + META_SUFFIX
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _fsync_dir(directory):
+    # Makes the rename itself durable; not supported on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _file_mode(path):
+    # mkstemp creates 0600 files and the rename keeps that: use the mode of
+    # the file being replaced, else what open() would give under the umask,
+    # so other accounts (or a daemon run as another user) can still load it
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        os.chmod(tmp, _file_mode(path))
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def _commit(tmp, path):
+    os.replace(tmp, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+# --- 1. SAVE ---
+def _build_meta(file, mdl, features, created_at, extra):
+    meta = {
+        "format": FORMAT_VERSION,
+        "sha256": sha256_file(file),
+        "size": os.path.getsize(file),
+        # os.replace keeps it, so it still matches once the temp file is renamed
+        "mtime_ns": os.stat(file).st_mtime_ns,
+        "created_at": created_at.isoformat(timespec='seconds'),
+        "model_class": type(mdl).__name__,
+        "features": list(features) if features is not None else None,
+        "n_estimators": getattr(mdl, 'n_estimators', None)
+    }
+    try:
+        import sklearn
+        meta["sklearn_version"] = sklearn.__version__
+    except ImportError:
+        pass
+    meta.update(extra)
+    return meta
+
+def _meta_tmp(path, meta):
+    payload = json.dumps(meta, indent=2).encode()
+    return _atomic_write(meta_path(path), lambda f: f.write(payload))
+
+def _write_meta(path, meta):
+    _commit(_meta_tmp(path, meta), meta_path(path))
+
+def save_model(mdl, path, features=None, **extra):
+    # Temp file + fsync + rename, so a crash leaves either the old or the new
+    # artifact on disk, never a truncated one. The model is committed first;
+    # a crash before its sidecar follows leaves the old sidecar, which no
+    # longer describes the file and is read as missing (see read_meta).
+    tmp_model = _atomic_write(path, lambda f: joblib.dump(mdl, f))
+    try:
+        meta = _build_meta(tmp_model, mdl, features, datetime.datetime.now(), extra)
+        tmp_meta = _meta_tmp(path, meta)
+    except BaseException:
+        os.remove(tmp_model)
+        raise
+    _commit(tmp_model, path)
+    _commit(tmp_meta, meta_path(path))
+    return meta
+
+def save_meta(path, mdl, features=None, **extra):
+    # Sidecar for an artifact that is already in place
+    created_at = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+    meta = _build_meta(path, mdl, features, created_at, extra)
+    _write_meta(path, meta)
+    return meta
+
+def update_meta(path, **fields):
+    # Adds fields to an existing sidecar; the checksum still describes the same artifact
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(meta_path(path))
+    meta.update(fields)
+    _write_meta(path, meta)
+    return meta
+
+# --- 2. LOAD ---
+def _describes(path, meta):
+    # Size and mtime are enough unless the file was touched or copied; then
+    # the checksum decides, and a match is written back so it isn't hashed again
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != meta.get("size"):
+        return False
+    if meta.get("mtime_ns") in (None, st.st_mtime_ns):
+        return True
+    if sha256_file(path) != meta.get("sha256"):
+        return False
+    try:
+        _write_meta(path, {**meta, "mtime_ns": st.st_mtime_ns})
+    except OSError:
+        pass
+    return True
+
+def read_meta(path):
+    # The sidecar, or None when the metadata is unknown: no sidecar, an
+    # unreadable one, or one left over from the artifact this file replaced
+    try:
+        with open(meta_path(path)) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"⚠️ Ignoring unreadable metadata for '{path}': {e}")
+        return None
+    return meta if isinstance(meta, dict) and _describes(path, meta) else None
+
+def read_model(path, features=None):
+    # Raises CorruptModelError if the artifact fails any check
+    meta = read_meta(path)
+    if meta is not None:
+        if sha256_file(path) != meta.get("sha256"):
+            raise CorruptModelError("checksum mismatch")
+        if features is not None and meta.get("features") not in (None, list(features)):
+            raise CorruptModelError(f"trained on {meta.get('features')}, app uses {list(features)}")
+    try:
+        mdl = joblib.load(path)
+    except Exception as e:
+        raise CorruptModelError(f"cannot unpickle: {e}")
+    if not hasattr(mdl, 'predict_proba'):
+        raise CorruptModelError(f"{type(mdl).__name__} has no predict_proba")
+    if features is not None and getattr(mdl, 'n_features_in_', len(features)) != len(features):
+        raise CorruptModelError(f"expects {mdl.n_features_in_} features, app uses {len(features)}")
+    return mdl
+
+def quarantine(path, reason):
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    target = f"{path}.corrupt-{stamp}"
+    os.replace(path, target)
+    if os.path.exists(meta_path(path)):
+        os.replace(meta_path(path), meta_path(target))
+    print(f"⚠️ Model artifact '{path}' quarantined to '{target}': {reason}")
+    return target
+
+def load_model(path, features=None):
+    # Returns the model, or None when there is nothing usable on disk.
+    # A bad artifact is moved aside so the next start doesn't trip on it again.
+    if not os.path.exists(path):
+        return None
+    try:
+        mdl = read_model(path, features)
+    except CorruptModelError as e:
+        quarantine(path, e)
+        return None
+    if read_meta(path) is None:
+        # Artifact from before sidecars existed, or saved by a run that died
+        # before its sidecar was committed: record its checksum now
+        try:
+            save_meta(path, mdl, features)
+        except OSError:
+            pass
+    return mdl
@@ -0,0 +1,262 @@
+import argparse
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from io import StringIO
+
+# --- CONFIGURATION ---
+PROFILE_DIR = 'profiles'
+DEFAULT_SECONDS = 30
+MAX_SECONDS = 600
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 25
+TRACE_FRAMES = 10
+# Api methods wrapped while a predict capture is running
+PROFILED_METHODS = ('predict', 'score_batch', 'score_bands')
+SAMPLE_VITALS = [45, 1, 2, 239.0, 130.0, 150.0]
+
+# ============================================================
+# ARTIFACTS
+# ============================================================
+# Every capture directory holds cpu.prof (pstats, open with snakeviz or
+# `python -m pstats`), alloc.snapshot (tracemalloc) and summary.txt/.json.
+def new_capture_dir(target, root=PROFILE_DIR):
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(root, f"{stamp}-{target}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _start_tracing():
+    # Returns True when this call turned tracemalloc on (and so must turn it off)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        return False
+    tracemalloc.start(TRACE_FRAMES)
+    return True
+
+def _stop_tracing(out_dir, owned):
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    if owned:
+        tracemalloc.stop()
+    snapshot.dump(os.path.join(out_dir, 'alloc.snapshot'))
+    with open(os.path.join(out_dir, 'alloc_peak.txt'), 'w') as f:
+        f.write(str(peak))
+
+@contextmanager
+def capture(out_dir):
+    # Profiles the calling thread and traces allocations until the block ends.
+    # Used in the child processes (training, cold start).
+    owned = _start_tracing()
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        prof.dump_stats(os.path.join(out_dir, 'cpu.prof'))
+        _stop_tracing(out_dir, owned)
+
+def summarize(out_dir, target, seconds=None, calls=None):
+    summary = {
+        "target": target,
+        "dir": os.path.abspath(out_dir),
+        "seconds": round(seconds, 2) if seconds is not None else None,
+        "calls": calls,
+        "functions": [],
+        "allocations": [],
+        "alloc_peak_kb": None
+    }
+    text = [f"HeartGuard profile: {target} ({out_dir})"]
+    cpu = os.path.join(out_dir, 'cpu.prof')
+    if os.path.exists(cpu):
+        stats = pstats.Stats(cpu, stream=StringIO())
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:TOP_FUNCTIONS]
+        for (file, line, name), (cc, nc, tt, ct, _) in rows:
+            summary["functions"].append({
+                "function": f"{os.path.basename(file)}:{line}({name})" if line else name,
+                "calls": nc, "own_ms": round(tt * 1000, 2), "cumulative_ms": round(ct * 1000, 2)
+            })
+        text.append(f"\nTop {len(rows)} functions by cumulative time")
+        text.append(f"{'cumulative ms':>14} {'own ms':>10} {'calls':>9}  function")
+        text += [f"{f['cumulative_ms']:>14,.1f} {f['own_ms']:>10,.1f} {f['calls']:>9,}  {f['function']}"
+                 for f in summary["functions"]]
+    alloc = os.path.join(out_dir, 'alloc.snapshot')
+    if os.path.exists(alloc):
+        snapshot = tracemalloc.Snapshot.load(alloc).filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ])
+        for st in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+            frame = st.traceback[0]
+            summary["allocations"].append({
+                "site": f"{frame.filename}:{frame.lineno}", "kb": round(st.size / 1024, 1), "blocks": st.count
+            })
+        text.append(f"\nTop {len(summary['allocations'])} allocation sites (memory still held at the end)")
+        text.append(f"{'KB':>10} {'blocks':>9}  site")
+        text += [f"{a['kb']:>10,.1f} {a['blocks']:>9,}  {a['site']}" for a in summary["allocations"]]
+    peak = os.path.join(out_dir, 'alloc_peak.txt')
+    if os.path.exists(peak):
+        with open(peak) as f:
+            summary["alloc_peak_kb"] = round(int(f.read()) / 1024, 1)
+        text.append(f"\nPeak traced memory: {summary['alloc_peak_kb']:,.1f} KB")
+    with open(os.path.join(out_dir, 'summary.txt'), 'w') as f:
+        f.write("\n".join(text) + "\n")
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+# ============================================================
+# ON-DEMAND PROFILER
+# ============================================================
+class Profiler:
+    # One capture at a time. Targets:
+    #   predict  - Api.predict/score_batch/score_bands for `seconds`, in this process
+    #   startup  - a cold engine load + first prediction in a fresh interpreter
+    #   training - one full training run, profiled inside the training process
+    # Nothing is hooked while idle: the predict capture swaps wrappers onto
+    # the Api instance and removes them again when it stops.
+    TARGETS = ('predict', 'startup', 'training')
+
+    def __init__(self, engine, root=PROFILE_DIR):
+        self.engine = engine
+        self.root = root
+        self.active = False
+        self.last = None
+        self._state = None
+        self._lock = threading.Lock()
+        self._call_lock = threading.Lock()
+
+    def start(self, seconds=DEFAULT_SECONDS, target='predict', api=None):
+        if target not in self.TARGETS:
+            raise ValueError(f"Unknown profile target '{target}'. Choose from: {', '.join(self.TARGETS)}")
+        if target == 'predict' and api is None:
+            raise ValueError("A predict profile needs the Api instance to hook")
+        seconds = max(1.0, min(float(seconds), MAX_SECONDS))
+        with self._lock:
+            if self.active:
+                raise RuntimeError(f"A {self._state['target']} profile is already running")
+            if target == 'training' and self.engine.training:
+                raise RuntimeError("A training run is already in progress; profile the next one")
+            out_dir = new_capture_dir(target, self.root)
+            self._state = {"target": target, "dir": out_dir, "seconds": seconds, "started": time.time(), "calls": 0}
+            self.active = True
+        if target == 'predict':
+            self._start_predict(api, seconds)
+        else:
+            threading.Thread(target=self._run_child, args=(target, out_dir, seconds),
+                             name="profile", daemon=True).start()
+        return self.status()
+
+    # --- predict: in-process window ---
+    def _start_predict(self, api, seconds):
+        state = self._state
+        state["api"] = api
+        state["owned_tracing"] = _start_tracing()
+        state["profile"] = cProfile.Profile()
+        for name in PROFILED_METHODS:
+            method = getattr(api, name, None)
+            if method is not None:
+                setattr(api, name, self._wrap(method))
+        state["timer"] = threading.Timer(seconds, self.stop)
+        state["timer"].daemon = True
+        state["timer"].start()
+
+    def _wrap(self, method):
+        state = self._state
+        def profiled(*args, **kwargs):
+            # cProfile keeps one call stack, so captured calls run one at a time
+            with self._call_lock:
+                state["calls"] += 1
+                return state["profile"].runcall(method, *args, **kwargs)
+        return profiled
+
+    def stop(self):
+        with self._lock:
+            state = self._state
+            if not self.active or state["target"] != 'predict':
+                # Child captures end with their process
+                return self.status()
+            state["timer"].cancel()
+            api = state.pop("api")
+            for name in PROFILED_METHODS:
+                api.__dict__.pop(name, None)
+            with self._call_lock:
+                state["profile"].dump_stats(os.path.join(state["dir"], 'cpu.prof'))
+            _stop_tracing(state["dir"], state.pop("owned_tracing"))
+            self._finish(state, None)
+        return self.status()
+
+    # --- startup and training: child process ---
+    def _run_child(self, target, out_dir, seconds):
+        error = None
+        try:
+            if target == 'startup':
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--startup', out_dir],
+                                      capture_output=True, text=True, timeout=seconds, cwd=os.getcwd())
+                if proc.returncode != 0:
+                    error = (proc.stderr.strip().splitlines() or ["Cold start failed"])[-1]
+            else:
+                runner = self.engine.start_training(profile_dir=out_dir)
+                runner.wait()
+                if runner.state != "done":
+                    error = runner.error
+        except subprocess.TimeoutExpired:
+            error = f"Cold start took longer than {seconds:.0f} s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._finish(self._state, error)
+
+    def _finish(self, state, error):
+        elapsed = time.time() - state["started"]
+        try:
+            self.last = summarize(state["dir"], state["target"], elapsed, state["calls"] or None)
+        except Exception as e:
+            self.last = {"target": state["target"], "dir": os.path.abspath(state["dir"])}
+            error = error or f"Summary failed: {type(e).__name__}: {e}"
+        self.last["error"] = error
+        self.active = False
+        self._state = None
+        print(f"Profile written to {self.last['dir']}" + (f" ({error})" if error else ""))
+
+    def status(self):
+        state = self._state
+        if self.active and state:
+            return {
+                "state": "running",
+                "target": state["target"],
+                "dir": os.path.abspath(state["dir"]),
+                "elapsed": round(time.time() - state["started"], 1),
+                "seconds": state["seconds"],
+                "calls": state["calls"]
+            }
+        return {"state": "idle", "last": self.last}
+
+# ============================================================
+# COLD-START PROBE
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile a cold engine load and first prediction.")
+    parser.add_argument('--startup', metavar='DIR', help="Capture directory (default: a new one under profiles/)")
+    args = parser.parse_args(argv)
+    out_dir = args.startup or new_capture_dir('startup')
+    with capture(out_dir):
+        from engine import Engine
+        Engine().load(block=True).predict(SAMPLE_VITALS)
+    if not args.startup:
+        summarize(out_dir, 'startup')
+        with open(os.path.join(out_dir, 'summary.txt')) as f:
+            print(f.read())
+
+if __name__ == '__main__':
+    main()
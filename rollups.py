@@ -0,0 +1,210 @@
+import datetime
+import threading
+import time
+
+# ==============================
+# CONFIGURATION
+# ==============================
+REFRESH_SECONDS = 60
+BATCH_ROWS = 5000
+# A batch stops at the first row younger than this, so an insert that is
+# still committing cannot slip in behind the watermark
+SETTLE_SECONDS = 2
+
+AGE_BANDS = [(0, '<30'), (30, '30-39'), (40, '40-49'), (50, '50-59'), (60, '60-69'), (70, '70+')]
+STATUSES = ["HIGH RISK", "MEDIUM RISK", "HEALTHY"]
+
+SCHEMA = {
+    'mysql': [
+        """CREATE TABLE IF NOT EXISTS prediction_rollup_daily (
+            day DATE NOT NULL,
+            age_band VARCHAR(8) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            risk_bucket TINYINT NOT NULL,
+            n INT NOT NULL,
+            sum_risk DOUBLE NOT NULL, sum_bp DOUBLE NOT NULL,
+            sum_chol DOUBLE NOT NULL, sum_hr DOUBLE NOT NULL,
+            PRIMARY KEY (day, age_band, status, risk_bucket)
+        )""",
+        """CREATE TABLE IF NOT EXISTS rollup_watermark (
+            name VARCHAR(40) PRIMARY KEY,
+            last_id BIGINT NOT NULL,
+            updated_at DATETIME
+        )"""
+    ],
+    'sqlite': [
+        """CREATE TABLE IF NOT EXISTS prediction_rollup_daily (
+            day TEXT NOT NULL,
+            age_band TEXT NOT NULL,
+            status TEXT NOT NULL,
+            risk_bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            sum_risk REAL NOT NULL, sum_bp REAL NOT NULL,
+            sum_chol REAL NOT NULL, sum_hr REAL NOT NULL,
+            PRIMARY KEY (day, age_band, status, risk_bucket)
+        )""",
+        """CREATE TABLE IF NOT EXISTS rollup_watermark (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TEXT
+        )"""
+    ]
+}
+
+KEYS = ['day', 'age_band', 'status', 'risk_bucket']
+SUMS = ['n', 'sum_risk', 'sum_bp', 'sum_chol', 'sum_hr']
+
+def age_band(age):
+    label = AGE_BANDS[0][1]
+    for lower, name in AGE_BANDS:
+        if age >= lower:
+            label = name
+    return label
+
+def risk_bucket(risk):
+    return max(0, min(9, int(risk // 10)))
+
+def as_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    return datetime.datetime.fromisoformat(str(value))
+
+def as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+# ==============================
+# INCREMENTAL REFRESH
+# ==============================
+def ensure_rollups(db):
+    db.ensure_schema(SCHEMA[db.dialect])
+    ignore = "INSERT OR IGNORE" if db.dialect == 'sqlite' else "INSERT IGNORE"
+    db.execute(f"{ignore} INTO rollup_watermark (name, last_id) VALUES (%s, %s)", ('daily', 0))
+
+def refresh(db, batch=BATCH_ROWS, now=None):
+    # Folds predictions newer than the watermark into the daily rollup. Each
+    # batch and its watermark move commit together, so a crash never counts
+    # a row twice.
+    # The watermark is an id, so rows are taken strictly in id order. A row
+    # inside the settle window ends the batch rather than being skipped:
+    # ids and created_at can disagree (clock skew between clinic PCs, an
+    # explicit created_at), and a skipped row would sit below the watermark
+    # forever.
+    cutoff = (now or datetime.datetime.now()) - datetime.timedelta(seconds=SETTLE_SECONDS)
+    processed = 0
+    while True:
+        with db.transaction():
+            last_id = db.query("SELECT last_id FROM rollup_watermark WHERE name = %s", ('daily',))[0][0]
+            fetched = db.query(
+                """SELECT id, age, risk, status, bp, cholesterol, max_hr, created_at
+                   FROM predictions WHERE id > %s
+                   ORDER BY id LIMIT %s""",
+                (last_id, batch)
+            )
+            rows = []
+            for row in fetched:
+                if as_datetime(row[7]) > cutoff:
+                    break
+                rows.append(row)
+            if not rows:
+                return processed
+            groups = {}
+            for _, age, risk, status, bp, chol, hr, created_at in rows:
+                key = (db.ts(as_date(created_at)), age_band(age or 0), status, risk_bucket(risk or 0))
+                g = groups.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0])
+                g[0] += 1
+                g[1] += risk or 0
+                g[2] += bp or 0
+                g[3] += chol or 0
+                g[4] += hr or 0
+            db.upsert_add('prediction_rollup_daily', KEYS, SUMS,
+                          [k + tuple(v) for k, v in groups.items()], commit=False)
+            db.execute("UPDATE rollup_watermark SET last_id = %s, updated_at = %s WHERE name = %s",
+                       (rows[-1][0], db.ts(datetime.datetime.now()), 'daily'), commit=False)
+            processed += len(rows)
+        if len(rows) < batch:
+            return processed
+
+class RollupJob:
+    # Periodic background refresh; dashboard() also refreshes on demand
+    def __init__(self, db, interval=REFRESH_SECONDS):
+        self.db = db
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                refresh(self.db)
+            except Exception as e:
+                print("Rollup refresh error:", e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rollups", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+# ==============================
+# DASHBOARD QUERIES
+# ==============================
+def period_start(day, period):
+    return day - datetime.timedelta(days=day.weekday()) if period == 'week' else day
+
+def dashboard(db, period='day', days=30, today=None):
+    t0 = time.perf_counter()
+    today = today or datetime.date.today()
+    since = period_start(today - datetime.timedelta(days=days - 1), period)
+    rows = db.query(
+        """SELECT day, age_band, status, risk_bucket, n, sum_risk, sum_bp, sum_chol, sum_hr
+           FROM prediction_rollup_daily WHERE day >= %s""",
+        (db.ts(since),)
+    )
+
+    series, bands = {}, {}
+    distribution = [0] * 10
+    status_counts = {s: 0 for s in STATUSES}
+    total = 0
+    for day, band, status, bucket, n, s_risk, s_bp, s_chol, s_hr in rows:
+        start = period_start(as_date(day), period)
+        p = series.setdefault(start, {"n": 0, "sum_risk": 0.0, "status": {s: 0 for s in STATUSES}})
+        p["n"] += n
+        p["sum_risk"] += s_risk
+        p["status"][status] = p["status"].get(status, 0) + n
+        b = bands.setdefault(band, [0, 0.0, 0.0, 0.0, 0.0])
+        for i, v in enumerate((n, s_risk, s_bp, s_chol, s_hr)):
+            b[i] += v
+        distribution[int(bucket)] += n
+        status_counts[status] = status_counts.get(status, 0) + n
+        total += n
+
+    avg = lambda s, n: round(s / n, 1) if n else None
+    return {
+        "period": period,
+        "since": since.isoformat(),
+        "total": total,
+        "status_counts": status_counts,
+        "series": [
+            {"start": start.isoformat(), "count": p["n"], "avg_risk": avg(p["sum_risk"], p["n"]), **p["status"]}
+            for start, p in sorted(series.items())
+        ],
+        "risk_distribution": [
+            {"bucket": f"{i * 10}-{i * 10 + 10}%", "count": c} for i, c in enumerate(distribution)
+        ],
+        "age_bands": [
+            {"band": name, "count": bands[name][0], "avg_risk": avg(bands[name][1], bands[name][0]),
+             "avg_bp": avg(bands[name][2], bands[name][0]), "avg_chol": avg(bands[name][3], bands[name][0]),
+             "avg_hr": avg(bands[name][4], bands[name][0])}
+            for _, name in AGE_BANDS if name in bands
+        ],
+        "query_ms": round((time.perf_counter() - t0) * 1000, 2)
+    }
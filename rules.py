@@ -0,0 +1,238 @@
+import numpy as np
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+
+OPS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal
+}
+
+_rng = np.random.default_rng()
+
+# --- 1. RULE TABLES ---
+# A condition is (column, op, threshold) or None for "always". Besides the six
+# features, conditions can test the 'risk' percentage and the 'emergency' flag.
+# Tips are appended in table order; the first matching band wins.
+
+HEALTH_TIPS = [
+    "Walking 30 mins a day strengthens the heart muscle.",
+    "Reduce salt intake to lower high blood pressure.",
+    "Eat more fiber (oats, beans) to lower bad cholesterol.",
+    "Avoid smoking to keep your arteries flexible.",
+    "Manage stress through deep breathing or meditation.",
+    "Omega-3 in fish is like 'oil' for your heart's health."
+]
+
+EMERGENCY_TIPS = [
+    "Sit down and try to remain calm.",
+    "Loosen tight clothing to breathe easier.",
+    "Call your local emergency number.",
+    "Do not try to drive yourself to the hospital."
+]
+
+# final.py / heart.py
+FINAL_RULES = {
+    'lists': ['medical', 'food'],
+    'tips': [
+        ('food', None, "Eat fresh fruits and vegetables every day."),
+        ('medical', ('BP', '>', 140), "Your Blood Pressure is high. Please see a doctor."),
+        ('food', ('BP', '>', 140), "Use much less salt in your food."),
+        ('medical', ('Cholesterol', '>', 240), "Your Cholesterol is high. A doctor can help lower it."),
+        ('food', ('Cholesterol', '>', 240), "Avoid fried foods. Eat more oats and beans.")
+    ],
+    'bands': [
+        {'when': ('risk', '>', 70), 'status': "HIGH RISK", 'color': "#ff4757",
+         'tip': ('medical', "CRITICAL: High risk! See a heart specialist immediately.")},
+        {'when': ('risk', '>', 30), 'status': "MEDIUM RISK", 'color': "#ffa502",
+         'tip': ('medical', "CAUTION: Medium risk detected. Watch your health closely.")},
+        {'when': None, 'status': "HEALTHY", 'color': "#2ed573",
+         'tip': ('medical', "Your heart looks healthy! Keep up your good lifestyle.")}
+    ]
+}
+
+# Full.py
+FULL_RULES = {
+    'lists': ['medical', 'food'],
+    'tips': [
+        ('food', None, "Eat fresh fruits and vegetables daily."),
+        ('medical', ('BP', '>', 140), "High Blood Pressure detected."),
+        ('food', ('BP', '>', 140), "Reduce salt intake."),
+        ('medical', ('Cholesterol', '>', 240), "High Cholesterol detected."),
+        ('food', ('Cholesterol', '>', 240), "Avoid fried food. Eat oats and beans.")
+    ],
+    'bands': [
+        {'when': ('risk', '>', 70), 'status': "HIGH RISK", 'color': "#ff4757",
+         'tip': ('medical', "CRITICAL: Consult cardiologist immediately.")},
+        {'when': ('risk', '>', 30), 'status': "MEDIUM RISK", 'color': "#ffa502",
+         'tip': ('medical', "CAUTION: Monitor health closely.")},
+        {'when': None, 'status': "HEALTHY", 'color': "#2ed573",
+         'tip': ('medical', "Heart condition looks good.")}
+    ]
+}
+
+# heart2.py
+CHECKUP_RULES = {
+    'levels': {
+        'BP': [('>=', 140, "High"), ('<', 90, "Low")],
+        'Max HR': [('>=', 100, "High"), ('<', 50, "Low")],
+        'Cholesterol': [('>=', 240, "High")]
+    },
+    'values': [('bp_val', 'BP'), ('hr_val', 'Max HR'), ('chol_val', 'Cholesterol')],
+    'emergency': [('BP', '>', 180), ('Max HR', '>', 160), ('Max HR', '<', 40), ('Chest pain type', '==', 4)],
+    'pools': {'health': HEALTH_TIPS, 'emergency': EMERGENCY_TIPS},
+    'bands': [
+        {'when': ('emergency', '==', 1), 'status': "EMERGENCY", 'color': "#d63031",
+         'msg': "CRITICAL: Your vitals are at a dangerous level. Please seek medical help immediately.",
+         'tips': ('emergency', None)},
+        {'when': ('risk', '>', 40), 'status': "HIGH RISK", 'color': "#e17055",
+         'msg': "Your heart needs more care. Talk to a doctor about these numbers.",
+         'tips': ('health', 3)},
+        {'when': None, 'status': "HEALTHY", 'color': "#00b894",
+         'msg': "Great job! Your heart vitals look good. Keep your healthy habits.",
+         'tips': ('health', 3)}
+    ]
+}
+
+# hey.py only differs in the emergency number it suggests
+HEY_RULES = dict(CHECKUP_RULES, pools={
+    'health': HEALTH_TIPS,
+    'emergency': [t.replace("number.", "number (e.g., 108).") for t in EMERGENCY_TIPS]
+})
+
+RULESETS = {
+    'final': FINAL_RULES,
+    'full': FULL_RULES,
+    'checkup': CHECKUP_RULES,
+    'hey': HEY_RULES
+}
+
+# --- 2. COMPILER ---
+def _compile(cond):
+    if cond is None:
+        return None
+    column, op, threshold = cond
+    return column, OPS[op], threshold
+
+def _mask(cond, cols, n):
+    if cond is None:
+        return np.ones(n, dtype=bool)
+    column, op, threshold = cond
+    return op(cols[column], threshold)
+
+class RuleTable:
+    def __init__(self, spec, features=FEATURES):
+        self.features = list(features)
+        self.lists = list(spec.get('lists', []))
+        self.tips = [(target, _compile(cond), text) for target, cond, text in spec.get('tips', [])]
+        self.emergency = [_compile(c) for c in spec.get('emergency', [])]
+        self.levels = {
+            col: ([_compile((col, op, thr)) for op, thr, _ in rules], ["Normal"] + [lbl for _, _, lbl in rules])
+            for col, rules in spec.get('levels', {}).items()
+        }
+        self.values = list(spec.get('values', []))
+        self.pools = {name: list(tips) for name, tips in spec.get('pools', {}).items()}
+        self.bands = [dict(b, when=_compile(b['when'])) for b in spec['bands']]
+        self.status = np.array([b['status'] for b in self.bands], dtype=object)
+        self.color = np.array([b['color'] for b in self.bands], dtype=object)
+        # How many tips each pool has to draw per row (0 = none)
+        self.draws = {name: 0 for name in self.pools}
+        for b in self.bands:
+            if 'tips' in b and b['tips'][1]:
+                pool, k = b['tips']
+                self.draws[pool] = max(self.draws[pool], k)
+
+    def evaluate(self, X, risk):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.features))
+        risk = np.asarray(risk, dtype=np.float64).reshape(-1)
+        n = len(X)
+        cols = {f: X[:, i] for i, f in enumerate(self.features)}
+        cols['risk'] = risk
+
+        emergency = np.zeros(n, dtype=bool)
+        for cond in self.emergency:
+            emergency |= _mask(cond, cols, n)
+        cols['emergency'] = emergency
+
+        tip_mask = np.empty((n, len(self.tips)), dtype=bool)
+        for k, (_, cond, _) in enumerate(self.tips):
+            tip_mask[:, k] = _mask(cond, cols, n)
+
+        # Walk the if/elif chains backwards so the first match wins
+        levels = {}
+        for col, (conds, _) in self.levels.items():
+            idx = np.zeros(n, dtype=np.int8)
+            for j in range(len(conds) - 1, -1, -1):
+                idx[_mask(conds[j], cols, n)] = j + 1
+            levels[col] = idx
+
+        band = np.full(n, len(self.bands) - 1, dtype=np.int8)
+        for j in range(len(self.bands) - 1, -1, -1):
+            band[_mask(self.bands[j]['when'], cols, n)] = j
+
+        # random.sample(pool, k) for every row at once
+        picks = {
+            name: _rng.random((n, len(self.pools[name]))).argsort(axis=1)[:, :k]
+            for name, k in self.draws.items() if k
+        }
+        return Assessment(self, X, risk, emergency, tip_mask, levels, band, picks)
+
+    def assess_one(self, values, risk):
+        return self.evaluate([values], [risk]).row(0)
+
+class Assessment:
+    def __init__(self, table, X, risk, emergency, tip_mask, levels, band, picks):
+        self.table = table
+        self.X, self.risk = X, risk
+        self.emergency = emergency
+        self.tip_mask = tip_mask
+        self.levels = levels
+        self.band = band
+        self.picks = picks
+
+    def __len__(self):
+        return len(self.band)
+
+    @property
+    def status(self):
+        return self.table.status[self.band]
+
+    @property
+    def color(self):
+        return self.table.color[self.band]
+
+    def row(self, i):
+        t = self.table
+        band = t.bands[self.band[i]]
+        out = {"risk": float(self.risk[i]), "status": band['status'], "color": band['color']}
+        if 'msg' in band:
+            out["msg"] = band['msg']
+
+        lists = {name: [] for name in t.lists}
+        for k in np.flatnonzero(self.tip_mask[i]):
+            target, _, text = t.tips[k]
+            lists[target].append(text)
+        if 'tip' in band:
+            target, text = band['tip']
+            lists[target].append(text)
+        out.update(lists)
+
+        for key, col in t.values:
+            value = float(self.X[i, t.features.index(col)])
+            out[key] = f"{value} ({t.levels[col][1][self.levels[col][i]]})"
+
+        if 'tips' in band:
+            pool, k = band['tips']
+            if k:
+                out["tips"] = [t.pools[pool][j] for j in self.picks[pool][i]]
+            else:
+                out["tips"] = list(t.pools[pool])
+        if t.emergency:
+            out["is_emergency"] = bool(self.emergency[i])
+        return out
+
+    def rows(self):
+        return [self.row(i) for i in range(len(self))]
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from persistence import read_model
+from model_manager import validate_model, file_version
+from backends import predict_risk
+
+# --- CONFIGURATION ---
+# Rows waiting for the shadow worker; anything beyond this is dropped, not queued
+MAX_PENDING_ROWS = 2000
+# Rows scored per candidate call; queued predictions are scored together
+BATCH_ROWS = 500
+# A lone row waits this long for company; one call per batch instead of per row
+# keeps the worker off the CPU while requests are being answered
+LINGER_SECONDS = 1.0
+SHADOW_WORKERS = 1
+LATENCY_SAMPLES = 1000
+# Risk points apart before two scores count as a disagreement (besides a band change)
+RISK_DELTA = 10.0
+
+def latency_us(samples):
+    lat = sorted(samples)
+    pick = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1e6, 1) if lat else None
+    return pick(0.50), pick(0.99)
+
+# --- 1. CANDIDATES ---
+class Candidate:
+    def __init__(self, name, model, path=None):
+        self.name = name
+        self.model = model
+        self.path = path
+        self.version = file_version(path) if path and os.path.exists(path) else "in-memory"
+        self.rows = 0
+        self.band_changes = 0
+        self.big_deltas = 0
+        self.abs_delta = 0.0
+        self.max_delta = 0.0
+        self.errors = 0
+        self.last_error = None
+        self.latency = deque(maxlen=LATENCY_SAMPLES)  # seconds per row, one sample per batch
+        self.added_at = time.time()
+
+    def record(self, delta, band_changed, seconds):
+        n = len(delta)
+        self.rows += n
+        self.band_changes += int(band_changed.sum())
+        self.big_deltas += int((delta >= RISK_DELTA).sum())
+        self.abs_delta += float(delta.sum())
+        self.max_delta = max(self.max_delta, float(delta.max()))
+        self.latency.append(seconds / n)
+
+    def report(self):
+        rows = max(1, self.rows)
+        p50, p99 = latency_us(self.latency)
+        return {
+            "name": self.name,
+            "path": self.path,
+            "version": self.version,
+            "rows": self.rows,
+            "band_disagreement": round(self.band_changes / rows, 4),
+            "risk_disagreement": round(self.big_deltas / rows, 4),
+            "mean_abs_delta": round(self.abs_delta / rows, 2),
+            "max_delta": round(self.max_delta, 1),
+            "us_per_row_p50": p50,
+            "us_per_row_p99": p99,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
+
+# --- 2. SHADOW SCORER ---
+class ShadowScorer:
+    # submit() only appends to a bounded buffer; scoring happens on the
+    # worker thread(s), in batches, after the primary answer has gone back.
+    # When the buffer is full new rows are counted as dropped.
+    # primary() returns the live model; it is re-timed on the same batches so
+    # the latency columns compare like with like.
+    def __init__(self, table, features, primary=None, max_pending=MAX_PENDING_ROWS, batch_rows=BATCH_ROWS,
+                 linger=LINGER_SECONDS, workers=SHADOW_WORKERS):
+        self.table = table
+        self.features = features
+        self.primary = primary
+        self.primary_latency = deque(maxlen=LATENCY_SAMPLES)
+        self.max_pending = max_pending
+        self.batch_rows = batch_rows
+        self.linger = linger
+        self.candidates = {}
+        self.pending = deque()
+        self.pending_rows = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._stop = False
+        self._threads = [threading.Thread(target=self._work, name=f"shadow-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def add(self, path, name=None):
+        # Loaded and checked the same way as a hot-swapped primary
+        mdl = read_model(path, self.features)
+        validate_model(mdl, self.features)
+        return self.add_model(mdl, name or os.path.basename(path), path)
+
+    def add_model(self, model, name, path=None):
+        candidate = Candidate(name, model, path)
+        with self._lock:
+            self.candidates = {**self.candidates, name: candidate}
+        return candidate
+
+    def remove(self, name):
+        with self._lock:
+            if name not in self.candidates:
+                raise KeyError(f"No shadow model '{name}'")
+            self.candidates = {k: v for k, v in self.candidates.items() if k != name}
+
+    def submit(self, X, risk):
+        # X and the primary's risk (0-100) for these rows
+        if not self.candidates:
+            return False
+        n = len(risk)
+        with self._lock:
+            self.submitted += n
+            room = self.max_pending - self.pending_rows
+            if room <= 0:
+                self.dropped += n
+                return False
+            if n > room:
+                # Shadow the rows that fit; only the rest count as dropped
+                X, risk = X[:room], risk[:room]
+                self.dropped += n - room
+                n = room
+            self.pending.append((X, risk))
+            self.pending_rows += n
+            self._ready.notify()
+        return True
+
+    def _take(self):
+        with self._lock:
+            while not self.pending and not self._stop:
+                self._ready.wait()
+            deadline = time.monotonic() + self.linger
+            while self.pending_rows < self.batch_rows and not self._stop:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._ready.wait(left)
+            if self._stop:
+                return None
+            batch, rows = [], 0
+            while self.pending and rows < self.batch_rows:
+                item = self.pending.popleft()
+                batch.append(item)
+                rows += len(item[1])
+            self.pending_rows -= rows
+            return batch
+
+    def _work(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            X = np.concatenate([np.asarray(x, dtype=np.float64).reshape(-1, len(self.features)) for x, _ in batch])
+            risk = np.concatenate([np.asarray(r, dtype=np.float64).reshape(-1) for _, r in batch])
+            band = self.table.evaluate(X, risk).band
+            mdl = self.primary() if self.primary else None
+            if mdl is not None:
+                t0 = time.perf_counter()
+                predict_risk(mdl, X)
+                self.primary_latency.append((time.perf_counter() - t0) / len(X))
+            for cand in list(self.candidates.values()):
+                self._score(cand, X, risk, band)
+            with self._lock:
+                self.scored += len(X)
+
+    def _score(self, cand, X, risk, band):
+        try:
+            t0 = time.perf_counter()
+            shadow_risk = np.round(predict_risk(cand.model, X) * 100, 1)
+            seconds = time.perf_counter() - t0
+            shadow_band = self.table.evaluate(X, shadow_risk).band
+            cand.record(np.abs(shadow_risk - risk), shadow_band != band, seconds)
+        except Exception as e:
+            cand.errors += 1
+            cand.last_error = f"{type(e).__name__}: {e}"
+
+    def report(self):
+        with self._lock:
+            candidates = list(self.candidates.values())
+            totals = {"submitted": self.submitted, "dropped": self.dropped, "scored": self.scored,
+                      "pending": self.pending_rows}
+        totals["drop_rate"] = round(totals["dropped"] / max(1, totals["submitted"]), 4)
+        p50, p99 = latency_us(self.primary_latency)
+        return {**totals, "risk_delta": RISK_DELTA, "primary_us_per_row_p50": p50, "primary_us_per_row_p99": p99,
+                "models": [c.report() for c in candidates]}
+
+    def close(self):
+        with self._lock:
+            self._stop = True
+            self._ready.notify_all()
@@ -0,0 +1,305 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from backends import BACKENDS, DEFAULT_BACKEND
+
+# --- CONFIGURATION ---
+FEATURES = ['Age', 'Sex', 'Chest pain type', 'Cholesterol', 'BP', 'Max HR']
+# Defaults leave half the machine to the webview and other ward software
+TRAIN_CORES = max(1, (os.cpu_count() or 2) // 2)
+TRAIN_NICE = 10
+# Address-space ceiling for the whole run; chunked training shares it out
+# between its processes (ooc_train.split_memory)
+TRAIN_MEMORY_MB = 2048
+
+# Training file layouts: train.csv and the UCI export heart2.py reads
+LAYOUTS = {
+    'app': {
+        'columns': {f: f for f in FEATURES},
+        'target': 'Heart Disease',
+        'labels': {'Absence': 0, 'Presence': 1}
+    },
+    'uci': {
+        'columns': {
+            'age': 'Age',
+            'sex': 'Sex',
+            'cp': 'Chest pain type',
+            'chol': 'Cholesterol',
+            'trestbps': 'BP',
+            'thalach': 'Max HR'
+        },
+        'target': 'num',
+        'labels': None  # 0 = healthy, 1-4 = presence
+    }
+}
+
+# ============================================================
+# CHILD PROCESS
+# ============================================================
+def _emit(event, **fields):
+    print(json.dumps({"event": event, **fields}), flush=True)
+
+def _apply_limits(cores, nice, memory_mb):
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+    if hasattr(os, 'sched_setaffinity'):
+        allowed = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, allowed[:cores])
+    if memory_mb:
+        try:
+            set_memory_limit(memory_mb)
+        except (ImportError, ValueError, OSError) as e:
+            _emit("log", msg=f"Memory ceiling not applied: {e}")
+
+def set_memory_limit(memory_mb):
+    # RLIMIT_AS of this process only; processes it starts begin with the same ceiling
+    import resource
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _read_layout(data_file, layout, **read_opts):
+    import pandas as pd
+    spec = LAYOUTS[layout]
+    # Only the six features and the label are read, which keeps the peak frame small
+    wanted = set(spec['columns']) | {spec['target']}
+    return spec, pd.read_csv(data_file, usecols=lambda c: c.strip() in wanted, **read_opts)
+
+def _to_xy(df, spec):
+    df.columns = [c.strip() for c in df.columns]
+    X = df[list(spec['columns'])].rename(columns=spec['columns'])[FEATURES]
+    if spec['labels']:
+        y = df[spec['target']].map(spec['labels']).fillna(0).astype(int)
+    else:
+        y = (df[spec['target']] > 0).astype(int)
+    return X, y
+
+def load_training_data(data_file, layout='app'):
+    spec, df = _read_layout(data_file, layout)
+    return _to_xy(df, spec)
+
+def iter_training_chunks(data_file, layout='app', chunk_rows=100000):
+    # Same columns and labels as load_training_data, chunk_rows at a time
+    spec, reader = _read_layout(data_file, layout, chunksize=chunk_rows)
+    with reader:
+        for df in reader:
+            yield _to_xy(df, spec)
+
+def _train(args):
+    from persistence import save_model
+    from backends import get_backend
+    from drift import build_baseline
+    if args.chunk_rows:
+        return _train_chunked(args)
+    _emit("log", msg=f"Reading {args.data} ({args.layout} layout)")
+    X, y = load_training_data(args.data, args.layout)
+    backend = get_backend(args.backend)
+    _emit("log", msg=f"Training {backend.name} ({args.trees} trees) on {len(X):,} rows with {args.cores} core(s)")
+    mdl = backend.fit(X, y, n_estimators=args.trees, max_depth=args.depth, n_jobs=args.cores,
+                      progress=lambda done, total: _emit("progress", done=done, total=total))
+    save_model(mdl, args.model, FEATURES, backend=backend.name, training_rows=len(X),
+               training_file=os.path.basename(args.data),
+               drift_baseline=build_baseline(X.to_numpy(), FEATURES))
+    _emit("done", model=args.model, rows=len(X))
+
+def _train_chunked(args):
+    # Out-of-core: the file is never loaded whole (see ooc_train.py)
+    from persistence import save_model
+    from ooc_train import fit_out_of_core
+    if args.backend != 'forest':
+        raise ValueError(f"Chunked training builds a forest; backend '{args.backend}' needs the full frame")
+    mdl, baseline, stats = fit_out_of_core(
+        args.data, args.layout, args.trees, args.depth, args.chunk_rows, workers=args.cores,
+        progress=lambda done, total: _emit("progress", done=done, total=total),
+        log=lambda msg: _emit("log", msg=msg), memory_mb=args.memory_mb)
+    save_model(mdl, args.model, FEATURES, backend='forest', training_rows=stats["rows"],
+               training_file=os.path.basename(args.data), drift_baseline=baseline,
+               out_of_core={k: v for k, v in stats.items() if k != "rows"})
+    _emit("done", model=args.model, rows=stats["rows"])
+
+def child_main(args):
+    try:
+        _apply_limits(args.cores, args.nice, args.memory_mb)
+        if args.profile:
+            # CPU profile and allocation snapshot of this run, written when it ends
+            from profiling import capture
+            with capture(args.profile):
+                _train(args)
+        else:
+            _train(args)
+    except MemoryError:
+        _emit("error", msg=f"Training ran out of memory (ceiling {args.memory_mb} MB)")
+        sys.exit(3)
+    except Exception as e:
+        _emit("error", msg=f"{type(e).__name__}: {e}")
+        sys.exit(2)
+
+# ============================================================
+# PARENT SIDE
+# ============================================================
+class TrainingRunner:
+    # Runs child_main in a separate interpreter, so an out-of-memory kill or a
+    # crash inside sklearn ends that process only, never the UI.
+    def __init__(self, data_file, model_file, layout='app', backend=None, n_estimators=100, max_depth=12,
+                 cores=TRAIN_CORES, nice=TRAIN_NICE, memory_mb=TRAIN_MEMORY_MB,
+                 chunk_rows=None, profile_dir=None, on_event=None, log_lines=200):
+        self.data_file = data_file
+        self.model_file = model_file
+        self.layout = layout
+        self.backend = backend or DEFAULT_BACKEND
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.cores = cores
+        self.nice = nice
+        self.memory_mb = memory_mb
+        self.chunk_rows = chunk_rows
+        self.profile_dir = profile_dir
+        self.on_event = on_event
+        self.log = deque(maxlen=log_lines)
+        self.state = "idle"
+        self.progress = 0.0
+        self.error = None
+        self.exit_code = None
+        self.started_at = None
+        self.finished_at = None
+        self._proc = None
+        self._finished = threading.Event()
+
+    def _command(self):
+        cmd = [
+            sys.executable, os.path.abspath(__file__), '--child',
+            '--data', self.data_file, '--model', self.model_file, '--layout', self.layout,
+            '--backend', self.backend,
+            '--trees', str(self.n_estimators), '--depth', str(self.max_depth),
+            '--cores', str(self.cores), '--nice', str(self.nice), '--memory-mb', str(self.memory_mb)
+        ]
+        if self.chunk_rows:
+            cmd += ['--chunk-rows', str(self.chunk_rows)]
+        if self.profile_dir:
+            cmd += ['--profile', self.profile_dir]
+        return cmd
+
+    def start(self):
+        env = dict(os.environ)
+        # Keep BLAS/OpenMP thread pools inside the core budget as well
+        for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+            env[var] = str(self.cores)
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        self.state = "running"
+        self.started_at = time.time()
+        self._proc = subprocess.Popen(
+            self._command(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1, env=env, cwd=os.getcwd(), **kwargs
+        )
+        threading.Thread(target=self._pump, name="train-runner", daemon=True).start()
+        return self
+
+    def _handle(self, event):
+        kind = event.get("event")
+        if kind == "progress":
+            self.progress = event["done"] / event["total"]
+        elif kind == "log":
+            self.log.append(event["msg"])
+        elif kind == "error":
+            self.error = event["msg"]
+        elif kind == "done":
+            self.progress = 1.0
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                self.log.append(f"on_event callback failed: {e}")
+
+    def _pump(self):
+        for line in self._proc.stdout:
+            line = line.rstrip()
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Plain output from sklearn/joblib or a traceback
+                event = {"event": "log", "msg": line}
+            self._handle(event)
+        self.exit_code = self._proc.wait()
+        self.finished_at = time.time()
+        if self.exit_code == 0:
+            self.state = "done"
+        else:
+            self.state = "failed"
+            if self.error is None:
+                if self.exit_code < 0:
+                    self.error = f"Training process killed by signal {-self.exit_code} (out of memory?)"
+                else:
+                    self.error = f"Training process exited with code {self.exit_code}"
+        self._handle({"event": "finished", "state": self.state, "error": self.error})
+        self._finished.set()
+
+    def wait(self, timeout=None):
+        self._finished.wait(timeout)
+        return self.state == "done"
+
+    @property
+    def running(self):
+        return self.state == "running"
+
+    def cancel(self):
+        if self._proc and self._proc.poll() is None:
+            self._proc.terminate()
+            self.error = "Training cancelled"
+
+    def status(self):
+        fmt = lambda t: datetime.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") if t else None
+        return {
+            "state": self.state,
+            "progress": round(self.progress * 100, 1),
+            "error": self.error,
+            "exit_code": self.exit_code,
+            "started_at": fmt(self.started_at),
+            "finished_at": fmt(self.finished_at),
+            "log": list(self.log)[-20:]
+        }
+
+def run_training(data_file, model_file, **opts):
+    # Blocking helper for start-up training; progress is echoed to the console
+    def echo(event):
+        if event["event"] == "log":
+            print(f"   {event['msg']}")
+        elif event["event"] == "progress":
+            print(f"   {event['done']}/{event['total']} trees")
+    runner = TrainingRunner(data_file, model_file, on_event=echo, **opts).start()
+    if not runner.wait():
+        print(f"❌ Training failed: {runner.error}")
+    return runner
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the HeartGuard forest in an isolated process.")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--data', required=True)
+    parser.add_argument('--model', required=True)
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='app')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--depth', type=int, default=12)
+    parser.add_argument('--cores', type=int, default=TRAIN_CORES)
+    parser.add_argument('--nice', type=int, default=TRAIN_NICE)
+    parser.add_argument('--memory-mb', type=int, default=TRAIN_MEMORY_MB)
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help="Train out of core, this many rows per chunk and worker process")
+    parser.add_argument('--profile', metavar='DIR', help="Write a CPU/allocation profile of the run to DIR")
+    args = parser.parse_args(argv)
+    if args.child:
+        child_main(args)
+    else:
+        runner = run_training(args.data, args.model, layout=args.layout, backend=args.backend,
+                              n_estimators=args.trees, max_depth=args.depth, cores=args.cores,
+                              nice=args.nice, memory_mb=args.memory_mb, chunk_rows=args.chunk_rows)
+        sys.exit(0 if runner.state == "done" else 1)
+
+if __name__ == '__main__':
+    main()
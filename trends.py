@@ -0,0 +1,65 @@
+import datetime
+
+# --- CONFIGURATION ---
+TREND_POINTS = 120
+MAX_PATIENT_ID = 64
+
+FIELDS = ['risk', 'bp', 'cholesterol', 'max_hr']
+
+def clean_patient_id(value):
+    # Optional everywhere: blank means an anonymous reading
+    value = str(value or '').strip()
+    if not value:
+        return None
+    if len(value) > MAX_PATIENT_ID:
+        raise ValueError(f"Patient ID is limited to {MAX_PATIENT_ID} characters")
+    return value
+
+def as_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+def downsample(readings, points=TREND_POINTS):
+    # Equal time buckets, averaged; max risk per bucket keeps short spikes
+    # visible in the sparkline. Short series are returned as they are.
+    if len(readings) <= points:
+        return [{"t": t.isoformat(timespec='minutes'), "n": 1, "risk_max": r[0],
+                 **{f: round(v, 1) if v is not None else None for f, v in zip(FIELDS, r)}}
+                for t, r in readings]
+    first, last = readings[0][0], readings[-1][0]
+    width = max((last - first).total_seconds() / points, 1e-6)
+    buckets = {}
+    for t, values in readings:
+        i = min(points - 1, int((t - first).total_seconds() / width))
+        b = buckets.setdefault(i, [t, 0, [0.0] * len(FIELDS), values[0]])
+        b[1] += 1
+        for j, v in enumerate(values):
+            b[2][j] += v or 0
+        b[3] = max(b[3], values[0])
+    return [
+        {"t": start.isoformat(timespec='minutes'), "n": n, "risk_max": round(peak, 1),
+         **{f: round(s / n, 1) for f, s in zip(FIELDS, sums)}}
+        for _, (start, n, sums, peak) in sorted(buckets.items())
+    ]
+
+def patient_trend(db, patient_id, points=TREND_POINTS, since=None):
+    patient_id = clean_patient_id(patient_id)
+    if patient_id is None:
+        raise ValueError("Patient ID is required")
+    # Range scan on idx_predictions_patient_time, already in time order
+    query = f"SELECT created_at, {', '.join(FIELDS)} FROM predictions WHERE patient_id = %s"
+    params = [patient_id]
+    if since:
+        query += " AND created_at >= %s"
+        params.append(db.ts(since))
+    rows = db.query(query + " ORDER BY created_at", tuple(params))
+    readings = [(as_datetime(r[0]), r[1:]) for r in rows]
+    return {
+        "patient_id": patient_id,
+        "readings": len(readings),
+        "first": readings[0][0].isoformat(timespec='minutes') if readings else None,
+        "last": readings[-1][0].isoformat(timespec='minutes') if readings else None,
+        "latest": dict(zip(FIELDS, readings[-1][1])) if readings else None,
+        "series": downsample(readings, points)
+    }